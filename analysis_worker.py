@@ -0,0 +1,88 @@
+import queue
+import threading
+from typing import Any, Callable, Optional
+from hand_cache import AnalysisCancelled
+
+class AnalysisWorker:
+    """
+    GUIを止めずに重い解析（おすすめ捨て牌など）を行うバックグラウンドワーカー
+    新しい要求は古い要求を置き換え、結果はTkのメインスレッドに渡される
+    """
+    def __init__(self, root, analyze: Callable, on_result: Callable, poll_interval: int = 50):
+        """
+        analyze(request, is_cancelled) -> result: ワーカースレッドで実行される解析関数
+            （途中で is_cancelled() が True になったら AnalysisCancelled を送出して中断する）
+        on_result(version, result): メインスレッドで呼ばれる結果通知
+        """
+        self.root = root
+        self.analyze = analyze
+        self.on_result = on_result
+        self.poll_interval = poll_interval
+
+        self._condition = threading.Condition()
+        self._pending = None  # (version, request)
+        self._latest_version = None
+        self._results = queue.Queue()
+        self._running = True
+
+        self._thread = threading.Thread(target=self._work_loop, daemon=True)
+        self._thread.start()
+        self.root.after(self.poll_interval, self._poll_results)
+
+    def submit(self, version: int, request: Any):
+        """解析を要求する（まだ処理されていない前回の要求は破棄）"""
+        with self._condition:
+            self._pending = (version, request)
+            self._latest_version = version
+            self._condition.notify()
+
+    def cancel(self):
+        """待機中・実行中の要求を取り消す"""
+        with self._condition:
+            self._pending = None
+            self._latest_version = None
+
+    def stop(self):
+        """ワーカーを停止する"""
+        with self._condition:
+            self._running = False
+            self._pending = None
+            self._condition.notify()
+
+    def is_stale(self, version: int) -> bool:
+        """より新しい要求が来ているかどうか"""
+        return version != self._latest_version
+
+    def _work_loop(self):
+        while True:
+            with self._condition:
+                while self._running and self._pending is None:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                version, request = self._pending
+                self._pending = None
+
+            try:
+                result = self.analyze(request, lambda: self.is_stale(version))
+            except AnalysisCancelled:
+                continue
+            except Exception as e:
+                print(f"解析エラー: {e}")
+                continue
+
+            if not self.is_stale(version):
+                self._results.put((version, result))
+
+    def _poll_results(self):
+        """メインスレッドで結果を受け取り、古い結果は捨てる"""
+        if not self._running:
+            return
+        try:
+            while True:
+                version, result = self._results.get_nowait()
+                if not self.is_stale(version):
+                    self.on_result(version, result)
+        except queue.Empty:
+            pass
+        self.root.after(self.poll_interval, self._poll_results)
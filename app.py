@@ -23,6 +23,13 @@ except ImportError:
     print("インストール方法: pip install Pillow")
     sys.exit(1)
 
+try:
+    import numpy
+except ImportError:
+    print("エラー: numpyライブラリが必要です。")
+    print("インストール方法: pip install numpy")
+    sys.exit(1)
+
 # アプリケーションモジュールのインポート
 try:
     from multiplayer_gui import MultiPlayerMahjongGUI
@@ -0,0 +1,135 @@
+import os
+import threading
+from typing import Optional
+from PIL import Image, ImageTk
+from tile import Tile, NUM_TILE_KINDS, kind_to_type_number
+from settings import Settings
+
+# 牌画像・設定ファイルの変更の検出
+# ファイルの確認（stat）は監視スレッドが一定間隔で行うだけにし、描画のたびには行わない
+# 変わった牌種だけを画像キャッシュから消し、GUIはまとめて1回だけ描き直す
+
+POLL_INTERVAL = 1.0  # 監視の間隔（秒）
+
+DEFAULT_IMAGE_PATHS = [Tile(*kind_to_type_number(kind)).get_default_image_path() for kind in range(NUM_TILE_KINDS)]
+
+def _signature(image_path: Optional[str]) -> Optional[tuple]:
+    """(パス, 更新時刻, サイズ)（ファイルがなければNone）"""
+    if not image_path:
+        return None
+    try:
+        stat = os.stat(image_path)
+    except OSError:
+        return None
+    return (image_path, stat.st_mtime_ns, stat.st_size)
+
+class TileAssets:
+    """
+    牌種ごとに使う画像ファイル（Tile.get_image_path と同じく、カスタム画像があればそれ、なければ assets の既定画像）
+    ファイルの有無と更新時刻は scan() の時だけ調べる
+    """
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._signatures: list[Optional[tuple]] = [None] * NUM_TILE_KINDS
+        self._lock = threading.Lock()
+        self.scan()
+
+    def path(self, kind: int) -> Optional[str]:
+        """使う画像のパス（どちらの画像もなければNone）"""
+        signature = self._signatures[kind]
+        return signature[0] if signature else None
+
+    def scan(self) -> set:
+        """全牌種の画像を確かめ直し、使う画像やその内容が変わった牌種を返す"""
+        changed = set()
+        with self._lock:
+            for kind in range(NUM_TILE_KINDS):
+                signature = _signature(self.settings.get_custom_image_by_kind(kind)) or \
+                    _signature(DEFAULT_IMAGE_PATHS[kind])
+                if signature != self._signatures[kind]:
+                    self._signatures[kind] = signature
+                    changed.add(kind)
+        return changed
+
+class AssetWatcher:
+    """設定ファイルと牌画像を別スレッドで定期的に確認し、変わった牌種をためておく（GUIが take_changes() で受け取る）"""
+    def __init__(self, settings: Settings, assets: TileAssets, interval: float = POLL_INTERVAL):
+        self.settings = settings
+        self.assets = assets
+        self.interval = interval
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._watch_loop, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _watch_loop(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"画像の監視エラー: {e}")
+
+    def poll(self) -> set:
+        """今すぐ確認する（画像設定を変えた直後など）。変わった牌種は take_changes() にもたまる"""
+        self.settings.reload_if_changed()
+        changed = self.assets.scan()
+        if changed:
+            with self._lock:
+                self._pending |= changed
+        return changed
+
+    def take_changes(self) -> set:
+        """前回から変わった牌種（何度変わっても1回分にまとめる）"""
+        with self._lock:
+            changed, self._pending = self._pending, set()
+        return changed
+
+class TileImageCache:
+    """
+    牌種ごとに縮小済みの PhotoImage を保持する（全ての TileWidget で共有し、同じ画像を何度も読み込まない）
+    画像がない牌種も覚えておくので、描画のたびにファイルを確認しない
+    """
+    def __init__(self, size: tuple = (25, 35)):
+        self.size = size
+        self.assets: Optional[TileAssets] = None
+        self._photos = {}  # 牌種 -> PhotoImage（画像がなければNone）
+
+    def bind(self, assets: TileAssets):
+        self.assets = assets
+        self._photos.clear()
+
+    def get(self, kind: int) -> Optional[ImageTk.PhotoImage]:
+        if kind in self._photos:
+            return self._photos[kind]
+        image_path = self.assets.path(kind) if self.assets is not None else None
+        photo = None
+        if image_path:
+            try:
+                with Image.open(image_path) as img:
+                    photo = ImageTk.PhotoImage(img.resize(self.size, Image.Resampling.LANCZOS))
+            except OSError as e:
+                print(f"牌画像の読み込みに失敗しました: {image_path}: {e}")
+        self._photos[kind] = photo
+        return photo
+
+    def invalidate(self, kinds):
+        for kind in kinds:
+            self._photos.pop(kind, None)
+
+    def clear(self):
+        self._photos.clear()
+
+    def __len__(self) -> int:
+        return len(self._photos)
@@ -0,0 +1,221 @@
+import argparse
+import asyncio
+import time
+from concurrent.futures import Executor
+from typing import Callable, Optional
+from game_logic import MultiPlayerGameState, PlayerType, ClaimType, Hand
+from cpu_player import CPUPlayer, find_tile_index_by_kind
+import metrics
+
+class AsyncGameController:
+    """
+    asyncioで1卓を進行するコントローラー
+    GameController と同じ進行（ツモ → 捨て牌 → 次の手番）を、スレッドではなくタスクとして行う
+    人間プレイヤーの捨て牌は Future で待ち、CPUの思考は必要に応じて executor で実行する
+    """
+    def __init__(self, game_state: MultiPlayerGameState, cpu_players: Optional[dict] = None,
+                 turn_delay: float = 1.5, executor: Optional[Executor] = None,
+                 on_human_turn: Optional[Callable] = None, on_claim_offer: Optional[Callable] = None,
+                 claim_timeout: float = 10.0):
+        """
+        on_human_turn(player_id): 人間プレイヤーの捨て牌待ちになった時に呼ばれる
+        on_claim_offer(player_id, kind, claims): 人間プレイヤーが鳴ける時に呼ばれる（claim_timeout 秒で見送り扱い）
+        """
+        self.game_state = game_state
+        if cpu_players is None:
+            cpu_players = {
+                player.player_id: CPUPlayer("normal")
+                for player in game_state.players if player.player_type == PlayerType.CPU
+            }
+        self.cpu_players = cpu_players
+        self.turn_delay = turn_delay
+        self.executor = executor  # Noneの場合はイベントループ上で直接思考する
+        self.on_human_turn = on_human_turn
+        self.on_claim_offer = on_claim_offer
+        self.claim_timeout = claim_timeout
+        self._human_action: Optional[asyncio.Future] = None
+        self._human_player_id = -1
+        self._claim_answers = {}  # プレイヤーID -> 鳴きの返答待ちの Future
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> asyncio.Task:
+        """進行タスクを開始する"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+        return self._task
+
+    def stop(self):
+        """進行タスクを止める"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+    async def run(self):
+        """1局が終わるまで進行する"""
+        while not self.game_state.is_game_over():
+            player = self.game_state.get_current_player()
+            if player.player_type == PlayerType.HUMAN:
+                await self._human_turn(player.player_id)
+            else:
+                await self._cpu_turn(player.player_id)
+            await self._finish_turn()
+
+    async def _cpu_turn(self, player_id: int):
+        turn_deadline = time.monotonic() + self.turn_delay
+        player = self.game_state.players[player_id]
+        if player.needs_draw():
+            self.game_state.draw_tile_for_player(player_id)
+        if self.game_state.can_tsumo(player_id):
+            self.game_state.declare_tsumo(player_id)
+            return
+
+        cpu = self.cpu_players[player_id]
+        args = (self.game_state.get_mountain_count(), turn_deadline, len(player.melds),
+                self.game_state.get_danger_vector(player_id))
+        if self.executor is not None:
+            # 別スレッドには手牌・未見牌の写しを渡し、選ばれた牌種で実際の手牌から捨てる
+            hand = Hand(player.hand)
+            remaining = list(self.game_state.get_remaining_counts(player_id))
+            loop = asyncio.get_running_loop()
+            index = await loop.run_in_executor(self.executor, cpu.choose_discard_tile, hand, remaining, *args)
+            discard_index = find_tile_index_by_kind(player.hand, hand[index].kind) if 0 <= index < len(hand) else -1
+        else:
+            discard_index = cpu.choose_discard_tile(player.hand, self.game_state.get_remaining_counts(player_id),
+                                                    *args)
+        if not self.game_state.discard_tile_for_player(player_id, discard_index):
+            print(f"CPU{player_id} 無効な捨て牌インデックス: {discard_index}")
+
+        # 思考に使わなかった残り時間だけ待機
+        remaining = turn_deadline - time.monotonic()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+
+    async def _human_turn(self, player_id: int):
+        player = self.game_state.players[player_id]
+        if player.needs_draw():
+            self.game_state.draw_tile_for_player(player_id)
+
+        loop = asyncio.get_running_loop()
+        self._human_player_id = player_id
+        self._human_action = loop.create_future()
+        if self.on_human_turn:
+            self.on_human_turn(player_id)
+        try:
+            action = await self._human_action
+        finally:
+            self._human_action = None
+            self._human_player_id = -1
+        if action is None:
+            # 手番の途中でCPUに交代した
+            await self._cpu_turn(player_id)
+
+    async def _finish_turn(self):
+        """直前の捨て牌への鳴きを確認し、鳴きがなければ次の手番へ進める（人間の返答は並行して待つ）"""
+        if not self.game_state.game_active:
+            return  # ツモ和了で終局済み
+        options = self.game_state.get_claim_options()
+        if options:
+            kind = self.game_state.last_discard[1].kind
+            requests = {}
+            loop = asyncio.get_running_loop()
+            for player_id, claims in options.items():
+                player = self.game_state.players[player_id]
+                if player.player_type == PlayerType.HUMAN:
+                    self._claim_answers[player_id] = loop.create_future()
+                    if self.on_claim_offer:
+                        self.on_claim_offer(player_id, kind, claims)
+                else:
+                    requests[player_id] = self.cpu_players[player_id].choose_claim(
+                        player.hand, kind, claims, len(player.melds))
+            if self._claim_answers:
+                try:
+                    answers = await asyncio.wait_for(
+                        asyncio.gather(*self._claim_answers.values()), self.claim_timeout)
+                    requests.update(zip(self._claim_answers.keys(), answers))
+                except asyncio.TimeoutError:
+                    # 時間内に返答しなかった人は見送り
+                    for player_id, future in self._claim_answers.items():
+                        if future.done() and not future.cancelled():
+                            requests[player_id] = future.result()
+                finally:
+                    self._claim_answers = {}
+            if self.game_state.resolve_claims(requests):
+                return
+        self.game_state.next_turn()
+
+    def is_waiting_claim(self, player_id: int) -> bool:
+        """指定プレイヤーの鳴きの返答を待っているかどうか"""
+        future = self._claim_answers.get(player_id)
+        return future is not None and not future.done()
+
+    def human_claim(self, player_id: int, claim_type: Optional[ClaimType], pattern: Optional[tuple] = None) -> bool:
+        """人間プレイヤーの鳴きの返答（claim_type=None で見送り、イベントループのスレッドから呼ぶこと）"""
+        if not self.is_waiting_claim(player_id):
+            return False
+        options = self.game_state.get_claim_options().get(player_id, [])
+        if claim_type is not None and claim_type not in options:
+            return False
+        self._claim_answers[player_id].set_result((claim_type, pattern) if claim_type is not None else None)
+        return True
+
+    def replace_with_cpu(self, player_id: int, difficulty: str = "normal"):
+        """人間プレイヤーをCPUに交代する（切断時など。待っている捨て牌・鳴きの返答はCPUが引き継ぐ）"""
+        player = self.game_state.players[player_id]
+        if player.player_type == PlayerType.CPU:
+            return
+        player.player_type = PlayerType.CPU
+        cpu = self.cpu_players.setdefault(player_id, CPUPlayer(difficulty))
+        claim_answer = self._claim_answers.get(player_id)
+        if claim_answer is not None and not claim_answer.done():
+            kind = self.game_state.last_discard[1].kind
+            claims = self.game_state.get_claim_options().get(player_id, [])
+            claim_answer.set_result(cpu.choose_claim(player.hand, kind, claims, len(player.melds)))
+        if self.is_waiting_for(player_id) and not self._human_action.done():
+            self._human_action.set_result(None)
+
+    def is_waiting_for(self, player_id: int) -> bool:
+        """指定プレイヤーの捨て牌を待っているかどうか"""
+        return self._human_action is not None and self._human_player_id == player_id
+
+    def human_tsumo(self, player_id: int) -> bool:
+        """人間プレイヤーのツモ和了（イベントループのスレッドから呼ぶこと）"""
+        if not self.is_waiting_for(player_id) or self._human_action.done():
+            return False
+        if not self.game_state.declare_tsumo(player_id):
+            return False
+        self._human_action.set_result(-1)
+        return True
+
+    def human_discard(self, player_id: int, tile_index: int) -> bool:
+        """人間プレイヤーの捨て牌（イベントループのスレッドから呼ぶこと）"""
+        if not self.is_waiting_for(player_id) or self._human_action.done():
+            return False
+        if not self.game_state.discard_tile_for_player(player_id, tile_index):
+            return False
+        self._human_action.set_result(tile_index)
+        return True
+
+async def host_tables(table_count: int, turn_delay: float, executor: Optional[Executor] = None) -> list:
+    """全員CPUの卓を同時に進行し、終わった卓の状態を返す"""
+    all_cpu = [PlayerType.CPU] * 4
+    states = [MultiPlayerGameState(all_cpu) for _ in range(table_count)]
+    controllers = [AsyncGameController(state, turn_delay=turn_delay, executor=executor) for state in states]
+    await asyncio.gather(*(controller.run() for controller in controllers))
+    return states
+
+def main():
+    parser = argparse.ArgumentParser(description="1プロセスで多数の卓を進行する")
+    parser.add_argument("--tables", type=int, default=1000, help="同時に進行する卓の数")
+    parser.add_argument("--delay", type=float, default=0.01, help="1手あたりの進行間隔（秒）")
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+
+    exporter = metrics.start_from_args(args)
+    start = time.perf_counter()
+    states = asyncio.run(host_tables(args.tables, args.delay))
+    elapsed = time.perf_counter() - start
+    print(f"{len(states)}卓 終了: {elapsed:.2f}秒")
+    if exporter:
+        exporter.stop()
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,203 @@
 import random
-from typing import Optional
-from tile import Tile
+import time
+from typing import Callable, Optional
+import numpy as np
+from tile import Tile, NUM_TILE_KINDS, JIHAI_START
+from hand_cache import HandEvalCache, AnalysisCancelled, get_shared_cache
+from ismcts import ISMCTSSearch
+from endgame import EndgameSolver, ENDGAME_THRESHOLD
+from game_logic import ClaimType
+import metrics
+
+# 危険度1.0の牌を何向聴分の損とみなすか（聴牌から遠いほど重く見る）
+DANGER_WEIGHT = 1.0
+# 危険度を考え始める向聴数（これより聴牌に近ければ危険度は見ない）
+DEFENCE_SHANTEN = 2
+
+def hand_to_counts(hand: list[Tile]) -> list[int]:
+    """手牌を牌種ごとの枚数（34要素）に変換する"""
+    if hasattr(hand, "kind_counts"):
+        return hand.kind_counts()
+    counts = [0] * NUM_TILE_KINDS
+    for tile in hand:
+        counts[tile.kind] += 1
+    return counts
+
+def find_tile_index_by_kind(hand: list[Tile], kind: int) -> int:
+    """手牌の中で指定した牌種の牌のインデックスを返す（無い場合は-1）"""
+    for i, tile in enumerate(hand):
+        if tile.kind == kind:
+            return i
+    return -1
 
 class CPUPlayer:
-    def __init__(self, difficulty: str = "normal"):
+    def __init__(self, difficulty: str = "normal", cache: Optional[HandEvalCache] = None):
         self.difficulty = difficulty
+        # 手牌評価キャッシュ（指定がなければプロセス内で共有）
+        self.cache = cache if cache is not None else get_shared_cache()
+        # expert用の探索（前回の探索木を再利用するためCPUごとに保持）
+        self.searcher = ISMCTSSearch(self.cache) if difficulty == "expert" else None
+        # hard・expert用の終盤探索（山の残りが ENDGAME_THRESHOLD 以下になったら使う）
+        self.endgame = EndgameSolver(self.cache) if difficulty in ("hard", "expert") else None
+        self.latency = metrics.DECISION_LATENCY.labels(difficulty=difficulty)
     
-    def choose_discard_tile(self, hand: list[Tile]) -> int:
+    def choose_discard_tile(self, hand: list[Tile], remaining_counts: Optional[list[int]] = None,
+                            mountain_count: Optional[int] = None, deadline: Optional[float] = None,
+                            melds: int = 0, danger: Optional[list[float]] = None,
+                            should_stop: Optional[Callable] = None) -> int:
         """
         CPUが捨てる牌を選択する
-        現在はランダム選択だが、後で戦略的なロジックに拡張可能
+        remaining_counts: 自分から見た未見牌の牌種ごとの枚数（受け入れ枚数の計算に使用）
+        mountain_count: 山の残り枚数, deadline: 思考の期限（time.monotonic() 基準、expertと終盤探索で使用）
+        melds: 鳴いた面子の数, danger: 牌種ごとの放銃の危険度（hardのみ使用）
+        should_stop: True を返したら探索を打ち切ってその時点の結果を返す（自動進行の停止時など）
         """
         if not hand:
             return -1
         
+        start = time.perf_counter()
+        discard_index = self._choose_discard(hand, remaining_counts, mountain_count, deadline, melds, danger,
+                                             should_stop)
+        self.latency.observe(time.perf_counter() - start)
+        return discard_index
+    
+    def _choose_discard(self, hand: list[Tile], remaining_counts: Optional[list[int]],
+                        mountain_count: Optional[int], deadline: Optional[float], melds: int,
+                        danger: Optional[list[float]] = None, should_stop: Optional[Callable] = None) -> int:
+        if (self.endgame is not None and remaining_counts is not None and mountain_count is not None
+                and mountain_count <= ENDGAME_THRESHOLD):
+            return self._choose_endgame_discard(hand, remaining_counts, mountain_count, deadline, melds, danger,
+                                                should_stop)
         if self.difficulty == "easy":
             return self._choose_random_discard(hand)
         elif self.difficulty == "normal":
             return self._choose_strategic_discard(hand)
         elif self.difficulty == "hard":
-            return self._choose_advanced_discard(hand)
+            return self._choose_advanced_discard(hand, remaining_counts, melds, danger)
+        elif self.difficulty == "expert":
+            return self._choose_search_discard(hand, remaining_counts, mountain_count, deadline, melds, should_stop)
         else:
             return self._choose_random_discard(hand)
     
+    def choose_claim(self, hand, kind: int, options: list, melds: int = 0) -> Optional[tuple]:
+        """
+        捨て牌を鳴くかどうかを判断する
+        ロンできれば必ずロンし、ポン・チーは鳴いて1枚捨てた後の向聴数が今より進む場合だけ鳴く（easyは鳴かない）
+        hand: 手牌（Hand）, options: 鳴ける種類（ClaimType のリスト）
+        戻り値: (ClaimType, チーで出す2枚の牌種 or None)、見送る場合はNone
+        """
+        if ClaimType.RON in options:
+            return ClaimType.RON, None
+        if self.difficulty == "easy":
+            return None
+        
+        counts = hand_to_counts(hand)
+        candidates = []
+        if ClaimType.PON in options:
+            candidates.append((ClaimType.PON, None, (kind, kind)))
+        if ClaimType.CHI in options:
+            for pattern in hand.chi_patterns(kind):
+                candidates.append((ClaimType.CHI, pattern, pattern))
+        
+        best, best_shanten = None, self.cache.shanten(counts, melds)
+        for claim_type, pattern, used_kinds in candidates:
+            for used_kind in used_kinds:
+                counts[used_kind] -= 1
+            shanten = min(self._shanten_after_discard(counts, melds + 1))
+            for used_kind in used_kinds:
+                counts[used_kind] += 1
+            if shanten < best_shanten:
+                best, best_shanten = (claim_type, pattern), shanten
+        return best
+    
+    def _shanten_after_discard(self, counts: list[int], melds: int):
+        for kind in range(NUM_TILE_KINDS):
+            if counts[kind]:
+                counts[kind] -= 1
+                yield self.cache.shanten(counts, melds)
+                counts[kind] += 1
+    
+    def choose_discard_batch(self, counts) -> np.ndarray:
+        """
+        複数の手牌をまとめて評価し、それぞれ捨てる牌種を返す
+        場の情報なしで choose_discard_tile を呼んだ時と同じ選び方をする
+        （normal は字牌・孤立牌、hard・expert は向聴数と受け入れ枚数の順位、それ以外はランダム）
+        counts: (N, 34) の牌種ごとの枚数配列
+        戻り値: (N,) の牌種インデックス配列（手牌が空の行は-1）
+        """
+        counts = np.asarray(counts)
+        if counts.ndim != 2 or counts.shape[1] != NUM_TILE_KINDS:
+            raise ValueError(f"countsは(N, {NUM_TILE_KINDS})の配列である必要があります: {counts.shape}")
+        
+        present = counts > 0
+        if self.difficulty in ("hard", "expert"):
+            return self._batch_ranked_discards(counts)
+        if self.difficulty == "normal":
+            candidates = self._batch_strategic_candidates(present)
+        else:
+            candidates = present
+        
+        # 候補の中からランダムに1つ選ぶ（候補外は-1で除外）
+        noise = np.random.random(counts.shape)
+        choices = np.argmax(np.where(candidates, noise, -1.0), axis=1)
+        choices[~present.any(axis=1)] = -1
+        return choices
+    
+    def _batch_ranked_discards(self, counts: np.ndarray) -> np.ndarray:
+        """
+        rank_discards の1位（向聴数・受け入れ枚数の順位）をまとめて求める
+        全ての (手牌, 捨て牌) の組を展開し、捨てた後の手牌は重複を除いてからキャッシュで評価する
+        """
+        choices = np.full(len(counts), -1, dtype=np.int64)
+        rows, discards = np.nonzero(counts > 0)
+        if not len(rows):
+            return choices
+        # after[j] は手牌 rows[j] から牌種 discards[j] を1枚捨てた後の枚数
+        after = counts[rows].astype(np.int8)
+        after[np.arange(len(rows)), discards] -= 1
+        unique, inverse = np.unique(after, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        
+        unique_shanten = np.empty(len(unique), dtype=np.int16)
+        waits = np.zeros(unique.shape, dtype=bool)
+        for u, row in enumerate(unique.tolist()):
+            unique_shanten[u] = self.cache.shanten(row)
+            waits[u, self.cache.ukeire(row)] = True
+        shanten = unique_shanten[inverse]
+        ukeire = np.where(waits[inverse], 4 - after, 0).sum(axis=1)
+        
+        # rank_discards と同じ順（向聴数、受け入れの多さ、字牌、牌種）で並べ、手牌ごとの先頭を選ぶ
+        order = np.lexsort((discards, discards < JIHAI_START, -ukeire, shanten, rows))
+        sorted_rows = rows[order]
+        first = np.flatnonzero(np.r_[True, sorted_rows[1:] != sorted_rows[:-1]])
+        choices[sorted_rows[first]] = discards[order][first]
+        return choices
+    
+    def _batch_strategic_candidates(self, present: np.ndarray) -> np.ndarray:
+        """_choose_strategic_discard と同じ優先順位の候補をまとめて求める"""
+        n = present.shape[0]
+        
+        # 字牌を優先的に捨てる（手牌順の代わりに最小の牌種）
+        jihai = present[:, JIHAI_START:]
+        first_jihai = JIHAI_START + np.argmax(jihai, axis=1)
+        jihai_mask = np.zeros_like(present)
+        jihai_mask[np.arange(n), first_jihai] = True
+        has_jihai = jihai.any(axis=1)
+        
+        # 孤立牌（同種の隣接する数字がない数牌）
+        suits = present[:, :JIHAI_START].reshape(n, 3, 9)
+        neighbor = np.zeros_like(suits)
+        neighbor[:, :, 1:] |= suits[:, :, :-1]
+        neighbor[:, :, :-1] |= suits[:, :, 1:]
+        isolated = np.zeros_like(present)
+        isolated[:, :JIHAI_START] = (suits & ~neighbor).reshape(n, JIHAI_START)
+        has_isolated = isolated.any(axis=1)
+        
+        return np.where(
+            has_jihai[:, None], jihai_mask,
+            np.where(has_isolated[:, None], isolated, present)
+        )
+    
     def _choose_random_discard(self, hand: list[Tile]) -> int:
         """完全ランダムで捨て牌を選択"""
         return random.randint(0, len(hand) - 1)
@@ -42,39 +217,81 @@ class CPUPlayer:
         # それでもない場合はランダム
         return self._choose_random_discard(hand)
     
-    def _choose_advanced_discard(self, hand: list[Tile]) -> int:
-        """高度な戦略で捨て牌を選択"""
-        # より複雑なロジックを実装可能（将来の拡張用）
-        return self._choose_strategic_discard(hand)
+    def _choose_advanced_discard(self, hand: list[Tile], remaining_counts: Optional[list[int]] = None,
+                                 melds: int = 0, danger: Optional[list[float]] = None) -> int:
+        """高度な戦略で捨て牌を選択（向聴数と受け入れ枚数、危険度があれば放銃の危険も考える）"""
+        ranking = self.rank_discards(hand_to_counts(hand), remaining_counts, melds, danger)
+        if not ranking:
+            return self._choose_strategic_discard(hand)
+        return find_tile_index_by_kind(hand, ranking[0]['kind'])
     
-    def _find_isolated_tiles(self, hand: list[Tile]) -> list[int]:
-        """孤立している牌のインデックスを見つける"""
-        isolated = []
+    def _choose_search_discard(self, hand: list[Tile], remaining_counts: Optional[list[int]],
+                               mountain_count: Optional[int], deadline: Optional[float], melds: int = 0,
+                               should_stop: Optional[Callable] = None) -> int:
+        """情報集合MCTSで捨て牌を選択（場の情報がなければ高度な戦略）"""
+        if remaining_counts is None or mountain_count is None:
+            return self._choose_advanced_discard(hand, remaining_counts, melds)
+        kind = self.searcher.search(hand_to_counts(hand), remaining_counts, mountain_count, deadline, melds,
+                                    should_stop)
+        if kind < 0:
+            return self._choose_advanced_discard(hand, remaining_counts, melds)
+        return find_tile_index_by_kind(hand, kind)
+    
+    def _choose_endgame_discard(self, hand: list[Tile], remaining_counts: list[int], mountain_count: int,
+                                deadline: Optional[float], melds: int = 0,
+                                danger: Optional[list[float]] = None,
+                                should_stop: Optional[Callable] = None) -> int:
+        """終盤の探索で捨て牌を選択（結果が同じ捨て牌は高度な戦略の順位で選ぶ）"""
+        counts = hand_to_counts(hand)
+        order = [r['kind'] for r in self.rank_discards(counts, remaining_counts, melds, danger)]
+        kind = self.endgame.solve(counts, remaining_counts, mountain_count, deadline, melds, order, should_stop)
+        if kind < 0:
+            return self._choose_advanced_discard(hand, remaining_counts, melds, danger)
+        return find_tile_index_by_kind(hand, kind)
+    
+    def rank_discards(self, counts: list[int], remaining_counts: Optional[list[int]] = None,
+                      melds: int = 0, danger: Optional[list[float]] = None,
+                      is_cancelled: Optional[Callable] = None) -> list[dict]:
+        """
+        捨て牌候補を評価の良い順に並べる
+        danger: 牌種ごとの放銃の危険度（最小の向聴数が DEFENCE_SHANTEN 以上なら、危険度に応じた向聴数分の損を足して比べる）
+        is_cancelled: 候補ごとに確認し、True なら AnalysisCancelled を送出して中断する（AnalysisWorker 用）
+        戻り値: [{'kind': 牌種, 'shanten': 向聴数, 'ukeire': 受け入れ枚数, 'danger': 危険度}, ...]
+        """
+        counts = list(counts)
+        ranking = []
         
-        # 各牌について、同種の隣接する数字があるかチェック
-        for i, tile in enumerate(hand):
-            if tile.tile_type.value == "jihai":
+        for kind in range(NUM_TILE_KINDS):
+            if counts[kind] == 0:
                 continue
-                
-            has_neighbor = False
-            tile_number = tile.number
-            tile_type = tile.tile_type
-            
-            # 隣接する数字があるかチェック
-            for other_tile in hand:
-                if (other_tile.tile_type == tile_type and 
-                    abs(other_tile.number - tile_number) == 1):
-                    has_neighbor = True
-                    break
-            
-            if not has_neighbor:
-                isolated.append(i)
+            if is_cancelled is not None and is_cancelled():
+                raise AnalysisCancelled()
+            counts[kind] -= 1
+            shanten = self.cache.shanten(counts, melds)
+            if remaining_counts is not None:
+                ukeire = sum(remaining_counts[k] for k in self.cache.ukeire(counts, melds))
+            else:
+                ukeire = sum(4 - counts[k] for k in self.cache.ukeire(counts, melds))
+            counts[kind] += 1
+            ranking.append({'kind': kind, 'shanten': shanten, 'ukeire': ukeire,
+                            'danger': danger[kind] if danger is not None else 0.0})
         
-        return isolated
+        # 向聴数が小さく、受け入れ枚数が多い捨て牌を優先（同点なら字牌から）
+        # 聴牌から遠いほど和了より放銃しないことを重視する（受け入れ枚数の差を消さないよう損は向聴数単位に丸める）
+        best_shanten = min((r['shanten'] for r in ranking), default=0)
+        weight = DANGER_WEIGHT * max(0, best_shanten - DEFENCE_SHANTEN + 1) if danger is not None else 0.0
+        ranking.sort(key=lambda r: (r['shanten'] + round(weight * r['danger']), -r['ukeire'],
+                                    r['kind'] < JIHAI_START, r['kind']))
+        return ranking
+    
+    def _find_isolated_tiles(self, hand: list[Tile]) -> list[int]:
+        """孤立している牌のインデックスを見つける"""
+        isolated_kinds = set(self.cache.isolated(hand_to_counts(hand)))
+        return [i for i, tile in enumerate(hand) if tile.kind in isolated_kinds]
     
     def should_draw(self, hand: list[Tile], mountain_count: int) -> bool:
         """
         CPUがツモするかどうかを判断
         現在の実装では常にツモする（山に牌がある限り）
         """
-        return mountain_count > 0 and len(hand) == 13
\ No newline at end of file
+        return mountain_count > 0 and len(hand) % 3 == 1
\ No newline at end of file
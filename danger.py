@@ -0,0 +1,165 @@
+from typing import Optional
+from tile import NUM_TILE_KINDS, JIHAI_START
+
+# 捨て牌の危険度（他家に放銃する可能性）の見積もり
+# 牌種の集合はビット k が牌種 k を表す int で持ち、捨て牌のたびに差分更新する
+#   現物: そのプレイヤー自身が捨てた牌種（振聴になるのでロンされない）
+#   見逃し: そのプレイヤーが最後に捨てた後に他家が捨て、ロンされなかった牌種（手牌が変わるまで安全）
+# 危険度は牌種ごとに 0.0（安全）〜1.0 で、場に見えている情報だけから求める
+
+ALL_KINDS = (1 << NUM_TILE_KINDS) - 1
+NUMBER_KINDS = (1 << JIHAI_START) - 1
+
+def _mask(predicate) -> int:
+    return sum(1 << kind for kind in range(JIHAI_START) if predicate(kind % 9))
+
+# 3つ上・下の牌種（スジ）へずらせる数牌（色をまたがないように）
+_SHIFT_UP_OK = _mask(lambda number: number <= 5)
+_SHIFT_DOWN_OK = _mask(lambda number: number >= 3)
+# 両面待ちの片側になりうる数牌（4-6は両側、それ以外は片側だけ）
+_NEEDS_BELOW = _mask(lambda number: number >= 3)
+_NEEDS_ABOVE = _mask(lambda number: number <= 5)
+
+# 牌種ごとの基本の危険度（字牌 < 么九牌 < 2・8 < 中張牌）
+BASE_DANGER = [
+    0.5 if kind >= JIHAI_START else (0.6, 0.8, 1.0, 1.0, 1.0, 1.0, 1.0, 0.8, 0.6)[kind % 9]
+    for kind in range(NUM_TILE_KINDS)
+]
+SUJI_FACTOR = 0.4       # スジで両面待ちの可能性が全て消えた牌
+HALF_SUJI_FACTOR = 0.7  # 4-6で片側だけスジの牌
+# 自分から見えていない枚数ごとの係数（0枚なら誰も待てない、1枚なら単騎・嵌張などに限られる）
+UNSEEN_FACTOR = (0.0, 0.3, 0.7, 1.0, 1.0)
+
+# 他家の聴牌気配（捨て牌の枚数と鳴きの数から見積もる）
+THREAT_BASE = 0.1
+THREAT_PER_DISCARD = 0.05
+THREAT_PER_MELD = 0.2
+
+def kinds_to_bits(kinds) -> int:
+    bits = 0
+    for kind in kinds:
+        bits |= 1 << kind
+    return bits
+
+def bits_to_kinds(bits: int) -> list[int]:
+    return [kind for kind in range(NUM_TILE_KINDS) if bits >> kind & 1]
+
+class DangerTracker:
+    """各プレイヤーの現物・見逃しの牌種と、そこから求めた危険度を持つ"""
+    def __init__(self, player_count: int = 4):
+        self.player_count = player_count
+        self.reset()
+
+    def reset(self):
+        self.safe_bits = [0] * self.player_count      # 現物
+        self.passed_bits = [0] * self.player_count    # 最後の捨て牌以降に見逃した牌種
+        self.discard_counts = [0] * self.player_count
+        self.meld_counts = [0] * self.player_count
+        self._factors: list[Optional[list[float]]] = [None] * self.player_count
+        # 捨て牌ごとの取り消し用の記録 [(プレイヤーID, 捨てる前の現物, 捨てる前の全員の見逃し)]（鳴きで消える）
+        self._history = []
+
+    def rebuild(self, players):
+        """手牌・捨て牌から作り直す（見逃しの情報は残らない）"""
+        self.reset()
+        for player in players:
+            self.safe_bits[player.player_id] = kinds_to_bits(tile.kind for tile in player.discarded)
+            self.discard_counts[player.player_id] = len(player.discarded)
+            self.meld_counts[player.player_id] = len(player.melds)
+
+    def on_discard(self, player_id: int, kind: int):
+        """捨て牌を反映する（捨てた人は手牌が変わったので見逃しが消え、他家には見逃しが増える）"""
+        bit = 1 << kind
+        self._history.append((player_id, self.safe_bits[player_id], tuple(self.passed_bits)))
+        self.safe_bits[player_id] |= bit
+        self.passed_bits[player_id] = 0
+        self.discard_counts[player_id] += 1
+        self._factors[player_id] = None
+        for other_id in range(self.player_count):
+            if other_id != player_id and not self.passed_bits[other_id] & bit:
+                self.passed_bits[other_id] |= bit
+                self._factors[other_id] = None
+
+    def undo_discard(self, player_id: int) -> bool:
+        """
+        最後の on_discard を取り消す（見逃しも捨てる前の状態に戻る）
+        記録がない（鳴き・作り直しの後）か、最後に捨てたのが別のプレイヤーなら何もせず False
+        """
+        if not self._history or self._history[-1][0] != player_id:
+            return False
+        _, safe, passed = self._history.pop()
+        self.safe_bits[player_id] = safe
+        self.passed_bits = list(passed)
+        self.discard_counts[player_id] -= 1
+        self._factors = [None] * self.player_count
+        return True
+
+    def on_claim(self, player_id: int, discarder_id: int, kind: int, still_discarded: bool):
+        """
+        鳴きを反映する（鳴いた牌は捨て牌から消えるので、他に同じ牌種を捨てていなければ現物でなくなる）
+        鳴いた人は手牌が変わるので見逃しも消える（鳴きより前の捨て牌は取り消せなくなる）
+        """
+        self._history.clear()
+        if not still_discarded:
+            self.safe_bits[discarder_id] &= ~(1 << kind)
+            self._factors[discarder_id] = None
+        self.passed_bits[player_id] = 0
+        self.meld_counts[player_id] += 1
+        self._factors[player_id] = None
+
+    def get_safe_bits(self, player_id: int) -> int:
+        """指定プレイヤーに対して今ロンされない牌種（現物 | 見逃し）"""
+        return self.safe_bits[player_id] | self.passed_bits[player_id]
+
+    def get_threat(self, player_id: int) -> float:
+        threat = (THREAT_BASE + THREAT_PER_DISCARD * self.discard_counts[player_id]
+                  + THREAT_PER_MELD * self.meld_counts[player_id])
+        return min(1.0, threat)
+
+    def _player_factors(self, player_id: int) -> list[float]:
+        """指定プレイヤーに対する牌種ごとの危険度（見え方による補正の前、変わった時だけ作り直す）"""
+        factors = self._factors[player_id]
+        if factors is not None:
+            return factors
+
+        safe = self.safe_bits[player_id]
+        # スジ: 3つ下（上）が現物なら、その牌を含む下側（上側）の両面待ちはない
+        covered_below = (safe & _SHIFT_UP_OK) << 3
+        covered_above = (safe & _SHIFT_DOWN_OK) >> 3
+        below_ok = ~_NEEDS_BELOW | covered_below
+        above_ok = ~_NEEDS_ABOVE | covered_above
+        full_suji = below_ok & above_ok & NUMBER_KINDS
+        half_suji = (covered_below | covered_above) & NUMBER_KINDS & ~full_suji
+        unsafe = ~self.get_safe_bits(player_id) & ALL_KINDS
+
+        factors = [0.0] * NUM_TILE_KINDS
+        for kind in range(NUM_TILE_KINDS):
+            if unsafe >> kind & 1:
+                factor = BASE_DANGER[kind]
+                if full_suji >> kind & 1:
+                    factor *= SUJI_FACTOR
+                elif half_suji >> kind & 1:
+                    factor *= HALF_SUJI_FACTOR
+                factors[kind] = factor
+        self._factors[player_id] = factors
+        return factors
+
+    def danger_vector(self, player_id: int, remaining_counts: Optional[list[int]] = None) -> list[float]:
+        """
+        指定プレイヤーが各牌種を捨てた時の危険度（他家ごとの危険度 × 聴牌気配 の最大値）
+        remaining_counts: 指定プレイヤーから見た未見牌の枚数（見えていない枚数が少ない牌は安全寄りにする）
+        """
+        danger = [0.0] * NUM_TILE_KINDS
+        for other_id in range(self.player_count):
+            if other_id == player_id:
+                continue
+            threat = self.get_threat(other_id)
+            factors = self._player_factors(other_id)
+            for kind in range(NUM_TILE_KINDS):
+                value = factors[kind] * threat
+                if value > danger[kind]:
+                    danger[kind] = value
+        if remaining_counts is not None:
+            for kind in range(NUM_TILE_KINDS):
+                danger[kind] *= UNSEEN_FACTOR[max(0, min(4, remaining_counts[kind]))]
+        return danger
@@ -0,0 +1,163 @@
+import random
+import time
+from typing import Callable, Optional
+from tile import NUM_TILE_KINDS
+from hand_cache import HandEvalCache
+from ismcts import NUM_PLAYERS, WIN_REWARD, SHANTEN_REWARDS
+
+# 山の残りが少ない終盤の捨て牌を、見えていない牌の並びをサンプリングして厳密に解く
+# 1つのサンプルでは自分のツモ順が決まるので、残りのツモと捨て牌を深さ優先で全て調べられる
+# 同じ手牌・同じ残りツモの局面は置換表で使い回す（捨てる順番が違うだけの局面や、他のサンプルとの共通部分）
+
+# この枚数以下になったら終盤の探索を使う（自分のツモは残り3回以下）
+ENDGAME_THRESHOLD = 12
+
+# 置換表のキー用の乱数（牌種ごと・枚数ごと）。手牌のハッシュは変化した牌種の分だけ差分で更新する
+_ZOBRIST_RANDOM = random.Random(20240601)
+ZOBRIST = [[_ZOBRIST_RANDOM.getrandbits(64) for _ in range(5)] for _ in range(NUM_TILE_KINDS)]
+
+def hand_hash(counts) -> int:
+    value = 0
+    for kind, count in enumerate(counts):
+        value ^= ZOBRIST[kind][count]
+    return value
+
+class EndgameSolver:
+    """
+    終盤の捨て牌探索
+    サンプルごとに各捨て牌の最善の結果（和了 WIN_REWARD、流局時は向聴数に応じた評価）を求め、
+    全サンプルの平均が最も良い捨て牌を選ぶ
+    """
+    def __init__(self, cache: HandEvalCache, max_samples: int = 32, table_size: int = 200000):
+        self.cache = cache
+        self.max_samples = max_samples  # 期限が指定されない場合のサンプル数
+        self.table_size = table_size
+        self.table = {}
+        self.melds = 0
+        self.last_samples = 0
+        self.last_nodes = 0
+
+    def solve(self, hand_counts: list[int], remaining_counts: list[int], mountain_count: int,
+              deadline: Optional[float] = None, melds: int = 0, order: Optional[list[int]] = None,
+              should_stop: Optional[Callable] = None) -> int:
+        """
+        捨てる牌種を返す（捨てられる牌がなければ-1）
+        remaining_counts: 自分から見た未見牌の枚数, deadline: time.monotonic() 基準の期限
+        order: 同じ値の捨て牌の優先順（指定がなければ向聴数・受け入れの良い順）
+        should_stop: サンプルごとに確認し、True ならその時点の結果で打ち切る
+        """
+        counts = list(hand_counts)
+        self.melds = melds
+        self.table.clear()
+        self.last_nodes = 0
+        if order is not None:
+            candidates = [kind for kind in order if counts[kind]]
+        else:
+            candidates = [kind for _, kind in self._ordered_discards(counts)]
+        if len(candidates) <= 1:
+            self.last_samples = 0
+            return candidates[0] if candidates else -1
+
+        unseen = [kind for kind in range(NUM_TILE_KINDS) for _ in range(max(0, remaining_counts[kind]))]
+        mountain_count = min(mountain_count, len(unseen))
+        totals = dict.fromkeys(candidates, 0.0)
+
+        samples = 0
+        while True:
+            if should_stop is not None and should_stop():
+                break
+            if deadline is not None:
+                if time.monotonic() >= deadline and samples > 0:
+                    break
+            elif samples >= self.max_samples:
+                break
+            random.shuffle(unseen)
+            # 自分のツモは他家3人の後なので4枚ごと
+            draws = tuple(unseen[:mountain_count][NUM_PLAYERS - 1::NUM_PLAYERS])
+            base_hash = hand_hash(counts)
+            for kind in candidates:
+                counts[kind] -= 1
+                child_hash = base_hash ^ ZOBRIST[kind][counts[kind] + 1] ^ ZOBRIST[kind][counts[kind]]
+                totals[kind] += self._after_discard(counts, child_hash, draws, 0)
+                counts[kind] += 1
+            samples += 1
+        self.last_samples = samples
+
+        # 同点なら candidates の順
+        return max(candidates, key=lambda kind: (totals[kind], -candidates.index(kind)))
+
+    def _ordered_discards(self, counts: list[int]) -> list[tuple]:
+        """捨て牌候補を (捨てた後の向聴数, 牌種) で良い順に並べる（同じ向聴数なら受け入れの多い順）"""
+        scored = []
+        for kind in range(NUM_TILE_KINDS):
+            if not counts[kind]:
+                continue
+            counts[kind] -= 1
+            scored.append((self.cache.shanten(counts, self.melds), -len(self.cache.ukeire(counts, self.melds)), kind))
+            counts[kind] += 1
+        scored.sort()
+        return [(shanten, kind) for shanten, _, kind in scored]
+
+    def _after_discard(self, counts: list[int], current_hash: int, draws: tuple, depth: int) -> float:
+        """捨てた後（13枚）の局面の値。次のツモを加えて和了判定し、残りを探索する"""
+        if depth >= len(draws):
+            return self._evaluate(counts)
+        key = (current_hash, draws[depth:])
+        value = self.table.get(key)
+        if value is not None:
+            return value
+        self.last_nodes += 1
+
+        drawn = draws[depth]
+        counts[drawn] += 1
+        drawn_hash = current_hash ^ ZOBRIST[drawn][counts[drawn] - 1] ^ ZOBRIST[drawn][counts[drawn]]
+        if self.cache.shanten(counts, self.melds) == -1:
+            value = WIN_REWARD
+        else:
+            value = self._best_discard(counts, drawn_hash, draws, depth + 1)
+        counts[drawn] -= 1
+
+        if len(self.table) >= self.table_size:
+            self.table.clear()
+        self.table[key] = value
+        return value
+
+    def _best_discard(self, counts: list[int], current_hash: int, draws: tuple, depth: int) -> float:
+        """ツモった後（14枚）の局面で最善の捨て牌の値"""
+        draws_left = len(draws) - depth
+        best = -1.0
+        moves = []
+        for kind in range(NUM_TILE_KINDS):
+            if counts[kind]:
+                counts[kind] -= 1
+                moves.append((self.cache.shanten(counts, self.melds), kind))
+                counts[kind] += 1
+        moves.sort()
+
+        for shanten, kind in moves:
+            # 残りのツモで到達できる最善の値がこれまでの最善以下なら、以降の候補（向聴数が同じか大きい）も調べない
+            if shanten < draws_left:
+                bound = WIN_REWARD
+            else:
+                bound = self._shanten_reward(shanten - draws_left)
+            if bound <= best:
+                break
+            counts[kind] -= 1
+            child_hash = current_hash ^ ZOBRIST[kind][counts[kind] + 1] ^ ZOBRIST[kind][counts[kind]]
+            value = self._after_discard(counts, child_hash, draws, depth)
+            counts[kind] += 1
+            if value > best:
+                best = value
+                if best >= WIN_REWARD:
+                    break
+        return best
+
+    def _evaluate(self, counts: list[int]) -> float:
+        """流局時（ツモが残っていない）の評価"""
+        return self._shanten_reward(self.cache.shanten(counts, self.melds))
+
+    @staticmethod
+    def _shanten_reward(shanten: int) -> float:
+        if shanten < len(SHANTEN_REWARDS):
+            return SHANTEN_REWARDS[max(0, shanten)]
+        return 0.0
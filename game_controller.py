@@ -1,9 +1,15 @@
 import time
 import threading
-from typing import Callable, Optional
-from game_logic import MultiPlayerGameState, PlayerType
+from typing import Callable, Iterator, Optional
+from game_logic import MultiPlayerGameState, PlayerType, ClaimType
+from game_events import GameEvent, ClaimOfferEvent
 from cpu_player import CPUPlayer
 
+# 思考期限からUI更新などのために残しておく時間（秒）
+THINK_MARGIN = 0.05
+# 人間プレイヤーの鳴きの返答を待つ時間（秒）。過ぎたら見送り扱い
+CLAIM_TIMEOUT = 10.0
+
 class GameController:
     def __init__(self, game_state: MultiPlayerGameState, update_callback: Optional[Callable] = None):
         self.game_state = game_state
@@ -15,6 +21,11 @@ class GameController:
         }
         self.auto_play_active = False
         self.auto_play_thread = None
+        self.auto_play_generation = 0  # 開始・停止のたびに増える番号（止められた後の古いスレッドの捨て牌を防ぐ）
+        self.stop_event = threading.Event()  # 待機・思考を中断するためのイベント
+        self.pending_claim = None  # 人間プレイヤーに確認中の鳴き (プレイヤーID, [ClaimType, ...])
+        self.claim_response = None
+        self.claim_answered = threading.Event()
         self.turn_delay = 1.5  # CPU思考時間（秒）
         self.last_player_id = -1  # 前回のプレイヤーID（重複ログ防止用）
     
@@ -22,18 +33,30 @@ class GameController:
         """自動進行を開始"""
         if not self.auto_play_active:
             self.auto_play_active = True
-            self.auto_play_thread = threading.Thread(target=self._auto_play_loop, daemon=True)
+            self.auto_play_generation += 1
+            self.stop_event.clear()
+            self.auto_play_thread = threading.Thread(
+                target=self._auto_play_loop, args=(self.auto_play_generation,), daemon=True)
             self.auto_play_thread.start()
     
     def stop_auto_play(self):
-        """自動進行を停止"""
+        """自動進行を停止（思考中のCPUも打ち切り、スレッドが終わるまで待つ）"""
         self.auto_play_active = False
-        if self.auto_play_thread:
-            self.auto_play_thread.join(timeout=1.0)
+        self.auto_play_generation += 1
+        self.stop_event.set()
+        self.claim_answered.set()
+        thread = self.auto_play_thread
+        if thread and thread is not threading.current_thread():
+            thread.join()
+        self.auto_play_thread = None
     
-    def _auto_play_loop(self):
+    def _is_current_auto_play(self, generation: Optional[int]) -> bool:
+        """generation の自動進行がまだ続いているかどうか（Noneなら自動進行以外からの呼び出し）"""
+        return generation is None or (self.auto_play_active and generation == self.auto_play_generation)
+    
+    def _auto_play_loop(self, generation: int):
         """自動進行のメインループ"""
-        while self.auto_play_active and not self.game_state.is_game_over():
+        while self._is_current_auto_play(generation) and not self.game_state.is_game_over():
             try:
                 current_player = self.game_state.get_current_player()
                 
@@ -46,35 +69,47 @@ class GameController:
                 if current_player.player_type == PlayerType.HUMAN:
                     # 初回のみUI更新（13枚の場合のみ）
                     human_player = self.game_state.get_human_player()
-                    if len(human_player.hand) == 13:
+                    if human_player.needs_draw():
                         print(f"人間プレイヤー初回処理 - 手牌: {len(human_player.hand)}枚")
                         if self.update_callback:
                             self.update_callback()
-                    time.sleep(0.1)
+                    self.stop_event.wait(0.1)
                     continue
                 
-                # CPUのターン処理
+                # CPUのターン処理（思考時間は turn_delay の範囲内で使う）
                 print(f"CPU{current_player.player_id}のターン開始 - 手牌: {len(current_player.hand)}枚")
-                self._process_cpu_turn(current_player.player_id)
+                turn_deadline = time.monotonic() + self.turn_delay
+                self._process_cpu_turn(current_player.player_id, turn_deadline - THINK_MARGIN, generation)
+                if not self._is_current_auto_play(generation):
+                    break  # 思考中に止められた（新しい対局・読み込み）
                 
                 # UI更新
                 if self.update_callback:
                     self.update_callback()
                 
-                # 次のターンへ
-                self.game_state.next_turn()
+                # 鳴きがなければ次のターンへ
+                self._finish_turn()
                 print(f"CPU{current_player.player_id}のターン終了 - 次のプレイヤー: {self.game_state.current_player}")
                 
-                # 少し待機
-                time.sleep(self.turn_delay)
+                # 思考に使わなかった残り時間だけ待機
+                remaining = turn_deadline - time.monotonic()
+                if remaining > 0:
+                    self.stop_event.wait(remaining)
             except Exception as e:
                 print(f"自動進行エラー: {e}")
+                if not self._is_current_auto_play(generation):
+                    break
                 # エラーが発生しても次のターンへ進む
                 self.game_state.next_turn()
-                time.sleep(0.5)
+                self.stop_event.wait(0.5)
     
-    def _process_cpu_turn(self, player_id: int):
-        """CPUのターン処理"""
+    def _process_cpu_turn(self, player_id: int, deadline: Optional[float] = None,
+                          generation: Optional[int] = None):
+        """
+        CPUのターン処理
+        deadline: 捨て牌を決める期限（time.monotonic() 基準）。探索型のCPUは期限まで考える
+        generation: 自動進行から呼ぶ場合の番号。考えている間に自動進行が止められたら捨て牌しない
+        """
         try:
             if player_id not in self.cpu_players:
                 print(f"警告: CPU{player_id}が見つかりません")
@@ -85,17 +120,31 @@ class GameController:
             
             print(f"  CPU{player_id} 処理前: 手牌{len(player.hand)}枚")
             
-            # ツモ
-            if len(player.hand) == 13 and self.game_state.can_draw():
+            # ツモ（鳴いた直後はツモしない）
+            if player.needs_draw() and self.game_state.can_draw():
                 drawn_tile = self.game_state.draw_tile_for_player(player_id)
                 if drawn_tile:
                     print(f"  CPU{player_id} ツモ成功: {drawn_tile}")
                 else:
                     print(f"  CPU{player_id} ツモ失敗")
             
+            # 揃っていればツモ和了
+            if self.game_state.can_tsumo(player_id):
+                self.game_state.declare_tsumo(player_id)
+                print(f"  CPU{player_id} ツモ和了")
+                return
+            
             # 捨て牌
-            if len(player.hand) > 13:
-                discard_index = cpu.choose_discard_tile(player.hand)
+            if player.can_discard():
+                remaining = self.game_state.get_remaining_counts(player_id)
+                discard_index = cpu.choose_discard_tile(
+                    player.hand, remaining, self.game_state.get_mountain_count(), deadline, len(player.melds),
+                    self.game_state.get_danger_vector(player_id),
+                    self.stop_event.is_set if generation is not None else None
+                )
+                if not self._is_current_auto_play(generation):
+                    print(f"  CPU{player_id} 自動進行の停止により捨て牌を取りやめ")
+                    return
                 print(f"  CPU{player_id} 捨て牌インデックス: {discard_index}")
                 if discard_index >= 0 and discard_index < len(player.hand):
                     success = self.game_state.discard_tile_for_player(player_id, discard_index)
@@ -112,6 +161,52 @@ class GameController:
             import traceback
             traceback.print_exc()
     
+    def _finish_turn(self):
+        """直前の捨て牌への鳴きを確認し、鳴きがなければ次の手番へ進める"""
+        if not self.game_state.game_active:
+            return  # ツモ和了で終局済み
+        options = self.game_state.get_claim_options()
+        if options:
+            kind = self.game_state.last_discard[1].kind
+            requests = {}
+            for player_id, claims in options.items():
+                player = self.game_state.players[player_id]
+                if player.player_type == PlayerType.CPU and player_id in self.cpu_players:
+                    requests[player_id] = self.cpu_players[player_id].choose_claim(
+                        player.hand, kind, claims, len(player.melds))
+                else:
+                    requests[player_id] = self._wait_human_claim(player_id, kind, claims)
+            claimed = self.game_state.resolve_claims(requests)
+            if claimed:
+                print(f"プレイヤー{claimed[0]} {claimed[1].value}")
+                return
+        self.game_state.next_turn()
+    
+    def _wait_human_claim(self, player_id: int, kind: int, claims: list) -> Optional[tuple]:
+        """人間プレイヤーに鳴くかどうかを確認する（自動進行のスレッドから呼ぶ）"""
+        self.claim_response = None
+        self.claim_answered.clear()
+        self.pending_claim = (player_id, claims)
+        self.game_state.events.publish(ClaimOfferEvent(
+            self.game_state.state_version, player_id, kind, tuple(claim.value for claim in claims)))
+        self.claim_answered.wait(CLAIM_TIMEOUT)
+        self.pending_claim = None
+        return self.claim_response
+    
+    def human_claim(self, claim_type: Optional[ClaimType]) -> bool:
+        """
+        人間プレイヤーの鳴きの返答（claim_type=None で見送り）
+        チーの組み合わせは最初に見つかったものを使う
+        """
+        if self.pending_claim is None:
+            return False
+        player_id, claims = self.pending_claim
+        if claim_type is not None and claim_type not in claims:
+            return False
+        self.claim_response = (claim_type, None) if claim_type is not None else None
+        self.claim_answered.set()
+        return True
+    
     def process_human_turn(self) -> bool:
         """
         人間プレイヤーのターン処理
@@ -124,13 +219,13 @@ class GameController:
         
         human_player = self.game_state.get_human_player()
         
-        # 既に14枚以上なら何もしない（重複実行防止）
-        if len(human_player.hand) >= 14:
+        # 既に14枚以上（鳴いた直後を含む）なら何もしない（重複実行防止）
+        if human_player.can_discard():
             print(f"人間プレイヤー既に{len(human_player.hand)}枚所持 - ツモ不要")
             return False
         
         # 13枚の場合は自動ツモ
-        if len(human_player.hand) == 13 and self.game_state.can_draw():
+        if human_player.needs_draw() and self.game_state.can_draw():
             print(f"人間プレイヤー自動ツモ実行 - 手牌: {len(human_player.hand)}枚")
             drawn_tile = self.game_state.draw_tile_for_player(0)
             if drawn_tile:
@@ -152,7 +247,7 @@ class GameController:
         
         success = self.game_state.discard_tile_for_player(0, tile_index)
         if success:
-            self.game_state.next_turn()
+            self._finish_turn()
             if self.update_callback:
                 self.update_callback()
         return success
@@ -170,7 +265,7 @@ class GameController:
         success = self.game_state.discard_tile_by_object_for_player(0, tile)
         if success:
             print(f"人間プレイヤー捨て牌成功 - 次のターンへ")
-            self.game_state.next_turn()
+            self._finish_turn()
             print(f"ターン移行: プレイヤー0 → プレイヤー{self.game_state.current_player}")
             if self.update_callback:
                 self.update_callback()
@@ -178,6 +273,19 @@ class GameController:
             print("人間プレイヤー捨て牌失敗")
         return success
     
+    def human_tsumo(self) -> bool:
+        """人間プレイヤーのツモ和了"""
+        if not self.is_human_turn():
+            return False
+        success = self.game_state.declare_tsumo(0)
+        if success and self.update_callback:
+            self.update_callback()
+        return success
+    
+    def can_human_tsumo(self) -> bool:
+        """人間プレイヤーがツモ和了できるかどうか"""
+        return self.is_human_turn() and self.game_state.can_tsumo(0)
+    
     def is_human_turn(self) -> bool:
         """現在が人間プレイヤーのターンかどうか"""
         return self.game_state.get_current_player().player_type == PlayerType.HUMAN
@@ -192,6 +300,14 @@ class GameController:
         """CPUの思考時間を設定"""
         self.turn_delay = max(0.1, delay)
     
+    def set_cpu_difficulty(self, difficulty: str):
+        """全CPUの強さを設定（expertは思考時間いっぱいまで探索する）"""
+        for player_id in self.cpu_players:
+            self.cpu_players[player_id] = CPUPlayer(difficulty)
+    
+    def get_cpu_difficulty(self) -> str:
+        return self.cpu_players[1].difficulty
+    
     def get_game_status(self) -> dict:
         """ゲーム状況の取得"""
         return {
@@ -201,5 +317,48 @@ class GameController:
             'is_human_turn': self.is_human_turn(),
             'game_active': self.game_state.game_active,
             'auto_play_active': self.auto_play_active,
-            'can_human_discard': self.can_human_discard()
-        }
\ No newline at end of file
+            'can_human_discard': self.can_human_discard(),
+            'can_human_tsumo': self.can_human_tsumo()
+        }
+
+def iter_game_events(game_state: MultiPlayerGameState, cpu_players: Optional[dict] = None) -> Iterator[GameEvent]:
+    """
+    画面なしで全員をCPUとして1局進め、発生したイベントを順に返すジェネレーター
+    cpu_players: {プレイヤーID: CPUPlayer}（省略時は全員 normal）
+    """
+    if cpu_players is None:
+        cpu_players = {player.player_id: CPUPlayer("normal") for player in game_state.players}
+    
+    pending = []
+    unsubscribe = game_state.events.subscribe(pending.append)
+    try:
+        while not game_state.is_game_over():
+            player_id = game_state.current_player
+            player = game_state.players[player_id]
+            if player.needs_draw():
+                game_state.draw_tile_for_player(player_id)
+            if game_state.can_tsumo(player_id):
+                game_state.declare_tsumo(player_id)
+                break
+            
+            discard_index = cpu_players[player_id].choose_discard_tile(
+                player.hand, game_state.get_remaining_counts(player_id), game_state.get_mountain_count(),
+                melds=len(player.melds), danger=game_state.get_danger_vector(player_id)
+            )
+            if not game_state.discard_tile_for_player(player_id, discard_index):
+                break
+            
+            kind = player.discarded[-1].kind
+            requests = {
+                claimer_id: cpu_players[claimer_id].choose_claim(
+                    game_state.players[claimer_id].hand, kind, claims, len(game_state.players[claimer_id].melds))
+                for claimer_id, claims in game_state.get_claim_options().items()
+            }
+            if not game_state.resolve_claims(requests):
+                game_state.next_turn()
+            
+            yield from pending
+            pending.clear()
+        yield from pending
+    finally:
+        unsubscribe()
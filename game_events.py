@@ -0,0 +1,135 @@
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+# ゲームの状態変化を表すイベント
+# version はイベント発生後の MultiPlayerGameState.state_version
+
+@dataclass(frozen=True)
+class GameEvent:
+    version: int
+
+@dataclass(frozen=True)
+class GameStartEvent(GameEvent):
+    """配牌・読み込みなどで状態全体が変わった"""
+    pass
+
+@dataclass(frozen=True)
+class DrawEvent(GameEvent):
+    player_id: int
+    kind: int
+
+@dataclass(frozen=True)
+class DiscardEvent(GameEvent):
+    player_id: int
+    kind: int
+
+@dataclass(frozen=True)
+class TurnChangeEvent(GameEvent):
+    previous_player: int
+    current_player: int
+
+@dataclass(frozen=True)
+class ClaimEvent(GameEvent):
+    """捨て牌が鳴かれた（claim_type: "ron" / "pon" / "chi"）"""
+    player_id: int
+    from_player: int
+    claim_type: str
+    kind: int
+
+@dataclass(frozen=True)
+class ClaimOfferEvent(GameEvent):
+    """人間プレイヤーが鳴けるので返答を待っている（状態は変わらない）"""
+    player_id: int
+    kind: int
+    options: tuple
+
+@dataclass(frozen=True)
+class GameOverEvent(GameEvent):
+    reason: str
+
+class EventBus:
+    """イベントを購読者に配信する"""
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable, event_types: Optional[tuple] = None) -> Callable:
+        """
+        購読を登録する（event_types を指定するとその型のイベントだけ届く）
+        戻り値: 購読を解除する関数
+        """
+        entry = (callback, event_types)
+        with self._lock:
+            self._subscribers = self._subscribers + [entry]
+
+        def unsubscribe():
+            with self._lock:
+                self._subscribers = [s for s in self._subscribers if s is not entry]
+        return unsubscribe
+
+    def publish(self, event: GameEvent):
+        for callback, event_types in self._subscribers:
+            if event_types is None or isinstance(event, event_types):
+                try:
+                    callback(event)
+                except Exception as e:
+                    print(f"イベント処理エラー: {e}")
+
+class EventLog:
+    """
+    発生したイベントを記録し、1手ずつの取り消しを行う
+    取り消しは最後のイベントの逆操作を行うだけなのでO(1)
+    """
+    def __init__(self, bus: Optional[EventBus] = None):
+        self.events = []
+        self._unsubscribe = bus.subscribe(self.record) if bus is not None else None
+
+    def record(self, event: GameEvent):
+        if isinstance(event, GameStartEvent):
+            self.events = []
+        self.events.append(event)
+
+    def close(self):
+        if self._unsubscribe:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    @staticmethod
+    def _is_barrier(event: GameEvent) -> bool:
+        """これより前には戻れないイベント（配牌・鳴き・ロン和了）"""
+        return (isinstance(event, (GameStartEvent, ClaimEvent))
+                or (isinstance(event, GameOverEvent) and event.reason == "ron"))
+
+    @staticmethod
+    def _is_skipped(event: GameEvent) -> bool:
+        """状態を変えていないので取り消す必要がないイベント（鳴きの返答待ち・流局）"""
+        return (isinstance(event, ClaimOfferEvent)
+                or (isinstance(event, GameOverEvent) and event.reason == "exhausted"))
+
+    def can_undo(self) -> bool:
+        for event in reversed(self.events):
+            if not self._is_skipped(event):
+                return not self._is_barrier(event)
+        return False
+
+    def undo(self, state) -> Optional[GameEvent]:
+        """最後のイベントを取り消す（取り消せるものがなければNone、鳴き・ロンより前には戻らない）"""
+        while self.events:
+            event = self.events[-1]
+            if self._is_barrier(event):
+                return None
+            self.events.pop()
+            if isinstance(event, DrawEvent):
+                state.undo_draw(event.player_id, event.kind)
+            elif isinstance(event, DiscardEvent):
+                state.undo_discard(event.player_id)
+            elif isinstance(event, TurnChangeEvent):
+                state.current_player = event.previous_player
+                state.state_version += 1
+            elif isinstance(event, GameOverEvent) and event.reason == "tsumo":
+                state.undo_tsumo()
+            else:
+                continue
+            return event
+        return None
@@ -1,24 +1,217 @@
-import random
 from typing import List, Optional
 from enum import Enum
-from tile import Tile, create_all_tiles
+from tile import Tile, NUM_TILE_KINDS, JIHAI_START
+from wall import Wall
+from game_events import (EventBus, GameStartEvent, DrawEvent, DiscardEvent,
+                         TurnChangeEvent, GameOverEvent, ClaimEvent)
+from hand_cache import get_shared_cache
+from scoring import ScoreResult, score_win
+from danger import DangerTracker
+import metrics
 
 class PlayerType(Enum):
     HUMAN = "human"
     CPU = "cpu"
 
+class ClaimType(Enum):
+    RON = "ron"    # ロン
+    PON = "pon"    # ポン
+    CHI = "chi"    # チー
+
+# 同じ捨て牌に複数の鳴きがある場合の優先順位（大きいほど優先）
+CLAIM_PRIORITY = {ClaimType.RON: 3, ClaimType.PON: 2, ClaimType.CHI: 1}
+
+def _chi_patterns_for(kind: int) -> list:
+    """kind をチーする時に手牌から出す2枚の組み合わせ（同じ色の数牌のみ）"""
+    if kind >= JIHAI_START:
+        return []
+    number = kind % 9
+    patterns = []
+    if number >= 2:
+        patterns.append((kind - 2, kind - 1))
+    if 1 <= number <= 7:
+        patterns.append((kind - 1, kind + 1))
+    if number <= 6:
+        patterns.append((kind + 1, kind + 2))
+    return patterns
+
+_CHI_PATTERNS = [_chi_patterns_for(kind) for kind in range(NUM_TILE_KINDS)]
+
+class Hand:
+    """
+    牌種ごとに牌を保持する手牌
+    所持判定・削除・牌種ごとの枚数取得はO(1)、並びは牌種順に整列済み
+    """
+    def __init__(self, tiles: Optional[list] = None):
+        self._by_kind = [[] for _ in range(NUM_TILE_KINDS)]
+        self._size = 0
+        self._sorted = None  # 整列済みの並び（変更時に破棄）
+        # 鳴ける牌種（枚数が変わった牌種の周辺だけを更新する）
+        self.pon_kinds = set()  # 2枚以上ある牌種
+        self.chi_kinds = set()  # 手牌の2枚と順子になる牌種
+        if tiles:
+            for tile in tiles:
+                self.append(tile)
+    
+    def append(self, tile: Tile):
+        same_kind = self._by_kind[tile.kind]
+        same_kind.append(tile)
+        self._size += 1
+        self._sorted = None
+        self._on_count_changed(tile.kind, len(same_kind) - 1)
+    
+    def remove(self, tile: Tile):
+        """牌を1枚取り除く（同じオブジェクトがあればそれを優先）"""
+        same_kind = self._by_kind[tile.kind]
+        if not same_kind:
+            raise ValueError(f"{tile} は手牌にありません")
+        for i, other in enumerate(same_kind):
+            if other is tile:
+                same_kind.pop(i)
+                break
+        else:
+            same_kind.pop()
+        self._size -= 1
+        self._sorted = None
+        self._on_count_changed(tile.kind, len(same_kind) + 1)
+    
+    def pop(self, index: int = -1) -> Tile:
+        tile = self.get_sorted()[index]
+        self.remove(tile)
+        return tile
+    
+    def pop_kind(self, kind: int) -> Optional[Tile]:
+        """指定した牌種の牌を1枚取り出す（無ければNone）"""
+        same_kind = self._by_kind[kind]
+        if not same_kind:
+            return None
+        self._size -= 1
+        self._sorted = None
+        tile = same_kind.pop()
+        self._on_count_changed(kind, len(same_kind) + 1)
+        return tile
+    
+    def extend(self, tiles):
+        """まとめて加える（鳴ける牌種は最後に1回だけ作り直す）"""
+        by_kind = self._by_kind
+        for tile in tiles:
+            by_kind[tile.kind].append(tile)
+        self._size += len(tiles)
+        self._sorted = None
+        pon_kinds = self.pon_kinds
+        chi_kinds = self.chi_kinds
+        pon_kinds.clear()
+        chi_kinds.clear()
+        for kind, same_kind in enumerate(by_kind):
+            if not same_kind:
+                continue
+            if len(same_kind) >= 2:
+                pon_kinds.add(kind)
+            if kind >= JIHAI_START:
+                continue
+            # 隣り合う2枚（kind, kind+1）は両側、1つ飛び（kind, kind+2）は間の牌種でチーできる
+            position = kind % 9
+            if position < 8 and by_kind[kind + 1]:
+                if position > 0:
+                    chi_kinds.add(kind - 1)
+                if position < 7:
+                    chi_kinds.add(kind + 2)
+            if position < 7 and by_kind[kind + 2]:
+                chi_kinds.add(kind + 1)
+    
+    def clear(self):
+        for same_kind in self._by_kind:
+            same_kind.clear()
+        self._size = 0
+        self._sorted = None
+        self.pon_kinds.clear()
+        self.chi_kinds.clear()
+    
+    def _on_count_changed(self, kind: int, old_count: int):
+        new_count = len(self._by_kind[kind])
+        if (old_count >= 2) != (new_count >= 2):
+            if new_count >= 2:
+                self.pon_kinds.add(kind)
+            else:
+                self.pon_kinds.discard(kind)
+        # 有無が変わった時だけ、前後2つの牌種のチーの可否を見直す
+        if (old_count > 0) != (new_count > 0) and kind < JIHAI_START:
+            suit_start = kind - kind % 9
+            for target in range(max(suit_start, kind - 2), min(suit_start + 9, kind + 3)):
+                if self.chi_patterns(target):
+                    self.chi_kinds.add(target)
+                else:
+                    self.chi_kinds.discard(target)
+    
+    def chi_patterns(self, kind: int) -> list:
+        """kind をチーする時に出せる手牌2枚の牌種の組み合わせ"""
+        by_kind = self._by_kind
+        return [(a, b) for a, b in _CHI_PATTERNS[kind] if by_kind[a] and by_kind[b]]
+    
+    def count_kind(self, kind: int) -> int:
+        """指定した牌種の枚数"""
+        return len(self._by_kind[kind])
+    
+    def kind_counts(self) -> list[int]:
+        """牌種ごとの枚数（34要素）"""
+        return [len(same_kind) for same_kind in self._by_kind]
+    
+    def get_sorted(self) -> list[Tile]:
+        """牌種順に並んだ手牌（変更がない間は同じリストを返す）"""
+        if self._sorted is None:
+            self._sorted = [tile for same_kind in self._by_kind for tile in same_kind]
+        return self._sorted
+    
+    def __contains__(self, tile) -> bool:
+        return isinstance(tile, Tile) and bool(self._by_kind[tile.kind])
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def __iter__(self):
+        return iter(self.get_sorted())
+    
+    def __getitem__(self, index):
+        return self.get_sorted()[index]
+    
+    def __repr__(self):
+        return f"Hand([{', '.join(str(tile) for tile in self)}])"
+
+class Meld:
+    """鳴いてさらした面子"""
+    def __init__(self, claim_type: ClaimType, tiles: list, from_player: int, claimed_kind: int):
+        self.claim_type = claim_type
+        self.tiles = sorted(tiles, key=lambda tile: tile.kind)
+        self.from_player = from_player
+        self.claimed_kind = claimed_kind
+    
+    def kinds(self) -> list[int]:
+        return [tile.kind for tile in self.tiles]
+    
+    def __str__(self):
+        label = "ポン" if self.claim_type == ClaimType.PON else "チー"
+        return f"{label}[{''.join(str(tile) for tile in self.tiles)}]"
+
 class Player:
     def __init__(self, player_id: int, player_type: PlayerType, name: str):
         self.player_id = player_id
         self.player_type = player_type
         self.name = name
-        self.hand = []
+        self.hand = Hand()
         self.discarded = []
+        self.melds = []
+        # ロンできる牌種（捨て牌の後に更新、振聴なら空）
+        self.ron_kinds = frozenset()
     
     def add_tile_to_hand(self, tile: Tile):
         tile.is_in_hand = True
         self.hand.append(tile)
     
+    def add_tiles_to_hand(self, tiles: list):
+        for tile in tiles:
+            tile.is_in_hand = True
+        self.hand.extend(tiles)
+    
     def discard_tile(self, tile_index: int) -> Optional[Tile]:
         if 0 <= tile_index < len(self.hand):
             tile = self.hand.pop(tile_index)
@@ -43,29 +236,31 @@ class Player:
     def get_discarded_count(self) -> int:
         return len(self.discarded)
     
+    def get_tile_count(self) -> int:
+        """鳴いた面子を3枚として数えた手牌の枚数"""
+        return len(self.hand) + 3 * len(self.melds)
+    
+    def needs_draw(self) -> bool:
+        return self.get_tile_count() == 13
+    
     def can_discard(self) -> bool:
-        return len(self.hand) > 13
+        return self.get_tile_count() > 13
 
 class GameState:
     def __init__(self):
-        self.mountain = []
+        self.mountain = Wall()
         self.hand = []
         self.discarded = []
         self.reset_game()
     
     def reset_game(self):
-        all_tiles = create_all_tiles()
-        random.shuffle(all_tiles)
-        
-        self.mountain = all_tiles
-        self.hand = []
+        # 山は同じ牌・同じ配列を並べ替えて使い回す
+        self.mountain.shuffle()
         self.discarded = []
         
-        for _ in range(13):
-            if self.mountain:
-                tile = self.mountain.pop()
-                tile.is_in_hand = True
-                self.hand.append(tile)
+        self.hand = self.mountain.deal(13)
+        for tile in self.hand:
+            tile.is_in_hand = True
     
     def draw_tile(self) -> Optional[Tile]:
         if not self.mountain:
@@ -109,37 +304,101 @@ class GameState:
     def can_discard(self) -> bool:
         return len(self.hand) > 13
 
+def _default_player_name(player_id: int, player_type: PlayerType) -> str:
+    if player_type == PlayerType.CPU:
+        return f"CPU{player_id}"
+    return "あなた" if player_id == 0 else f"プレイヤー{player_id}"
+
 class MultiPlayerGameState:
-    def __init__(self):
+    def __init__(self, player_types: Optional[list] = None):
+        """player_types: 各席の PlayerType（省略時は席0のみ人間）"""
+        if player_types is None:
+            player_types = [PlayerType.HUMAN, PlayerType.CPU, PlayerType.CPU, PlayerType.CPU]
         self.players = [
-            Player(0, PlayerType.HUMAN, "あなた"),
-            Player(1, PlayerType.CPU, "CPU1"),
-            Player(2, PlayerType.CPU, "CPU2"), 
-            Player(3, PlayerType.CPU, "CPU3")
+            Player(i, player_type, _default_player_name(i, player_type))
+            for i, player_type in enumerate(player_types)
         ]
-        self.mountain = []
+        self.mountain = Wall()
         self.current_player = 0
         self.game_active = False
+        # 場に見えている牌（全員の捨て牌）の牌種ごとの枚数
+        self.visible_counts = [0] * NUM_TILE_KINDS
+        # 各プレイヤーから見た未見牌の牌種ごとの枚数
+        self.remaining_counts = [[4] * NUM_TILE_KINDS for _ in self.players]
+        # 状態が変わるたびに増える番号（古い解析結果の判定用）
+        self.state_version = 0
+        # 状態変化のイベント配信
+        self.events = EventBus()
+        self.cache = get_shared_cache()
+        # 捨て牌の危険度（現物・見逃しの牌種を捨て牌のたびに更新）
+        self.danger = DangerTracker(len(self.players))
+        # 直前の捨て牌 (プレイヤーID, 牌)。鳴きの判定に使い、ツモ・鳴きで消える
+        self.last_discard = None
+        # 直前にツモったプレイヤーと牌種 (プレイヤーID, 牌種)。ツモ和了の判定に使い、捨て牌・鳴きで消える
+        self.last_draw = None
+        # 和了したプレイヤー（-1: なし）と和了牌、放銃したプレイヤー（-1: ツモ）
+        self.winner = -1
+        self.win_kind = -1
+        self.win_from = -1
+        # 和了の役と点数
+        self.win_score: Optional[ScoreResult] = None
         self.reset_game()
     
     def reset_game(self):
-        all_tiles = create_all_tiles()
-        random.shuffle(all_tiles)
-        self.mountain = all_tiles
+        # 山は同じ牌・同じ配列を並べ替えて使い回す
+        self.mountain.shuffle()
         
         for player in self.players:
-            player.hand = []
-            player.discarded = []
+            player.hand.clear()
+            player.discarded.clear()
+            player.melds.clear()
+        self.last_discard = None
+        self.last_draw = None
+        self.winner = -1
+        self.win_kind = -1
+        self.win_from = -1
+        self.win_score = None
         
-        # 各プレイヤーに13枚配る
-        for _ in range(13):
-            for player in self.players:
-                if self.mountain:
-                    tile = self.mountain.pop()
-                    player.add_tile_to_hand(tile)
+        # 各プレイヤーに13枚配る（1枚ずつ順番に配るのと同じ牌を、山の配列の切り出しでまとめて配る）
+        hands = self.mountain.deal_hands(len(self.players), 13)
+        for player, tiles in zip(self.players, hands):
+            player.add_tiles_to_hand(tiles)
+        
+        self.recount_visible_tiles()
         
         self.current_player = 0
         self.game_active = True
+        self.state_version += 1
+        self.events.publish(GameStartEvent(self.state_version))
+    
+    def recount_visible_tiles(self):
+        """見えている牌の集計・ロンできる牌種を現在の手牌・捨て牌・鳴きから作り直す"""
+        self.visible_counts = [0] * NUM_TILE_KINDS
+        for player in self.players:
+            for tile in player.discarded:
+                self.visible_counts[tile.kind] += 1
+            for meld in player.melds:
+                for tile in meld.tiles:
+                    self.visible_counts[tile.kind] += 1
+        self.danger.rebuild(self.players)
+        for player in self.players:
+            hand_counts = player.hand.kind_counts()
+            self.remaining_counts[player.player_id] = [
+                4 - hand_counts[kind] - self.visible_counts[kind] for kind in range(NUM_TILE_KINDS)
+            ]
+            self._update_ron_kinds(player.player_id)
+    
+    def _update_ron_kinds(self, player_id: int):
+        """手牌が揃った時（捨てた後）にロンできる牌種を求め直す"""
+        player = self.players[player_id]
+        if player.needs_draw():
+            waits = frozenset(self.cache.waits(player.hand.kind_counts(), len(player.melds)))
+            # 自分の捨て牌に和了牌があれば振聴
+            if waits and any(tile.kind in waits for tile in player.discarded):
+                waits = frozenset()
+        else:
+            waits = frozenset()
+        player.ron_kinds = waits
     
     def get_current_player(self) -> Player:
         return self.players[self.current_player]
@@ -153,6 +412,11 @@ class MultiPlayerGameState:
         
         tile = self.mountain.pop()
         self.players[player_id].add_tile_to_hand(tile)
+        self.remaining_counts[player_id][tile.kind] -= 1
+        self.last_discard = None
+        self.last_draw = (player_id, tile.kind)
+        self.state_version += 1
+        self.events.publish(DrawEvent(self.state_version, player_id, tile.kind))
         return tile
     
     def draw_tile_current_player(self) -> Optional[Tile]:
@@ -166,15 +430,255 @@ class MultiPlayerGameState:
         if result is None:
             print(f"エラー: プレイヤー{player_id}の捨て牌失敗 (index: {tile_index})")
             return False
+        self._on_tile_discarded(player_id, result)
         return True
     
     def discard_tile_by_object_for_player(self, player_id: int, tile: Tile) -> bool:
         if player_id < 0 or player_id >= len(self.players):
             return False
-        return self.players[player_id].discard_tile_by_object(tile)
+        if not self.players[player_id].discard_tile_by_object(tile):
+            return False
+        self._on_tile_discarded(player_id, tile)
+        return True
+    
+    def _on_tile_discarded(self, player_id: int, tile: Tile):
+        """捨て牌を見えている牌の集計に反映する"""
+        self.visible_counts[tile.kind] += 1
+        for other_id, remaining in enumerate(self.remaining_counts):
+            if other_id != player_id:
+                remaining[tile.kind] -= 1
+        self.last_discard = (player_id, tile)
+        self.last_draw = None
+        self.danger.on_discard(player_id, tile.kind)
+        self._update_ron_kinds(player_id)
+        self.state_version += 1
+        self.events.publish(DiscardEvent(self.state_version, player_id, tile.kind))
+    
+    def get_claim_options(self) -> dict:
+        """
+        直前の捨て牌に対して他のプレイヤーが行える鳴き
+        各プレイヤーが保持している鳴ける牌種の集合を引くだけなので手牌の枚数によらず一定時間
+        戻り値: {プレイヤーID: [ClaimType, ...]}（鳴けるプレイヤーのみ）
+        """
+        if self.last_discard is None or not self.game_active:
+            return {}
+        discarder_id, tile = self.last_discard
+        kind = tile.kind
+        can_call = len(self.mountain) > 0  # 最後の捨て牌はロンのみ
+        options = {}
+        for offset in range(1, len(self.players)):
+            player = self.players[(discarder_id + offset) % len(self.players)]
+            claims = []
+            if kind in player.ron_kinds:
+                claims.append(ClaimType.RON)
+            if can_call:
+                if kind in player.hand.pon_kinds:
+                    claims.append(ClaimType.PON)
+                # チーは下家（次の手番）のみ
+                if offset == 1 and kind in player.hand.chi_kinds:
+                    claims.append(ClaimType.CHI)
+            if claims:
+                options[player.player_id] = claims
+        return options
+    
+    def resolve_claims(self, requests: dict) -> Optional[tuple]:
+        """
+        各プレイヤーの鳴きの申告から優先順位（ロン > ポン > チー、同じ種類なら捨てた人に近い順）で1つを選んで実行する
+        requests: {プレイヤーID: (ClaimType, チーの組み合わせ or None) または None（見送り）}
+        戻り値: 実行した (プレイヤーID, ClaimType)、鳴きがなければNone
+        """
+        if self.last_discard is None:
+            return None
+        discarder_id = self.last_discard[0]
+        player_count = len(self.players)
+        candidates = [(player_id, request) for player_id, request in requests.items() if request]
+        # 優先順に試し、実行できない申告（チーの組み合わせの誤りなど）は飛ばして次の申告を使う
+        candidates.sort(
+            key=lambda item: (CLAIM_PRIORITY[item[1][0]], -((item[0] - discarder_id) % player_count)),
+            reverse=True
+        )
+        for player_id, (claim_type, pattern) in candidates:
+            if self.claim_tile(player_id, claim_type, pattern):
+                return player_id, claim_type
+        return None
+    
+    def claim_tile(self, player_id: int, claim_type: ClaimType, pattern: Optional[tuple] = None) -> bool:
+        """
+        直前の捨て牌を鳴く
+        ポン・チーの後は鳴いたプレイヤーの手番になる（ツモせずに1枚捨てる）。ロンは和了して終局
+        pattern: チーで手牌から出す2枚の牌種（省略時は最初に見つかった組み合わせ）
+        """
+        if claim_type not in self.get_claim_options().get(player_id, ()):
+            print(f"エラー: プレイヤー{player_id}は{claim_type.value}できません")
+            return False
+        discarder_id, tile = self.last_discard
+        player = self.players[player_id]
+        kind = tile.kind
+        
+        if claim_type == ClaimType.CHI:
+            patterns = player.hand.chi_patterns(kind)
+            if pattern is None:
+                pattern = patterns[0]
+            elif tuple(pattern) not in patterns:
+                print(f"エラー: チーの組み合わせが正しくありません {pattern}")
+                return False
+            hand_kinds = tuple(pattern)
+        else:
+            hand_kinds = (kind, kind)
+        
+        discarder = self.players[discarder_id]
+        discarder.discarded.pop()
+        tile.is_discarded = False
+        self.last_discard = None
+        
+        if claim_type == ClaimType.RON:
+            player.add_tile_to_hand(tile)
+            player.ron_kinds = frozenset()
+            # 和了牌は捨て牌から和了者の手牌に移る
+            self.visible_counts[kind] -= 1
+            for other_id, remaining in enumerate(self.remaining_counts):
+                if other_id != player_id:
+                    remaining[kind] += 1
+            self._set_winner(player_id, kind, discarder_id)
+            self.events.publish(ClaimEvent(self.state_version, player_id, discarder_id, claim_type.value, kind))
+            metrics.GAMES_COMPLETED.inc()
+            self.events.publish(GameOverEvent(self.state_version, "ron"))
+            return True
+        
+        self.danger.on_claim(player_id, discarder_id, kind, any(t.kind == kind for t in discarder.discarded))
+        tiles = [player.hand.pop_kind(hand_kind) for hand_kind in hand_kinds]
+        for hand_tile in tiles:
+            hand_tile.is_in_hand = False
+        player.melds.append(Meld(claim_type, tiles + [tile], discarder_id, kind))
+        player.ron_kinds = frozenset()
+        # 手牌から出した2枚が見えるようになる（鳴いた牌は捨て牌から面子に移るだけ）
+        for hand_kind in hand_kinds:
+            self.visible_counts[hand_kind] += 1
+            for other_id, remaining in enumerate(self.remaining_counts):
+                if other_id != player_id:
+                    remaining[hand_kind] -= 1
+        
+        self.last_draw = None
+        previous = self.current_player
+        self.current_player = player_id
+        self.state_version += 1
+        self.events.publish(ClaimEvent(self.state_version, player_id, discarder_id, claim_type.value, kind))
+        metrics.TURNS.inc()
+        self.events.publish(TurnChangeEvent(self.state_version, previous, self.current_player))
+        return True
+    
+    def can_tsumo(self, player_id: int) -> bool:
+        """直前にツモった牌で手牌が揃っているか（鳴いた直後はツモ和了できない）"""
+        if not self.game_active or self.last_draw is None or self.last_draw[0] != player_id:
+            return False
+        player = self.players[player_id]
+        return self.cache.shanten(player.hand.kind_counts(), len(player.melds)) == -1
+    
+    def declare_tsumo(self, player_id: int) -> bool:
+        """ツモ和了して終局する"""
+        if not self.can_tsumo(player_id):
+            print(f"エラー: プレイヤー{player_id}はツモ和了できません")
+            return False
+        self._set_winner(player_id, self.last_draw[1], -1)
+        self.last_draw = None
+        metrics.GAMES_COMPLETED.inc()
+        self.events.publish(GameOverEvent(self.state_version, "tsumo"))
+        return True
+    
+    def undo_tsumo(self):
+        """ツモ和了を取り消し、和了牌をツモった直後（まだ捨てていない状態）に戻す"""
+        self.last_draw = (self.winner, self.win_kind)
+        self.winner = -1
+        self.win_kind = -1
+        self.win_from = -1
+        self.win_score = None
+        self.game_active = True
+        self.state_version += 1
+    
+    def _set_winner(self, player_id: int, kind: int, from_player: int):
+        self.winner = player_id
+        self.win_kind = kind
+        self.win_from = from_player
+        self.win_score = score_win(self)
+        self.game_active = False
+        self.state_version += 1
+    
+    def get_point_changes(self) -> list[int]:
+        """
+        和了による各プレイヤーの点数の増減（和了者がいなければ全員0）
+        ロンは放銃者が全額、ツモは他の全員で等分して払う（100点単位に切り上げ）
+        """
+        changes = [0] * len(self.players)
+        if self.win_score is None:
+            return changes
+        points = self.win_score.points
+        if self.win_from >= 0:
+            changes[self.win_from] -= points
+            changes[self.winner] += points
+        else:
+            others = len(self.players) - 1
+            share = -(-points // (others * 100)) * 100
+            for player in self.players:
+                if player.player_id != self.winner:
+                    changes[player.player_id] -= share
+            changes[self.winner] += share * others
+        return changes
+    
+    def undo_draw(self, player_id: int, kind: int) -> Optional[Tile]:
+        """ツモを取り消し、牌を山に戻す"""
+        tile = self.players[player_id].hand.pop_kind(kind)
+        if tile is None:
+            return None
+        tile.is_in_hand = False
+        self.mountain.append(tile)
+        self.remaining_counts[player_id][kind] += 1
+        self.last_draw = None
+        self.state_version += 1
+        return tile
+    
+    def undo_discard(self, player_id: int) -> Optional[Tile]:
+        """直前の捨て牌を取り消し、手牌に戻す"""
+        player = self.players[player_id]
+        if not player.discarded:
+            return None
+        tile = player.discarded.pop()
+        tile.is_discarded = False
+        player.add_tile_to_hand(tile)
+        player.ron_kinds = frozenset()
+        self.last_discard = None
+        if not self.danger.undo_discard(player_id):
+            self.danger.rebuild(self.players)
+        self.visible_counts[tile.kind] -= 1
+        for other_id, remaining in enumerate(self.remaining_counts):
+            if other_id != player_id:
+                remaining[tile.kind] += 1
+        self.state_version += 1
+        return tile
+    
+    def get_danger_vector(self, player_id: int) -> list[float]:
+        """指定プレイヤーが各牌種を捨てた時の放銃の危険度（34要素、0.0〜1.0）"""
+        return self.danger.danger_vector(player_id, self.remaining_counts[player_id])
+    
+    def get_visible_counts(self) -> list[int]:
+        """場に見えている牌の牌種ごとの枚数（参照用、変更しないこと）"""
+        return self.visible_counts
+    
+    def get_remaining_counts(self, player_id: int) -> list[int]:
+        """
+        指定プレイヤーから見た未見牌の牌種ごとの枚数（参照用、変更しないこと）
+        自分の手牌と場の捨て牌を除いた枚数
+        """
+        return self.remaining_counts[player_id]
     
     def next_turn(self):
+        previous = self.current_player
         self.current_player = (self.current_player + 1) % 4
+        self.state_version += 1
+        metrics.TURNS.inc()
+        self.events.publish(TurnChangeEvent(self.state_version, previous, self.current_player))
+        if self.is_game_over():
+            metrics.GAMES_COMPLETED.inc()
+            self.events.publish(GameOverEvent(self.state_version, "exhausted"))
     
     def get_mountain_count(self) -> int:
         return len(self.mountain)
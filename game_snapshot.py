@@ -0,0 +1,283 @@
+from typing import Optional
+from tile import Tile, NUM_TILE_KINDS, JIHAI_START, kind_to_type_number
+from game_events import GameStartEvent
+from game_logic import Meld, ClaimType
+from scoring import score_win
+
+SNAPSHOT_MAGIC = b"DJ"
+SNAPSHOT_VERSION = 2  # 2: 鳴きと和了者を追加
+NUM_PLAYERS = 4
+NO_PLAYER = 255
+
+# 鳴きの種類 <-> バイト値
+_MELD_CODES = {ClaimType.PON: 0, ClaimType.CHI: 1}
+_MELD_TYPES = {code: claim_type for claim_type, code in _MELD_CODES.items()}
+
+class GameSnapshot:
+    """
+    4人対戦のゲーム状態を牌種インデックスの配列で保持する軽量なスナップショット
+    探索AIの分岐やセーブ・ロードに使用する
+    mountain: 山（末尾から引く）, hands: プレイヤーごとの牌種別枚数（34要素）, discards: 捨て牌の並び
+    melds: プレイヤーごとの鳴き [(種類, 鳴いた相手, 鳴いた牌種, 面子の先頭の牌種), ...]
+    winner: (和了者, 和了牌種, 放銃者)、和了者がいなければNone
+    """
+    __slots__ = ("mountain", "hands", "discards", "current_player", "game_active", "melds", "winner")
+
+    def __init__(self, mountain: bytearray, hands: list, discards: list,
+                 current_player: int = 0, game_active: bool = True,
+                 melds: Optional[list] = None, winner: Optional[tuple] = None):
+        self.mountain = mountain
+        self.hands = hands
+        self.discards = discards
+        self.current_player = current_player
+        self.game_active = game_active
+        self.melds = melds if melds is not None else [[] for _ in range(NUM_PLAYERS)]
+        self.winner = winner
+
+    @classmethod
+    def from_state(cls, state) -> "GameSnapshot":
+        """MultiPlayerGameState からスナップショットを作成"""
+        return cls(
+            bytearray(state.mountain.kinds()),
+            [bytearray(player.hand.kind_counts()) for player in state.players],
+            [bytearray(tile.kind for tile in player.discarded) for player in state.players],
+            state.current_player,
+            state.game_active,
+            [[(_MELD_CODES[meld.claim_type], meld.from_player, meld.claimed_kind, meld.tiles[0].kind)
+              for meld in player.melds] for player in state.players],
+            (state.winner, state.win_kind, state.win_from) if state.winner >= 0 else None
+        )
+
+    def restore(self, state):
+        """スナップショットの内容を MultiPlayerGameState に書き戻す"""
+        state.mountain.load(self.mountain)
+        for player, hand, discards in zip(state.players, self.hands, self.discards):
+            player.hand.clear()
+            for kind in range(NUM_TILE_KINDS):
+                for _ in range(hand[kind]):
+                    player.add_tile_to_hand(_make_tile(kind))
+            player.discarded = []
+            for kind in discards:
+                tile = _make_tile(kind)
+                tile.is_discarded = True
+                player.discarded.append(tile)
+        for player, melds in zip(state.players, self.melds):
+            player.melds = [_make_meld(*meld) for meld in melds]
+        state.winner, state.win_kind, state.win_from = self.winner if self.winner else (-1, -1, -1)
+        state.win_score = score_win(state)
+        state.last_discard = None
+        state.last_draw = None
+        state.current_player = self.current_player
+        state.game_active = self.game_active
+        state.recount_visible_tiles()
+        state.state_version += 1
+        state.events.publish(GameStartEvent(state.state_version))
+
+    def clone(self) -> "GameSnapshot":
+        return GameSnapshot(
+            self.mountain[:],
+            [hand[:] for hand in self.hands],
+            [discards[:] for discards in self.discards],
+            self.current_player,
+            self.game_active,
+            [list(melds) for melds in self.melds],
+            self.winner
+        )
+
+    # 探索用の軽量な操作
+
+    def draw(self, player_id: int) -> int:
+        """山から1枚引いて牌種を返す（山が空なら-1）"""
+        if not self.mountain:
+            return -1
+        kind = self.mountain.pop()
+        self.hands[player_id][kind] += 1
+        return kind
+
+    def discard(self, player_id: int, kind: int) -> bool:
+        hand = self.hands[player_id]
+        if hand[kind] == 0:
+            return False
+        hand[kind] -= 1
+        self.discards[player_id].append(kind)
+        return True
+
+    def next_turn(self):
+        self.current_player = (self.current_player + 1) % NUM_PLAYERS
+
+    def claim(self, player_id: int, from_player: int, claim_type: ClaimType, kind: int, first_kind: int = -1) -> bool:
+        """直前の捨て牌を鳴く（first_kind: チーの面子の先頭の牌種、ロン・ポンでは不要）"""
+        discards = self.discards[from_player]
+        if not discards or discards[-1] != kind:
+            return False
+        hand = self.hands[player_id]
+        if claim_type == ClaimType.RON:
+            discards.pop()
+            hand[kind] += 1
+            self.winner = (player_id, kind, from_player)
+            self.game_active = False
+            return True
+        if claim_type == ClaimType.PON:
+            first_kind = kind
+            used = [kind, kind]
+        else:
+            used = [k for k in (first_kind, first_kind + 1, first_kind + 2) if k != kind]
+            if len(used) != 2:
+                return False
+        if any(hand[k] < used.count(k) for k in used):
+            return False
+        discards.pop()
+        for k in used:
+            hand[k] -= 1
+        self.melds[player_id].append((_MELD_CODES[claim_type], from_player, kind, first_kind))
+        self.current_player = player_id
+        return True
+
+    def tsumo(self, player_id: int, kind: int):
+        """ツモ和了で終局する"""
+        self.winner = (player_id, kind, -1)
+        self.game_active = False
+
+    def get_mountain_count(self) -> int:
+        return len(self.mountain)
+
+    def is_game_over(self) -> bool:
+        return not self.mountain or not self.game_active
+
+    # セーブ・ロード用のバイト列変換
+
+    def to_bytes(self) -> bytes:
+        """
+        バイト列に変換する
+        形式: マジック(2) 版(1) 手番(1) 進行中(1) 山の枚数(1) 山 手牌(34x4) [捨て牌枚数(1) 捨て牌]x4
+              [鳴きの数(1) [種類 相手 牌種 先頭牌種](4)xn]x4 和了者(1) 和了牌種(1) 放銃者(1)
+        """
+        data = bytearray(SNAPSHOT_MAGIC)
+        data += bytes((SNAPSHOT_VERSION, self.current_player, int(self.game_active), len(self.mountain)))
+        data += self.mountain
+        for hand in self.hands:
+            data += hand
+        for discards in self.discards:
+            data.append(len(discards))
+            data += discards
+        for melds in self.melds:
+            data.append(len(melds))
+            for meld in melds:
+                data += bytes(meld)
+        winner = self.winner or (NO_PLAYER, NO_PLAYER, NO_PLAYER)
+        data += bytes(NO_PLAYER if value < 0 else value for value in winner)
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "GameSnapshot":
+        """バイト列から作成する（形式・値が正しくなければ ValueError。どの状態も書き換えない）"""
+        try:
+            snapshot = cls._parse(data)
+        except IndexError:
+            raise ValueError("スナップショットの長さが正しくありません") from None
+        snapshot.validate()
+        return snapshot
+
+    @classmethod
+    def _parse(cls, data: bytes) -> "GameSnapshot":
+        version = data[2]
+        if data[:2] != SNAPSHOT_MAGIC or version not in (1, SNAPSHOT_VERSION):
+            raise ValueError("スナップショットの形式が正しくありません")
+        current_player, game_active, mountain_count = data[3], bool(data[4]), data[5]
+        pos = 6
+        mountain = bytearray(data[pos:pos + mountain_count])
+        pos += mountain_count
+        hands = []
+        for _ in range(NUM_PLAYERS):
+            hands.append(bytearray(data[pos:pos + NUM_TILE_KINDS]))
+            pos += NUM_TILE_KINDS
+        discards = []
+        for _ in range(NUM_PLAYERS):
+            count = data[pos]
+            discards.append(bytearray(data[pos + 1:pos + 1 + count]))
+            pos += 1 + count
+        melds = [[] for _ in range(NUM_PLAYERS)]
+        winner = None
+        if version >= 2:
+            for player_melds in melds:
+                count = data[pos]
+                pos += 1
+                for _ in range(count):
+                    if data[pos] not in _MELD_TYPES:
+                        raise ValueError("鳴きの種類が正しくありません")
+                    player_melds.append(tuple(data[pos:pos + 4]))
+                    pos += 4
+            if data[pos] != NO_PLAYER:
+                winner = (data[pos], data[pos + 1], -1 if data[pos + 2] == NO_PLAYER else data[pos + 2])
+            pos += 3
+        if pos != len(data):
+            raise ValueError("スナップショットの長さが正しくありません")
+        return cls(mountain, hands, discards, current_player, game_active, melds, winner)
+
+    def validate(self):
+        """牌種・手番・鳴き・和了者の値と、牌種ごとの枚数（4枚以下）を確かめる（正しくなければ ValueError）"""
+        if not 0 <= self.current_player < NUM_PLAYERS:
+            raise ValueError(f"手番が正しくありません: {self.current_player}")
+        totals = [0] * NUM_TILE_KINDS
+        for kinds in [self.mountain] + list(self.discards):
+            for kind in kinds:
+                if kind >= NUM_TILE_KINDS:
+                    raise ValueError(f"牌種が正しくありません: {kind}")
+                totals[kind] += 1
+        for hand in self.hands:
+            for kind in range(NUM_TILE_KINDS):
+                totals[kind] += hand[kind]
+        for player_id, melds in enumerate(self.melds):
+            for code, from_player, claimed_kind, first_kind in melds:
+                if code not in _MELD_TYPES or from_player >= NUM_PLAYERS or from_player == player_id:
+                    raise ValueError(f"鳴きが正しくありません: {(code, from_player, claimed_kind, first_kind)}")
+                if first_kind >= NUM_TILE_KINDS or (
+                        _MELD_TYPES[code] == ClaimType.CHI and (first_kind >= JIHAI_START or first_kind % 9 > 6)):
+                    raise ValueError(f"鳴きの牌種が正しくありません: {first_kind}")
+                kinds = meld_kinds(code, first_kind)
+                if claimed_kind not in kinds:
+                    raise ValueError(f"鳴いた牌が面子にありません: {claimed_kind}")
+                for kind in kinds:
+                    totals[kind] += 1
+        over = [kind for kind in range(NUM_TILE_KINDS) if totals[kind] > 4]
+        if over:
+            raise ValueError(f"5枚以上ある牌種があります: {over}")
+        if self.winner is not None:
+            winner, win_kind, win_from = self.winner
+            if winner >= NUM_PLAYERS or win_kind >= NUM_TILE_KINDS or win_from >= NUM_PLAYERS or win_from == winner:
+                raise ValueError(f"和了者が正しくありません: {self.winner}")
+
+def _make_tile(kind: int) -> Tile:
+    tile_type, number = kind_to_type_number(kind)
+    return Tile(tile_type, number)
+
+def meld_kinds(code: int, first_kind: int) -> tuple:
+    """スナップショットの鳴き（種類コード, 先頭の牌種）から面子の牌種を求める"""
+    if _MELD_TYPES[code] == ClaimType.PON:
+        return (first_kind,) * 3
+    return (first_kind, first_kind + 1, first_kind + 2)
+
+def _make_meld(code: int, from_player: int, claimed_kind: int, first_kind: int) -> Meld:
+    kinds = meld_kinds(code, first_kind)
+    return Meld(_MELD_TYPES[code], [_make_tile(kind) for kind in kinds], from_player, claimed_kind)
+
+def save_game(state, file_path: str) -> bool:
+    """ゲーム状態をファイルに保存"""
+    try:
+        with open(file_path, 'wb') as f:
+            f.write(GameSnapshot.from_state(state).to_bytes())
+        return True
+    except OSError as e:
+        print(f"ゲームの保存に失敗しました: {e}")
+        return False
+
+def load_game(state, file_path: str) -> bool:
+    """ファイルからゲーム状態を読み込む（読めなければ state は変更しない）"""
+    try:
+        with open(file_path, 'rb') as f:
+            snapshot = GameSnapshot.from_bytes(f.read())
+        snapshot.restore(state)
+    except (OSError, ValueError) as e:
+        print(f"ゲームの読み込みに失敗しました: {e}")
+        return False
+    return True
@@ -1,11 +1,20 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from PIL import Image, ImageTk
 import os
 from typing import List, Optional, Callable
-from tile import Tile, TileType
+from tile import Tile, TileType, kind_to_type_number
 from game_logic import GameState
 from settings import Settings
+from asset_watcher import TileAssets, AssetWatcher, TileImageCache
+from puzzles import load_puzzles
+import metrics
+
+SINGLE_REDRAWS = metrics.REDRAWS.labels(scope="single")
+
+# 画像の変更を確認する間隔（ミリ秒）
+ASSET_POLL_INTERVAL = 200
+
+TILE_IMAGES = TileImageCache((40, 60))
 
 class TileWidget:
     def __init__(self, parent, tile: Tile, click_callback: Optional[Callable] = None):
@@ -23,11 +32,8 @@ class TileWidget:
     
     def update_image(self):
         try:
-            image_path = self.tile.get_image_path()
-            if os.path.exists(image_path):
-                img = Image.open(image_path)
-                img = img.resize((40, 60), Image.Resampling.LANCZOS)
-                self.photo = ImageTk.PhotoImage(img)
+            self.photo = TILE_IMAGES.get(self.tile.kind)
+            if self.photo is not None:
                 self.label.config(image=self.photo)
             else:
                 self.label.config(text=str(self.tile), font=("Arial", 8))
@@ -43,12 +49,26 @@ class MahjongGUI:
         self.game = GameState()
         self.settings = Settings()
         
+        # 牌画像・設定ファイルの変更は別スレッドで確認し、変わった牌種だけ画像を読み直す
+        self.assets = TileAssets(self.settings)
+        TILE_IMAGES.bind(self.assets)
+        self.asset_watcher = AssetWatcher(self.settings, self.assets)
+        self.asset_watcher.start()
+        
         self.hand_widgets = []
         self.discarded_widgets = []
         
+        # 練習問題（何を切る？）。出題中は puzzle に今の問題が入る
+        self.puzzles = None
+        self.puzzle = None
+        self.puzzle_number = 0
+        self.puzzle_answered = False
+        self.puzzle_score = [0, 0]  # [正解数, 回答数]
+        
         self.create_menu()
         self.create_main_layout()
         self.update_display()
+        self.root.after(ASSET_POLL_INTERVAL, self.poll_assets)
     
     def create_menu(self):
         menubar = tk.Menu(self.root)
@@ -57,6 +77,7 @@ class MahjongGUI:
         game_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="ゲーム", menu=game_menu)
         game_menu.add_command(label="新しいゲーム", command=self.new_game)
+        game_menu.add_command(label="練習問題（何を切る？）", command=self.open_puzzles)
         game_menu.add_separator()
         game_menu.add_command(label="終了", command=self.root.quit)
         
@@ -83,6 +104,14 @@ class MahjongGUI:
         self.draw_button = tk.Button(mountain_frame, text="ツモ", command=self.draw_tile)
         self.draw_button.pack(side="right")
         
+        # 練習問題の表示（出題中だけ表示）
+        self.puzzle_frame = tk.Frame(self.root)
+        self.puzzle_anchor = mountain_frame
+        self.puzzle_label = tk.Label(self.puzzle_frame, text="", font=("Arial", 11), anchor="w")
+        self.puzzle_label.pack(side="left", fill="x", expand=True)
+        tk.Button(self.puzzle_frame, text="練習終了", command=self.end_puzzles).pack(side="right")
+        tk.Button(self.puzzle_frame, text="次の問題", command=self.next_puzzle).pack(side="right", padx=5)
+        
         # 手牌エリア
         hand_frame = tk.Frame(self.root)
         hand_frame.pack(fill="x", padx=10, pady=10)
@@ -114,6 +143,7 @@ class MahjongGUI:
         scrollbar.pack(side="right", fill="y")
     
     def update_display(self):
+        SINGLE_REDRAWS.inc()
         # 情報ラベル更新
         self.info_label.config(
             text=f"手牌: {self.game.get_hand_count()}枚 | 捨て牌: {self.game.get_discarded_count()}枚"
@@ -134,11 +164,6 @@ class MahjongGUI:
         
         # 新しい手牌ウィジェット作成
         for i, tile in enumerate(self.game.hand):
-            # カスタム画像があるかチェック
-            custom_path = self.settings.get_custom_image(tile.tile_type, tile.number)
-            if custom_path:
-                tile.image_path = custom_path
-            
             widget = TileWidget(self.hand_frame, tile, self.on_tile_click)
             widget.frame.grid(row=0, column=i, padx=2, pady=2)
             self.hand_widgets.append(widget)
@@ -152,11 +177,6 @@ class MahjongGUI:
         # 新しい捨て牌ウィジェット作成（6列で表示）
         cols = 6
         for i, tile in enumerate(self.game.discarded):
-            # カスタム画像があるかチェック
-            custom_path = self.settings.get_custom_image(tile.tile_type, tile.number)
-            if custom_path:
-                tile.image_path = custom_path
-            
             widget = TileWidget(self.discarded_frame, tile)
             widget.frame.grid(row=i // cols, column=i % cols, padx=2, pady=2)
             self.discarded_widgets.append(widget)
@@ -170,6 +190,9 @@ class MahjongGUI:
                 messagebox.showinfo("情報", "山に牌がありません")
     
     def on_tile_click(self, tile: Tile):
+        if self.puzzle is not None:
+            self.answer_puzzle(tile)
+            return
         if self.game.can_discard():
             if self.game.discard_tile_by_object(tile):
                 self.update_display()
@@ -177,15 +200,111 @@ class MahjongGUI:
             messagebox.showwarning("警告", "先にツモを行ってください（14枚の時のみ捨てられます）")
     
     def new_game(self):
+        self.end_puzzles()
         self.game.reset_game()
         self.update_display()
         messagebox.showinfo("情報", "新しいゲームを開始しました")
     
+    def open_puzzles(self):
+        """問題ファイルを開いて出題を始める"""
+        file_path = filedialog.askopenfilename(
+            title="問題ファイルを開く",
+            filetypes=[("問題ファイル", "*.bin"), ("すべてのファイル", "*.*")]
+        )
+        if not file_path:
+            return
+        puzzles = load_puzzles(file_path)
+        if puzzles is None or len(puzzles) == 0:
+            messagebox.showerror("エラー", "問題ファイルの読み込みに失敗しました")
+            return
+        self.end_puzzles()
+        self.puzzles = puzzles
+        self.puzzle_score = [0, 0]
+        self.puzzle_number = 0
+        self.puzzle_frame.pack(after=self.puzzle_anchor, fill="x", padx=10, pady=5)
+        self.next_puzzle()
+    
+    def next_puzzle(self):
+        """ランダムに1問出す（ファイルから1問分だけ読む）"""
+        if self.puzzles is None:
+            return
+        try:
+            puzzle = self.puzzles[self.puzzles.random_index()]
+        except (OSError, ValueError) as e:
+            print(f"問題の読み込みに失敗しました: {e}")
+            messagebox.showerror("エラー", f"問題ファイルが壊れています: {e}")
+            self.end_puzzles()
+            return
+        self.puzzle = puzzle
+        self.puzzle_number += 1
+        self.puzzle_answered = False
+        # 問題の14枚だけを表示し、ツモはできないようにする
+        self.game.hand = [Tile(*kind_to_type_number(kind)) for kind in self.puzzle.kinds]
+        self.game.discarded = []
+        self.game.mountain.clear()
+        self.puzzle_label.config(text=f"第{self.puzzle_number}問: 何を切る？", fg="black")
+        self.update_display()
+    
+    def answer_puzzle(self, tile: Tile):
+        """選んだ牌をすぐ採点する（保存済みの評価と比べるだけ）"""
+        if self.puzzle_answered:
+            return
+        self.puzzle_answered = True
+        correct, message = self.puzzle.grade(tile.kind)
+        self.puzzle_score[1] += 1
+        if correct:
+            self.puzzle_score[0] += 1
+        self.game.discard_tile_by_object(tile)
+        self.update_display()
+        correct_count, total = self.puzzle_score
+        self.puzzle_label.config(
+            text=f"第{self.puzzle_number}問: {message}（正解 {correct_count}/{total}）",
+            fg="darkgreen" if correct else "red"
+        )
+    
+    def end_puzzles(self):
+        """練習問題を終える（通常のゲームに戻すのは新しいゲーム）"""
+        if self.puzzles is None:
+            return
+        self.puzzles.close()
+        self.puzzles = None
+        self.puzzle = None
+        self.puzzle_frame.pack_forget()
+        self.game.reset_game()
+        self.update_display()
+    
+    def poll_assets(self):
+        """監視スレッドが見つけた画像の変更をまとめて反映する"""
+        changed = self.asset_watcher.take_changes()
+        if changed:
+            self.refresh_tile_images(changed)
+        self.root.after(ASSET_POLL_INTERVAL, self.poll_assets)
+    
+    def refresh_tile_images(self, kinds):
+        """画像が変わった牌種のキャッシュだけを消して、1回だけ描き直す"""
+        TILE_IMAGES.invalidate(kinds)
+        self.update_display()
+    
+    def apply_image_settings(self):
+        """画像設定の変更をすぐ反映する（監視スレッドの確認を待たない）"""
+        self.asset_watcher.poll()
+        changed = self.asset_watcher.take_changes()
+        if changed:
+            self.refresh_tile_images(changed)
+    
     def open_image_settings(self):
-        ImageSettingsWindow(self.root, self.settings, self.update_display)
+        ImageSettingsWindow(self.root, self.settings, self.apply_image_settings)
     
     def run(self):
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         self.root.mainloop()
+    
+    def on_closing(self):
+        if self.puzzles is not None:
+            self.puzzles.close()
+        self.asset_watcher.stop()
+        self.settings.flush()
+        self.root.destroy()
 
 class ImageSettingsWindow:
     def __init__(self, parent, settings: Settings, update_callback):
@@ -0,0 +1,149 @@
+from functools import lru_cache
+from tile import NUM_TILE_KINDS, JIHAI_START
+
+# 手牌評価の基本関数（牌種ごとの枚数34要素のリストを扱う）
+
+@lru_cache(maxsize=None)
+def _group_options(pattern: tuple, allow_sequence: bool) -> frozenset:
+    """
+    1種類の牌（萬子・筒子・索子・字牌のいずれか）の枚数パターンを分解し、
+    (面子数, 塔子数, 雀頭の有無) の組み合わせを返す
+    """
+    counts = list(pattern)
+    results = set()
+
+    def dfs(i, mentsu, taatsu, pair):
+        while i < len(counts) and counts[i] == 0:
+            i += 1
+        if i >= len(counts):
+            results.add((mentsu, taatsu, pair))
+            return
+
+        # 刻子
+        if counts[i] >= 3:
+            counts[i] -= 3
+            dfs(i, mentsu + 1, taatsu, pair)
+            counts[i] += 3
+        # 順子
+        if allow_sequence and i + 2 < len(counts) and counts[i + 1] and counts[i + 2]:
+            counts[i] -= 1; counts[i + 1] -= 1; counts[i + 2] -= 1
+            dfs(i, mentsu + 1, taatsu, pair)
+            counts[i] += 1; counts[i + 1] += 1; counts[i + 2] += 1
+        if counts[i] >= 2:
+            counts[i] -= 2
+            # 雀頭
+            if not pair:
+                dfs(i, mentsu, taatsu, 1)
+            # 対子（塔子扱い）
+            dfs(i, mentsu, taatsu + 1, pair)
+            counts[i] += 2
+        # 両面・辺張・嵌張
+        if allow_sequence:
+            for gap in (1, 2):
+                if i + gap < len(counts) and counts[i + gap]:
+                    counts[i] -= 1; counts[i + gap] -= 1
+                    dfs(i, mentsu, taatsu + 1, pair)
+                    counts[i] += 1; counts[i + gap] += 1
+        # 孤立牌として外す
+        counts[i] -= 1
+        dfs(i, mentsu, taatsu, pair)
+        counts[i] += 1
+
+    dfs(0, 0, 0, 0)
+
+    # 他の組み合わせに劣るものを除外
+    pruned = {
+        r for r in results
+        if not any(o != r and o[0] >= r[0] and o[1] >= r[1] and o[2] >= r[2] for o in results)
+    }
+    return frozenset(pruned)
+
+def clear_cache():
+    """色ごとの分解表のキャッシュを空にする"""
+    _group_options.cache_clear()
+
+def _split_groups(counts) -> list:
+    return [
+        _group_options(tuple(counts[0:9]), True),
+        _group_options(tuple(counts[9:18]), True),
+        _group_options(tuple(counts[18:27]), True),
+        _group_options(tuple(counts[JIHAI_START:NUM_TILE_KINDS]), False)
+    ]
+
+def standard_shanten(counts, melds: int = 0) -> int:
+    """4面子1雀頭形の向聴数（和了形は-1）"""
+    best = 8
+    # 面子・塔子・雀頭の合計を各グループで積み上げる
+    combined = {(melds, 0, 0)}
+    for options in _split_groups(counts):
+        combined = {
+            (m + om, t + ot, p + op)
+            for m, t, p in combined
+            for om, ot, op in options
+            if p + op <= 1
+        }
+    for mentsu, taatsu, pair in combined:
+        if mentsu + taatsu > 4:
+            taatsu = 4 - mentsu
+        best = min(best, 8 - 2 * mentsu - taatsu - pair)
+    return best
+
+def chiitoitsu_shanten(counts) -> int:
+    """七対子形の向聴数"""
+    pairs = sum(1 for c in counts if c >= 2)
+    kinds = sum(1 for c in counts if c > 0)
+    return 6 - pairs + max(0, 7 - kinds)
+
+def calculate_shanten(counts, melds: int = 0) -> int:
+    """向聴数を求める（鳴きがない場合は七対子形も考慮）"""
+    shanten = standard_shanten(counts, melds)
+    if melds == 0:
+        shanten = min(shanten, chiitoitsu_shanten(counts))
+    return shanten
+
+def is_complete_hand(counts, melds: int = 0) -> bool:
+    """和了形かどうか"""
+    return calculate_shanten(counts, melds) == -1
+
+def calculate_ukeire(counts, melds: int = 0) -> list[int]:
+    """向聴数を進める牌種の一覧（手牌が3n+1枚の時に使用）"""
+    counts = list(counts)
+    current = calculate_shanten(counts, melds)
+    kinds = []
+    for kind in range(NUM_TILE_KINDS):
+        if counts[kind] >= 4:
+            continue
+        counts[kind] += 1
+        if calculate_shanten(counts, melds) < current:
+            kinds.append(kind)
+        counts[kind] -= 1
+    return kinds
+
+def calculate_waits(counts, melds: int = 0) -> list[int]:
+    """聴牌している手牌（3n+1枚）の和了牌の牌種一覧（聴牌していなければ空）"""
+    counts = list(counts)
+    if calculate_shanten(counts, melds) != 0:
+        return []
+    waits = []
+    for kind in range(NUM_TILE_KINDS):
+        if counts[kind] >= 4:
+            continue
+        counts[kind] += 1
+        if is_complete_hand(counts, melds):
+            waits.append(kind)
+        counts[kind] -= 1
+    return waits
+
+def find_isolated_kinds(counts) -> list[int]:
+    """同種の隣接する数字がない数牌の牌種一覧"""
+    isolated = []
+    for kind in range(JIHAI_START):
+        if counts[kind] == 0:
+            continue
+        number = kind % 9
+        if number > 0 and counts[kind - 1]:
+            continue
+        if number < 8 and counts[kind + 1]:
+            continue
+        isolated.append(kind)
+    return isolated
@@ -0,0 +1,145 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+from tile import NUM_TILE_KINDS, JIHAI_START
+import hand_analysis
+
+def canonicalize_counts(counts) -> tuple:
+    """
+    手牌の枚数配列を正規化する
+    萬子・筒子・索子の入れ替え、字牌同士の入れ替えで同じ形になる手牌は同じキーになる
+    戻り値: (正規化した枚数タプル, 正規化後の牌種→元の牌種 の対応リスト)
+    """
+    suits = sorted(
+        ((tuple(counts[s * 9:s * 9 + 9]), s) for s in range(3)),
+        reverse=True
+    )
+    honors = sorted(
+        ((counts[kind], kind) for kind in range(JIHAI_START, NUM_TILE_KINDS)),
+        reverse=True
+    )
+
+    key = []
+    kind_map = []
+    for pattern, suit in suits:
+        key.extend(pattern)
+        kind_map.extend(range(suit * 9, suit * 9 + 9))
+    for count, kind in honors:
+        key.append(count)
+        kind_map.append(kind)
+    return tuple(key), kind_map
+
+class AnalysisCancelled(Exception):
+    """解析・探索が途中で中断された（新しい解析要求が来た時など）"""
+    pass
+
+class HandEvalCache:
+    """
+    手牌評価（向聴数・受け入れ・孤立牌）の結果を保持するLRUキャッシュ
+    複数の卓・スレッドから共有して使用できる
+    """
+    def __init__(self, maxsize: int = 65536):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key: tuple, compute: Callable):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def shanten(self, counts, melds: int = 0) -> int:
+        """向聴数"""
+        key, _ = canonicalize_counts(counts)
+        return self._lookup(
+            ("shanten", melds, key),
+            lambda: hand_analysis.calculate_shanten(key, melds)
+        )
+
+    def ukeire(self, counts, melds: int = 0) -> list[int]:
+        """向聴数を進める牌種の一覧"""
+        key, kind_map = canonicalize_counts(counts)
+        kinds = self._lookup(
+            ("ukeire", melds, key),
+            lambda: tuple(hand_analysis.calculate_ukeire(key, melds))
+        )
+        return sorted(kind_map[kind] for kind in kinds)
+
+    def waits(self, counts, melds: int = 0) -> list[int]:
+        """聴牌している手牌の和了牌の牌種一覧"""
+        key, kind_map = canonicalize_counts(counts)
+        kinds = self._lookup(
+            ("waits", melds, key),
+            lambda: tuple(hand_analysis.calculate_waits(key, melds))
+        )
+        return sorted(kind_map[kind] for kind in kinds)
+
+    def discard_waits(self, counts, melds: int = 0) -> dict:
+        """
+        3n+2枚の手牌について、捨てると聴牌になる牌種ごとの待ち牌
+        戻り値: {捨てる牌種: [待ち牌種, ...]}
+        """
+        counts = list(counts)
+        preview = {}
+        for kind in range(NUM_TILE_KINDS):
+            if counts[kind] == 0:
+                continue
+            counts[kind] -= 1
+            waits = self.waits(counts, melds)
+            counts[kind] += 1
+            if waits:
+                preview[kind] = waits
+        return preview
+
+    def isolated(self, counts) -> list[int]:
+        """孤立している数牌の牌種一覧"""
+        key, kind_map = canonicalize_counts(counts)
+        kinds = self._lookup(
+            ("isolated", key),
+            lambda: tuple(hand_analysis.find_isolated_kinds(key))
+        )
+        return sorted(kind_map[kind] for kind in kinds)
+
+    def get_stats(self) -> dict:
+        """キャッシュのヒット・ミス統計"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+_shared_cache: Optional[HandEvalCache] = None
+_shared_lock = threading.Lock()
+
+def get_shared_cache() -> HandEvalCache:
+    """プロセス内で共有する手牌評価キャッシュを取得"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = HandEvalCache()
+        return _shared_cache
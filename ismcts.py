@@ -0,0 +1,204 @@
+import math
+import random
+import time
+from typing import Callable, Optional
+from tile import NUM_TILE_KINDS
+from hand_cache import HandEvalCache
+
+NUM_PLAYERS = 4
+
+# 探索の終端・打ち切り時の評価値（和了, 聴牌, 一向聴, 二向聴）
+WIN_REWARD = 1.0
+SHANTEN_REWARDS = (0.4, 0.15, 0.05)
+
+class DecisionNode:
+    """自分の手番（14枚）の局面。子は捨てる牌種ごとの ActionNode"""
+    __slots__ = ("hand", "actions", "untried", "visits")
+
+    def __init__(self, hand: tuple, untried: list):
+        self.hand = hand
+        self.actions = {}
+        self.untried = untried
+        self.visits = 0
+
+class ActionNode:
+    """捨て牌1つ分の統計。子は次にツモる牌種ごとの DecisionNode"""
+    __slots__ = ("visits", "total", "children")
+
+    def __init__(self):
+        self.visits = 0
+        self.total = 0.0
+        self.children = {}
+
+class ISMCTSSearch:
+    """
+    情報集合モンテカルロ木探索による捨て牌選択
+    見えていない牌（相手の手牌と山）を毎回サンプリングし、期限まで探索を続ける
+    前回の探索木は、実際に捨てた牌とツモった牌に対応する部分木を再利用する
+    """
+    def __init__(self, cache: HandEvalCache, exploration: float = 0.7, horizon: int = 6,
+                 max_iterations: int = 200):
+        self.cache = cache
+        self.exploration = exploration
+        self.horizon = horizon  # ロールアウトで進める自分のツモ回数
+        self.max_iterations = max_iterations  # 期限が指定されない場合の反復回数
+        self.root: Optional[DecisionNode] = None
+        self.melds = 0
+        self.last_iterations = 0
+
+    def search(self, hand_counts: list[int], remaining_counts: list[int], mountain_count: int,
+               deadline: Optional[float] = None, melds: int = 0,
+               should_stop: Optional[Callable] = None) -> int:
+        """
+        捨てる牌種を返す
+        remaining_counts: 自分から見た未見牌の枚数, deadline: time.monotonic() 基準の期限
+        melds: 鳴いた面子の数
+        should_stop: 反復ごとに確認し、True ならその時点の結果で打ち切る（対局のリセット時など）
+        """
+        hand = tuple(hand_counts)
+        if melds != self.melds:
+            # 鳴くと手牌の形が変わるので前回の探索木は使えない
+            self.root = None
+            self.melds = melds
+        root = self._reuse_subtree(hand) or self._new_node(hand)
+        self.root = root
+
+        unseen = [kind for kind in range(NUM_TILE_KINDS) for _ in range(max(0, remaining_counts[kind]))]
+        mountain_count = min(mountain_count, len(unseen))
+
+        iterations = 0
+        while True:
+            if should_stop is not None and should_stop():
+                break
+            if deadline is not None:
+                if time.monotonic() >= deadline and iterations > 0:
+                    break
+            elif iterations >= self.max_iterations:
+                break
+            self._iterate(root, unseen, mountain_count)
+            iterations += 1
+        self.last_iterations = iterations
+
+        if not root.actions:
+            return root.untried[0] if root.untried else -1
+        if len(root.actions) == 1 and not root.untried:
+            return next(iter(root.actions))
+        return max(root.actions.items(), key=lambda item: (item[1].visits, item[1].total))[0]
+
+    def _reuse_subtree(self, hand: tuple) -> Optional[DecisionNode]:
+        """前回の探索木から、現在の手牌に一致する孫ノードを探す"""
+        if self.root is None:
+            return None
+        if self.root.hand == hand:
+            return self.root
+        for action in self.root.actions.values():
+            for child in action.children.values():
+                if child.hand == hand:
+                    return child
+        return None
+
+    def _new_node(self, hand: tuple) -> DecisionNode:
+        # 向聴数を戻さない捨て牌だけを候補にし、受け入れの多いものから展開する
+        counts = list(hand)
+        scored = []
+        for kind in range(NUM_TILE_KINDS):
+            if not counts[kind]:
+                continue
+            counts[kind] -= 1
+            scored.append((self.cache.shanten(counts, self.melds), -len(self.cache.ukeire(counts, self.melds)), kind))
+            counts[kind] += 1
+        best_shanten = min(scored)[0]
+        return DecisionNode(hand, [kind for shanten, _, kind in sorted(scored) if shanten == best_shanten])
+
+    def _iterate(self, root: DecisionNode, unseen: list[int], mountain_count: int):
+        # 見えていない牌を並べ替えて山を決める（先頭から順にツモる）
+        random.shuffle(unseen)
+        wall = unseen[:mountain_count]
+        # 自分のツモは他家3人の後なので4枚ごと
+        draws = wall[NUM_PLAYERS - 1::NUM_PLAYERS]
+
+        path = []
+        node = root
+        depth = 0
+        counts = list(root.hand)
+        reward = None
+
+        while True:
+            node.visits += 1
+            if self.cache.shanten(counts, self.melds) == -1:
+                reward = WIN_REWARD
+                break
+
+            kind = self._select_action(node)
+            action = node.actions.get(kind)
+            expanded = action is None
+            if expanded:
+                action = ActionNode()
+                node.actions[kind] = action
+                node.untried.remove(kind)
+            path.append(action)
+
+            counts[kind] -= 1
+            if depth >= len(draws):
+                reward = self._evaluate(counts)
+                break
+            drawn = draws[depth]
+            counts[drawn] += 1
+            depth += 1
+
+            if expanded:
+                reward = self._rollout(counts, draws, depth)
+                break
+            child = action.children.get(drawn)
+            if child is None:
+                child = self._new_node(tuple(counts))
+                action.children[drawn] = child
+            node = child
+
+        for action in path:
+            action.visits += 1
+            action.total += reward
+
+    def _select_action(self, node: DecisionNode) -> int:
+        if node.untried:
+            return node.untried[0]
+        log_visits = math.log(node.visits)
+        best_kind, best_value = -1, -1.0
+        for kind, action in node.actions.items():
+            value = action.total / action.visits + self.exploration * math.sqrt(log_visits / action.visits)
+            if value > best_value:
+                best_kind, best_value = kind, value
+        return best_kind
+
+    def _rollout(self, counts: list[int], draws: list[int], depth: int) -> float:
+        """簡易な捨て牌方針で数巡進め、和了または打ち切り時の形で評価する"""
+        limit = min(len(draws), depth + self.horizon)
+        while True:
+            if self.cache.shanten(counts, self.melds) == -1:
+                return WIN_REWARD
+            counts[self._rollout_discard(counts)] -= 1
+            if depth >= limit:
+                return self._evaluate(counts)
+            counts[draws[depth]] += 1
+            depth += 1
+
+    def _rollout_discard(self, counts: list[int]) -> int:
+        """ロールアウト用の捨て牌選択（向聴数が最小になる牌からランダム）"""
+        best_kinds, best_shanten = [], None
+        for kind in range(NUM_TILE_KINDS):
+            if not counts[kind]:
+                continue
+            counts[kind] -= 1
+            shanten = self.cache.shanten(counts, self.melds)
+            counts[kind] += 1
+            if best_shanten is None or shanten < best_shanten:
+                best_kinds, best_shanten = [kind], shanten
+            elif shanten == best_shanten:
+                best_kinds.append(kind)
+        return random.choice(best_kinds)
+
+    def _evaluate(self, counts: list[int]) -> float:
+        shanten = self.cache.shanten(counts, self.melds)
+        if shanten < len(SHANTEN_REWARDS):
+            return SHANTEN_REWARDS[max(0, shanten)]
+        return 0.0
@@ -0,0 +1,112 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from table_server import DEFAULT_HOST, DEFAULT_PORT, encode_message
+
+# 対戦サーバーの負荷試験クライアント
+# 多数のクライアントが同時に卓を作って対局し、捨て牌の応答時間を集計する
+
+def percentile(values: list, ratio: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(len(ordered) * ratio))
+    return ordered[index]
+
+async def run_client(host: str, port: int, turn_delay: float, latencies: list, stats: dict):
+    """1クライアント分の対局（卓を作って席0に着き、終局まで捨て続ける）"""
+    try:
+        reader, writer = await asyncio.open_connection(host, port, limit=2 ** 16)
+    except OSError:
+        stats['connect_errors'] += 1
+        return
+
+    async def receive(expected: set) -> dict:
+        while True:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("切断されました")
+            message = json.loads(line)
+            if message["t"] in expected:
+                return message
+
+    try:
+        writer.write(encode_message({"t": "create", "humans": [0], "delay": turn_delay}))
+        created = await receive({"created", "err"})
+        if created.get("t") != "created":
+            stats['setup_errors'] += 1
+            return
+        writer.write(encode_message({"t": "join", "table": created["table"], "seat": 0}))
+        joined = await receive({"joined", "err"})
+        if joined.get("t") != "joined":
+            stats['setup_errors'] += 1
+            return
+
+        while True:
+            message = await receive({"your_turn", "claim_offer", "end"})
+            if message["t"] == "end":
+                break
+            if message["t"] == "claim_offer":
+                # ロンだけは受け、他の鳴きは見送る
+                claim = "ron" if "ron" in message["c"] else None
+                writer.write(encode_message({"t": "claim", "c": claim}))
+                await receive({"ok", "err"})
+                continue
+            sent = time.perf_counter()
+            if message.get("tsumo"):
+                writer.write(encode_message({"t": "tsumo"}))
+            else:
+                writer.write(encode_message({"t": "discard", "i": random.randrange(len(message["hand"]))}))
+            reply = await receive({"ok", "err"})
+            latencies.append(time.perf_counter() - sent)
+            if reply["t"] == "err":
+                stats['action_errors'] += 1
+        stats['games'] += 1
+    except (ConnectionError, OSError, ValueError, KeyError):
+        # ValueError・KeyError はサーバーから想定外の応答が来た場合
+        stats['disconnects'] += 1
+    finally:
+        writer.close()
+
+async def run_load_test(clients: int, host: str, port: int, turn_delay: float, ramp: float) -> dict:
+    latencies = []
+    stats = {'games': 0, 'connect_errors': 0, 'setup_errors': 0, 'action_errors': 0, 'disconnects': 0}
+    start = time.perf_counter()
+
+    async def delayed(index: int):
+        # 接続を ramp 秒に分散させる
+        await asyncio.sleep(ramp * index / max(1, clients))
+        await run_client(host, port, turn_delay, latencies, stats)
+
+    await asyncio.gather(*(delayed(i) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    stats.update({
+        'clients': clients,
+        'actions': len(latencies),
+        'elapsed': elapsed,
+        'actions_per_sec': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000
+    })
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="対戦サーバーの負荷試験")
+    parser.add_argument("--clients", type=int, default=1000, help="同時接続するクライアント数")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--delay", type=float, default=0.05, help="CPUの1手あたりの進行間隔（秒）")
+    parser.add_argument("--ramp", type=float, default=2.0, help="全クライアントが接続するまでの時間（秒）")
+    args = parser.parse_args()
+
+    stats = asyncio.run(run_load_test(args.clients, args.host, args.port, args.delay, args.ramp))
+    print(f"クライアント: {stats['clients']}  対局完了: {stats['games']}  "
+          f"接続失敗: {stats['connect_errors']}  卓の作成・着席失敗: {stats['setup_errors']}  "
+          f"切断: {stats['disconnects']}  操作エラー: {stats['action_errors']}")
+    print(f"操作数: {stats['actions']}  ({stats['actions_per_sec']:.0f} 回/秒, {stats['elapsed']:.1f}秒)")
+    print(f"捨て牌の応答時間  p50: {stats['p50_ms']:.2f}ms  p99: {stats['p99_ms']:.2f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+import argparse
+import gc
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+# メモリ使用量の集計（多数の卓を動かす時に、1卓あたりの大きさと増え続けていないかを調べる）
+#   クラス別: gc が追跡しているこのプロジェクトのクラス（牌・プレイヤー・ウィジェットなど）の個数とバイト数
+#   モジュール別: tracemalloc のスナップショットから、確保した場所（ファイル）ごとのバイト数
+#   キャッシュ: 手牌評価・点数計算・牌画像のキャッシュの件数
+# ストレスモードでは多数の対局を続けて進め、定常状態と最大のメモリ量、対局あたりの増加量を出す
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_MODULES = {name[:-3] for name in os.listdir(PROJECT_DIR) if name.endswith(".py")}
+# プロジェクト外でも数えるクラス（GUIで画像を持つもの）
+EXTRA_CLASSES = {("PIL.ImageTk", "PhotoImage"), ("PIL.Image", "Image")}
+
+TRACE_FRAMES = 1
+WARMUP_GAMES = 20  # ストレスモードで計測の前に行う（記録しない）対局数
+
+def _object_size(obj) -> int:
+    """オブジェクト本体と属性辞書の大きさ（属性の先のオブジェクトは含めない）"""
+    size = sys.getsizeof(obj)
+    attributes = getattr(obj, "__dict__", None)
+    if isinstance(attributes, dict):
+        size += sys.getsizeof(attributes)
+    return size
+
+def class_census() -> dict:
+    """{クラス名: (個数, バイト数)}（gc が追跡しているオブジェクトのみ）"""
+    census = {}
+    for obj in gc.get_objects():
+        cls = type(obj)
+        module = cls.__module__
+        if module not in PROJECT_MODULES and (module, cls.__name__) not in EXTRA_CLASSES:
+            continue
+        name = cls.__name__ if module in PROJECT_MODULES else f"{module}.{cls.__name__}"
+        count, size = census.get(name, (0, 0))
+        census[name] = (count + 1, size + _object_size(obj))
+    return census
+
+def cache_sizes() -> dict:
+    """{キャッシュ名: 件数}（読み込まれているモジュールのキャッシュだけ）"""
+    sizes = {}
+    if "hand_cache" in sys.modules:
+        sizes["hand_cache"] = sys.modules["hand_cache"].get_shared_cache().get_stats()['size']
+    if "scoring" in sys.modules:
+        stats = sys.modules["scoring"].get_cache_stats()
+        sizes["score_cache"] = stats['size']
+        sizes["score_suit_patterns"] = stats['suit_patterns']
+    for module_name in ("multiplayer_gui", "gui"):
+        module = sys.modules.get(module_name)
+        if module is not None and hasattr(module, "TILE_IMAGES"):
+            sizes[f"{module_name}.tile_images"] = len(module.TILE_IMAGES)
+    return sizes
+
+def module_statistics(snapshot: tracemalloc.Snapshot, limit: int = 15) -> list:
+    """[(ファイル名, バイト数, 確保数)]（バイト数の多い順）"""
+    result = []
+    for stat in snapshot.statistics("filename")[:limit]:
+        filename = stat.traceback[0].filename
+        if filename.startswith(PROJECT_DIR):
+            filename = os.path.relpath(filename, PROJECT_DIR)
+        else:
+            filename = os.path.join(*filename.split(os.sep)[-2:])  # 同名のファイル（__init__.py など）を区別する
+        result.append((filename, stat.size, stat.count))
+    return result
+
+def take_snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ))
+
+def format_report(limit: int = 15) -> str:
+    """クラス別・キャッシュ・モジュール別（tracemalloc が動いている場合）の集計を文字列にする"""
+    gc.collect()
+    lines = ["クラス別 (個数 / バイト)"]
+    census = sorted(class_census().items(), key=lambda item: -item[1][1])
+    for name, (count, size) in census[:limit]:
+        lines.append(f"  {name:<28} {count:>8} {size:>12,}")
+    lines.append("キャッシュ (件数)")
+    for name, size in cache_sizes().items():
+        lines.append(f"  {name:<28} {size:>8}")
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        lines.append(f"tracemalloc: 現在 {current:,} バイト / 最大 {peak:,} バイト")
+        lines.append("確保した場所 (バイト / 確保数)")
+        for filename, size, count in module_statistics(take_snapshot(), limit):
+            lines.append(f"  {filename:<32} {size:>12,} {count:>8}")
+    return "\n".join(lines)
+
+def measure_table_cost(table_count: int = 100) -> int:
+    """
+    MultiPlayerGameState と GameController 1組を作った直後（配牌済み、手番は進めていない）のバイト数
+    最初の1組は共有キャッシュなど初回だけ作られるものを作るためのもので、数に入れない
+    """
+    from game_logic import MultiPlayerGameState, PlayerType
+    from game_controller import GameController
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(TRACE_FRAMES)
+    # 共有キャッシュなど初回だけ作られるものを先に作っておく
+    GameController(MultiPlayerGameState([PlayerType.HUMAN] + [PlayerType.CPU] * 3))
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    tables = []
+    for _ in range(table_count):
+        state = MultiPlayerGameState([PlayerType.HUMAN] + [PlayerType.CPU] * 3)
+        tables.append((state, GameController(state)))
+    gc.collect()
+    cost = (tracemalloc.get_traced_memory()[0] - before) // table_count
+    del tables
+    if started:
+        tracemalloc.stop()
+    return cost
+
+@dataclass
+class StressResult:
+    games: int
+    seconds: float
+    steady_bytes: int     # 標本の中央値
+    peak_bytes: int       # tracemalloc の最大値（準備の対局の後から）
+    growth_per_game: float  # 最初と最後の標本の差 / その間の対局数
+    samples: list         # [(対局数, バイト数)]
+    warmup_games: int = 0
+
+    def describe(self) -> str:
+        return (f"{self.games}局（準備 {self.warmup_games}局を除く） {self.seconds:.1f}秒: "
+                f"定常 {self.steady_bytes:,} バイト / 最大 {self.peak_bytes:,} バイト / "
+                f"1局あたりの増加 {self.growth_per_game:,.1f} バイト")
+
+def _play_cpu_game(difficulty: str):
+    from game_logic import MultiPlayerGameState, PlayerType
+    from game_controller import iter_game_events
+    from cpu_player import CPUPlayer
+    state = MultiPlayerGameState([PlayerType.CPU] * 4)
+    cpu_players = {player.player_id: CPUPlayer(difficulty) for player in state.players}
+    for _ in iter_game_events(state, cpu_players):
+        pass
+
+def _clear_bounded_caches():
+    """件数や牌の並びの種類で大きさに限りがあるキャッシュ（手牌評価・分解表・点数計算）を空にする"""
+    import hand_analysis
+    import scoring
+    from hand_cache import get_shared_cache
+    get_shared_cache().clear()
+    hand_analysis.clear_cache()
+    scoring.clear_cache()
+
+def _sample_memory() -> int:
+    """大きさに限りがあるキャッシュを除いた、追跡中のメモリ量"""
+    _clear_bounded_caches()
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+def run_stress(games: int = 500, sample_every: int = 25, difficulty: str = "normal",
+               warmup_games: int = WARMUP_GAMES) -> StressResult:
+    """
+    全員CPUの対局を続けて行い、一定の対局数ごとにメモリ量を記録する
+    先に warmup_games 局を行ってから計測を始める（0局目も標本にする）
+    大きさに限りがあり埋まっていくだけのキャッシュを増加に数えないよう、標本を取る時はキャッシュを空にする
+    （キャッシュの件数は format_report() で別に出す。ヒット数などの統計も0に戻る）
+    """
+    for _ in range(warmup_games):
+        _play_cpu_game(difficulty)
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(TRACE_FRAMES)
+    samples = [(0, _sample_memory())]
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    for game in range(1, games + 1):
+        _play_cpu_game(difficulty)
+        if game % sample_every == 0 or game == games:
+            samples.append((game, _sample_memory()))
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    if started:
+        tracemalloc.stop()
+
+    first_game, first_bytes = samples[0]
+    last_game, last_bytes = samples[-1]
+    growth = (last_bytes - first_bytes) / (last_game - first_game) if last_game > first_game else 0.0
+    return StressResult(games, seconds, int(statistics.median(size for _, size in samples)), peak, growth,
+                        samples, warmup_games)
+
+def main():
+    parser = argparse.ArgumentParser(description="メモリ使用量の集計")
+    parser.add_argument("--tables", type=int, default=100, help="1卓あたりの大きさを測る卓数")
+    parser.add_argument("--stress", type=int, default=0, help="続けて行う対局数（0ならストレスモードなし）")
+    parser.add_argument("--sample-every", type=int, default=25, help="メモリ量を記録する対局数の間隔")
+    parser.add_argument("--difficulty", default="normal", help="ストレスモードのCPUの強さ")
+    parser.add_argument("--warmup", type=int, default=WARMUP_GAMES, help="計測の前に行う（記録しない）対局数")
+    parser.add_argument("--max-table-bytes", type=int, default=None,
+                        help="1卓あたりのバイト数がこれを超えたら終了コード1にする")
+    parser.add_argument("--max-growth", type=float, default=None,
+                        help="1局あたりの増加量（バイト）がこれを超えたら終了コード1にする")
+    args = parser.parse_args()
+
+    tracemalloc.start(TRACE_FRAMES)
+    table_cost = measure_table_cost(args.tables)
+    print(f"1卓あたり（状態 + コントローラー）: {table_cost:,} バイト")
+    exit_code = 0
+    if args.max_table_bytes is not None and table_cost > args.max_table_bytes:
+        print(f"1卓あたりのバイト数が上限（{args.max_table_bytes:,} バイト）を超えています")
+        exit_code = 1
+    if args.stress > 0:
+        result = run_stress(args.stress, args.sample_every, args.difficulty, args.warmup)
+        print(result.describe())
+        if args.max_growth is not None and result.growth_per_game > args.max_growth:
+            print(f"1局あたりの増加量が上限（{args.max_growth:,.0f} バイト）を超えています")
+            exit_code = 1
+    print(format_report())
+    sys.exit(exit_code)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+# 長時間の対局シミュレーション・サーバー用のメトリクス
+# 記録側はカウンタの加算だけを行い、集計や文字列化は出力時（HTTP要求・ファイル書き出し）にまとめて行う
+# 出力は Prometheus のテキスト形式
+
+# 思考時間のヒストグラムの区切り（秒）
+LATENCY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+def _format_labels(labels: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class _CounterValue:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self.value += amount
+
+class Counter:
+    """単調増加するカウンタ（ラベルごとの値は labels() で取得して保持しておく）"""
+    def __init__(self, name: str, help_text: str, label_names: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._children = {}
+        self._lock = threading.Lock()
+        self._default = self.labels() if not label_names else None
+
+    def labels(self, **labels) -> _CounterValue:
+        key = tuple((name, str(labels[name])) for name in self.label_names)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = _CounterValue()
+            return child
+
+    def inc(self, amount: int = 1):
+        self._default.inc(amount)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            children = list(self._children.items())
+        for key, child in children:
+            lines.append(f"{self.name}{_format_labels(key)} {child.value}")
+        return lines
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最後は +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+class Histogram:
+    """値の分布（バケットごとの件数）"""
+    def __init__(self, name: str, help_text: str, label_names: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels) -> _HistogramValue:
+        key = tuple((name, str(labels[name])) for name in self.label_names)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = _HistogramValue(self.buckets)
+            return child
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            children = list(self._children.items())
+        for key, child in children:
+            with child._lock:
+                counts = list(child.counts)
+                total, count = child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+class Registry:
+    """メトリクスの登録先。collector は出力時に呼ばれ、その時点の値を返す"""
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []  # [(collector, 種類)]
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable, metric_type: str = "gauge"):
+        """
+        collector() -> [(名前, 説明, ラベルのdict, 値), ...]
+        metric_type: 単調増加する値は "counter"（名前は _total で終える）、それ以外は "gauge"
+        """
+        self.collectors.append((collector, metric_type))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        described = set()
+        for collector, metric_type in self.collectors:
+            try:
+                samples = collector()
+            except Exception as e:
+                print(f"メトリクス収集エラー: {e}")
+                continue
+            for name, help_text, labels, value in samples:
+                if name not in described:
+                    described.add(name)
+                    lines.append(f"# HELP {name} {help_text}")
+                    lines.append(f"# TYPE {name} {metric_type}")
+                lines.append(f"{name}{_format_labels(tuple(labels.items()))} {value}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+GAMES_COMPLETED = REGISTRY.register(Counter("donjara_games_completed_total", "終局した対局数"))
+TURNS = REGISTRY.register(Counter("donjara_turns_total", "進行した手番数"))
+DECISION_LATENCY = REGISTRY.register(Histogram(
+    "donjara_cpu_decision_seconds", "CPUの捨て牌選択にかかった時間", ("difficulty",)))
+REDRAWS = REGISTRY.register(Counter("donjara_gui_redraws_total", "GUIの再描画回数", ("scope",)))
+
+# 手番数/秒を計算する期間（秒）と、記録する標本の最小間隔（秒）
+TURN_RATE_WINDOW = 60.0
+TURN_SAMPLE_INTERVAL = 1.0
+
+_turn_samples = deque([(time.monotonic(), 0)])  # [(時刻, 手番数の累計)]
+_turn_samples_lock = threading.Lock()
+
+def _collect_turn_rate() -> list:
+    """
+    直近 TURN_RATE_WINDOW 秒の手番数/秒
+    手番数の累計の標本から計算するので、出力先（HTTP・ファイル）が複数あっても互いの値を変えない
+    """
+    now, turns = time.monotonic(), TURNS.labels().value
+    with _turn_samples_lock:
+        if now - _turn_samples[-1][0] >= TURN_SAMPLE_INTERVAL:
+            _turn_samples.append((now, turns))
+        # 期間より前の標本は、期間の始まりの直前の1つだけ残す
+        while len(_turn_samples) > 1 and _turn_samples[1][0] <= now - TURN_RATE_WINDOW:
+            _turn_samples.popleft()
+        start_time, start_turns = _turn_samples[0]
+    rate = (turns - start_turns) / (now - start_time) if now > start_time else 0.0
+    return [("donjara_turns_per_second", f"直近{TURN_RATE_WINDOW:.0f}秒の手番数/秒", {}, round(rate, 3))]
+
+def _collect_hand_cache_totals() -> list:
+    from hand_cache import get_shared_cache
+    stats = get_shared_cache().get_stats()
+    return [
+        ("donjara_hand_cache_hits_total", "手牌評価キャッシュのヒット数", {}, stats['hits']),
+        ("donjara_hand_cache_misses_total", "手牌評価キャッシュのミス数", {}, stats['misses'])
+    ]
+
+def _collect_hand_cache() -> list:
+    from hand_cache import get_shared_cache
+    stats = get_shared_cache().get_stats()
+    return [
+        ("donjara_hand_cache_size", "手牌評価キャッシュの件数", {}, stats['size']),
+        ("donjara_hand_cache_hit_rate", "手牌評価キャッシュのヒット率", {}, round(stats['hit_rate'], 4))
+    ]
+
+def _collect_score_cache() -> list:
+    from scoring import get_cache_stats
+    stats = get_cache_stats()
+    return [
+        ("donjara_score_cache_size", "点数計算キャッシュの件数", {}, stats['size']),
+        ("donjara_score_cache_hit_rate", "点数計算キャッシュのヒット率", {}, round(stats['hit_rate'], 4))
+    ]
+
+def _collect_memory() -> list:
+    """tracemalloc が動いている場合だけ、追跡中のメモリ量を出す"""
+    import tracemalloc
+    if not tracemalloc.is_tracing():
+        return []
+    current, peak = tracemalloc.get_traced_memory()
+    return [
+        ("donjara_memory_traced_bytes", "tracemalloc で追跡中のメモリ量", {}, current),
+        ("donjara_memory_traced_peak_bytes", "tracemalloc で追跡したメモリ量の最大値", {}, peak)
+    ]
+
+REGISTRY.add_collector(_collect_turn_rate)
+REGISTRY.add_collector(_collect_hand_cache_totals, "counter")
+REGISTRY.add_collector(_collect_hand_cache)
+REGISTRY.add_collector(_collect_score_cache)
+REGISTRY.add_collector(_collect_memory)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # アクセスログは出さない
+
+def start_http_server(port: int, host: str = "127.0.0.1",
+                      registry: Registry = REGISTRY) -> Optional[ThreadingHTTPServer]:
+    """/metrics を返すHTTPサーバーをバックグラウンドで起動する"""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    try:
+        server = ThreadingHTTPServer((host, port), handler)
+    except OSError as e:
+        print(f"メトリクスサーバーの起動に失敗しました: {e}")
+        return None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"メトリクス: http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+class FileExporter:
+    """一定間隔でメトリクスをファイルに書き出す（一時ファイルに書いてから置き換える）"""
+    def __init__(self, path: str, interval: float = 5.0, registry: Registry = REGISTRY):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """停止し、最後の値を書き出す"""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.write()
+
+    def write(self):
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(self.registry.render())
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"メトリクスの書き出しに失敗しました: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+def add_arguments(parser):
+    """コマンドライン引数（--metrics-port, --metrics-file）を追加する"""
+    parser.add_argument("--metrics-port", type=int, default=None, help="メトリクスを公開するHTTPポート")
+    parser.add_argument("--metrics-file", default=None, help="メトリクスを定期的に書き出すファイル")
+
+def start_from_args(args) -> Optional[FileExporter]:
+    """add_arguments で追加した引数に従って出力を開始する（戻り値は終了時に stop() する）"""
+    if args.metrics_port is not None:
+        start_http_server(args.metrics_port)
+    if args.metrics_file:
+        exporter = FileExporter(args.metrics_file)
+        exporter.start()
+        return exporter
+    return None
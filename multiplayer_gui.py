@@ -1,12 +1,30 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from PIL import Image, ImageTk
-import os
+import queue
 from typing import List, Optional, Callable
-from tile import Tile, TileType
-from game_logic import MultiPlayerGameState, PlayerType
+from tile import Tile, TileType, kind_name
+from game_logic import MultiPlayerGameState, PlayerType, ClaimType
 from game_controller import GameController
 from settings import Settings
+from hand_cache import get_shared_cache
+from cpu_player import CPUPlayer
+from analysis_worker import AnalysisWorker
+from game_snapshot import save_game, load_game
+from replay import GameRecorder, save_record, load_record
+from asset_watcher import TileAssets, AssetWatcher, TileImageCache
+import metrics
+import memory_report
+from game_events import (GameStartEvent, DrawEvent, DiscardEvent, TurnChangeEvent, GameOverEvent,
+                         ClaimEvent, ClaimOfferEvent)
+
+# 鳴きボタンの表示名
+CLAIM_LABELS = {ClaimType.RON: "ロン", ClaimType.PON: "ポン", ClaimType.CHI: "チー"}
+
+# 再描画回数（全体の再描画と手牌の並べ直し）
+FULL_REDRAWS = metrics.REDRAWS.labels(scope="full")
+HAND_REDRAWS = metrics.REDRAWS.labels(scope="hand")
+
+TILE_IMAGES = TileImageCache((25, 35))
 
 class TileWidget:
     def __init__(self, parent, tile: Optional[Tile] = None, click_callback: Optional[Callable] = None, face_down: bool = False):
@@ -29,11 +47,8 @@ class TileWidget:
             return
         
         try:
-            image_path = self.tile.get_image_path()
-            if os.path.exists(image_path):
-                img = Image.open(image_path)
-                img = img.resize((25, 35), Image.Resampling.LANCZOS)
-                self.photo = ImageTk.PhotoImage(img)
+            self.photo = TILE_IMAGES.get(self.tile.kind)
+            if self.photo is not None:
                 self.label.config(image=self.photo)
             else:
                 self.label.config(text=str(self.tile), font=("Arial", 6))
@@ -50,6 +65,13 @@ class PlayerAreaWidget:
         self.hand_widgets = []
         self.discarded_widgets = []
         
+        # 待ち牌ヒント（手牌の状態ごとにキャッシュ）
+        self.wait_cache = get_shared_cache()
+        self.hint_key = None
+        self.hint_text = ""
+        self.discard_previews = {}
+        self.remaining_counts = None
+        
         self.create_widgets()
     
     def create_widgets(self):
@@ -57,11 +79,22 @@ class PlayerAreaWidget:
         self.name_label = tk.Label(self.frame, text="", font=("Arial", 9, "bold"))
         self.name_label.pack(pady=2)
         
+        # 鳴いた面子
+        self.meld_label = tk.Label(self.frame, text="", font=("Arial", 8), fg="purple")
+        self.meld_label.pack()
+        
         # 手牌エリア
         if self.position == "bottom":
             # 人間プレイヤー: 手牌を詳細表示
             self.hand_frame = tk.Frame(self.frame)
             self.hand_frame.pack(pady=5)
+            
+            # 待ち牌ヒント
+            self.hint_label = tk.Label(self.frame, text="", font=("Arial", 9), fg="darkgreen")
+            self.hint_label.pack()
+            
+            # 鳴きの確認ボタン（鳴ける時だけ表示）
+            self.claim_frame = tk.Frame(self.frame)
         else:
             # CPU: 手牌数のみ表示
             self.hand_info_frame = tk.Frame(self.frame)
@@ -107,20 +140,54 @@ class PlayerAreaWidget:
         canvas.pack(side="left" if self.position in ["left", "right"] else "top", fill="both", expand=True)
         scrollbar.pack(side="right" if self.position in ["left", "right"] else "bottom", fill="y" if self.position in ["left", "right"] else "x")
     
-    def update_display(self, player, is_current: bool, click_callback=None):
+    def update_display(self, player, is_current: bool, click_callback=None, remaining_counts=None):
         # 名前とターン表示
-        name_text = player.name
-        if is_current:
-            name_text += " ◄"
-        self.name_label.config(text=name_text, fg="red" if is_current else "black")
+        self.update_name(player, is_current)
+        self.update_melds(player)
         
         # 手牌更新
         self.update_hand_display(player, click_callback)
         
+        # 待ち牌ヒント更新
+        if self.position == "bottom":
+            self.update_wait_hint(player, remaining_counts)
+        
         # 捨て牌更新
         self.update_discarded_display(player)
     
+    def update_name(self, player, is_current: bool):
+        name_text = player.name
+        if is_current:
+            name_text += " ◄"
+        self.name_label.config(text=name_text, fg="red" if is_current else "black")
+    
+    def update_melds(self, player):
+        self.meld_label.config(text=" ".join(str(meld) for meld in player.melds))
+    
+    def show_claim_options(self, kind: int, options: list, callback: Callable):
+        """鳴きの確認ボタンを表示する（callback(ClaimType or None)）"""
+        self.hide_claim_options()
+        tk.Label(self.claim_frame, text=f"{kind_name(kind)}を", font=("Arial", 9)).pack(side="left")
+        for claim_type in options:
+            tk.Button(self.claim_frame, text=CLAIM_LABELS[claim_type],
+                      command=lambda c=claim_type: callback(c)).pack(side="left", padx=2)
+        tk.Button(self.claim_frame, text="スキップ", command=lambda: callback(None)).pack(side="left", padx=2)
+        self.claim_frame.pack(after=self.hint_label, pady=2)
+    
+    def show_tsumo_option(self, callback: Callable):
+        """ツモ和了の確認ボタンを表示する（スキップすると捨て牌を選べる）"""
+        self.hide_claim_options()
+        tk.Button(self.claim_frame, text="ツモ", command=callback).pack(side="left", padx=2)
+        tk.Button(self.claim_frame, text="スキップ", command=self.hide_claim_options).pack(side="left", padx=2)
+        self.claim_frame.pack(after=self.hint_label, pady=2)
+    
+    def hide_claim_options(self):
+        for widget in self.claim_frame.winfo_children():
+            widget.destroy()
+        self.claim_frame.pack_forget()
+    
     def update_hand_display(self, player, click_callback=None):
+        HAND_REDRAWS.inc()
         # 既存ウィジェット削除
         for widget in self.hand_widgets:
             widget.frame.destroy()
@@ -129,12 +196,10 @@ class PlayerAreaWidget:
         if self.position == "bottom":
             # 人間プレイヤー: 手牌を詳細表示
             for i, tile in enumerate(player.hand):
-                custom_path = self.settings.get_custom_image(tile.tile_type, tile.number)
-                if custom_path:
-                    tile.image_path = custom_path
-                
                 widget = TileWidget(self.hand_frame, tile, click_callback, face_down=False)
                 widget.frame.grid(row=0, column=i, padx=1, pady=1)
+                widget.label.bind("<Enter>", lambda e, kind=tile.kind: self.show_discard_preview(kind))
+                widget.label.bind("<Leave>", lambda e: self.hint_label.config(text=self.hint_text))
                 self.hand_widgets.append(widget)
         else:
             # CPU: 手牌数と裏向き表示
@@ -150,6 +215,41 @@ class PlayerAreaWidget:
                     widget.frame.grid(row=0, column=i, padx=1, pady=1)
                 self.hand_widgets.append(widget)
     
+    def update_wait_hint(self, player, remaining_counts=None):
+        """聴牌時の待ち牌と、捨て牌ごとの待ち牌プレビューを更新する"""
+        counts = player.hand.kind_counts()
+        melds = len(player.melds)
+        key = (tuple(counts), melds, tuple(remaining_counts) if remaining_counts else None)
+        if key != self.hint_key:
+            self.hint_key = key
+            self.discard_previews = {}
+            if len(player.hand) % 3 == 1:
+                waits = self.wait_cache.waits(counts, melds)
+                self.hint_text = f"待ち: {self.format_waits(waits, remaining_counts)}" if waits else ""
+            else:
+                self.discard_previews = self.wait_cache.discard_waits(counts, melds)
+                if self.discard_previews:
+                    discards = "・".join(kind_name(kind) for kind in self.discard_previews)
+                    self.hint_text = f"聴牌になる捨て牌: {discards}"
+                else:
+                    self.hint_text = ""
+            self.remaining_counts = remaining_counts
+        self.hint_label.config(text=self.hint_text)
+    
+    def show_discard_preview(self, kind: int):
+        """手牌にマウスを乗せた時、その牌を捨てた場合の待ちを表示する"""
+        waits = self.discard_previews.get(kind)
+        if waits:
+            text = f"{kind_name(kind)}を切ると → 待ち: {self.format_waits(waits, self.remaining_counts)}"
+            self.hint_label.config(text=text)
+    
+    def format_waits(self, waits: list[int], remaining_counts=None) -> str:
+        if remaining_counts is None:
+            return " ".join(kind_name(kind) for kind in waits)
+        total = sum(remaining_counts[kind] for kind in waits)
+        tiles = " ".join(f"{kind_name(kind)}({remaining_counts[kind]}枚)" for kind in waits)
+        return f"{tiles} 残り{total}枚"
+    
     def update_discarded_display(self, player):
         # 既存ウィジェット削除
         for widget in self.discarded_widgets:
@@ -159,13 +259,20 @@ class PlayerAreaWidget:
         # 捨て牌表示
         cols = 4 if self.position in ["left", "right"] else 8
         for i, tile in enumerate(player.discarded):
-            custom_path = self.settings.get_custom_image(tile.tile_type, tile.number)
-            if custom_path:
-                tile.image_path = custom_path
-            
             widget = TileWidget(self.discarded_frame, tile, face_down=False)
             widget.frame.grid(row=i // cols, column=i % cols, padx=1, pady=1)
             self.discarded_widgets.append(widget)
+    
+    def append_discarded_tile(self, tile: Tile):
+        """捨て牌を1枚だけ追加表示する（全体を作り直さない）"""
+        cols = 4 if self.position in ["left", "right"] else 8
+        i = len(self.discarded_widgets)
+        widget = TileWidget(self.discarded_frame, tile, face_down=False)
+        widget.frame.grid(row=i // cols, column=i % cols, padx=1, pady=1)
+        self.discarded_widgets.append(widget)
+
+# ゲームイベントを確認する間隔（ミリ秒）
+EVENT_POLL_INTERVAL = 30
 
 class MultiPlayerMahjongGUI:
     def __init__(self):
@@ -176,13 +283,34 @@ class MultiPlayerMahjongGUI:
         
         self.game_state = MultiPlayerGameState()
         self.settings = Settings()
-        self.controller = GameController(self.game_state, self.update_display)
+        self.controller = GameController(self.game_state)
+        
+        # 牌画像・設定ファイルの変更は別スレッドで確認し、変わった牌種だけ画像を読み直す
+        self.assets = TileAssets(self.settings)
+        TILE_IMAGES.bind(self.assets)
+        self.asset_watcher = AssetWatcher(self.settings, self.assets)
+        self.asset_watcher.start()
         
         self.player_areas = {}
         
+        # ゲームのイベントはコントローラーのスレッドから届くため、キュー経由でメインスレッドで処理する
+        self.event_queue = queue.Queue()
+        self.game_state.events.subscribe(self.event_queue.put)
+        
+        # おすすめ捨て牌の解析（バックグラウンド）
+        self.advisor = CPUPlayer("hard")
+        self.analysis_worker = AnalysisWorker(self.root, self.analyze_hand, self.show_analysis_result)
+        
+        # 牌譜の記録と再生（再生中は replay_record に再生中の牌譜が入る）
+        self.recorder = GameRecorder(self.game_state)
+        self.replay_record = None
+        self.replay_state = None
+        self.replay_positions = []
+        
         self.create_menu()
         self.create_main_layout()
         self.update_display()
+        self.root.after(EVENT_POLL_INTERVAL, self.poll_events)
         
         # 自動進行開始
         self.controller.start_auto_play()
@@ -194,6 +322,11 @@ class MultiPlayerMahjongGUI:
         game_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="ゲーム", menu=game_menu)
         game_menu.add_command(label="新しいゲーム", command=self.new_game)
+        game_menu.add_command(label="ゲームを保存", command=self.save_game)
+        game_menu.add_command(label="ゲームを読み込み", command=self.load_game)
+        game_menu.add_separator()
+        game_menu.add_command(label="牌譜を保存", command=self.save_record)
+        game_menu.add_command(label="牌譜を再生", command=self.open_replay)
         game_menu.add_separator()
         game_menu.add_command(label="自動進行 開始/停止", command=self.toggle_auto_play)
         game_menu.add_separator()
@@ -202,7 +335,9 @@ class MultiPlayerMahjongGUI:
         settings_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="設定", menu=settings_menu)
         settings_menu.add_command(label="画像設定", command=self.open_image_settings)
-        settings_menu.add_command(label="CPU速度設定", command=self.open_speed_settings)
+        settings_menu.add_command(label="CPU設定", command=self.open_speed_settings)
+        settings_menu.add_separator()
+        settings_menu.add_command(label="メモリ使用量", command=self.show_memory_report)
     
     def create_main_layout(self):
         # メイン情報表示
@@ -215,6 +350,20 @@ class MultiPlayerMahjongGUI:
         self.status_label = tk.Label(info_frame, text="", font=("Arial", 9))
         self.status_label.pack(side="right")
         
+        # 牌譜の再生操作（再生中だけ表示）
+        self.replay_frame = tk.Frame(self.root)
+        tk.Button(self.replay_frame, text="◀", command=lambda: self.step_replay(-1)).pack(side="left", padx=2)
+        self.replay_var = tk.IntVar(value=0)
+        self.replay_scale = tk.Scale(self.replay_frame, from_=0, to=0, orient="horizontal", length=500,
+                                     variable=self.replay_var, showvalue=False,
+                                     command=lambda value: self.show_replay_turn(int(float(value))))
+        self.replay_scale.pack(side="left", padx=5)
+        tk.Button(self.replay_frame, text="▶", command=lambda: self.step_replay(1)).pack(side="left", padx=2)
+        self.replay_label = tk.Label(self.replay_frame, text="", font=("Arial", 9))
+        self.replay_label.pack(side="left", padx=5)
+        tk.Button(self.replay_frame, text="再生終了", command=self.end_replay).pack(side="right", padx=5)
+        self.replay_anchor = info_frame
+        
         # 4人配置のメインエリア
         main_frame = tk.Frame(self.root)
         main_frame.pack(fill="both", expand=True, padx=3, pady=3)
@@ -247,6 +396,9 @@ class MultiPlayerMahjongGUI:
         self.turn_label = tk.Label(mountain_frame, text="", font=("Arial", 11), fg="blue")
         self.turn_label.pack(pady=3)
         
+        self.suggest_label = tk.Label(mountain_frame, text="", font=("Arial", 9), fg="darkgreen")
+        self.suggest_label.pack(pady=3)
+        
         # 右: CPU1  
         self.player_areas[1] = PlayerAreaWidget(center_frame, 1, "right", self.settings)
         self.player_areas[1].frame.pack(side="right", fill="y", padx=(2, 0))
@@ -256,55 +408,313 @@ class MultiPlayerMahjongGUI:
         self.player_areas[0].frame.pack(side="bottom", fill="x", pady=2)
     
     def update_display(self):
+        """画面全体を更新する（イベントで差分更新できない時に使用）"""
+        FULL_REDRAWS.inc()
         # ゲーム情報更新
-        status = self.controller.get_game_status()
-        self.info_label.config(text=f"山: {status['mountain_count']}枚")
-        
-        auto_status = "自動進行中" if status['auto_play_active'] else "一時停止"
-        self.status_label.config(text=auto_status)
-        
-        self.mountain_label.config(text=f"残り {status['mountain_count']}枚")
-        self.turn_label.config(text=f"現在: {status['current_player_name']}")
+        status = self.update_info()
         
         # 各プレイヤーエリア更新
         for i in range(4):
             player = self.game_state.players[i]
             is_current = (i == self.game_state.current_player)
             click_callback = self.on_tile_click if i == 0 else None
+            remaining = self.game_state.get_remaining_counts(i) if i == 0 else None
             
-            self.player_areas[i].update_display(player, is_current, click_callback)
+            self.player_areas[i].update_display(player, is_current, click_callback, remaining)
+        
+        self.request_analysis()
         
         # 人間プレイヤーのターンの場合、自動ツモ実行
         if status['is_human_turn']:
             self.controller.process_human_turn()
     
+    def update_info(self) -> dict:
+        """山の枚数・手番などの情報表示を更新する"""
+        status = self.controller.get_game_status()
+        self.info_label.config(text=f"山: {status['mountain_count']}枚")
+        
+        if self.game_state.is_game_over():
+            auto_status = self.format_result(self.game_state)
+        else:
+            auto_status = "自動進行中" if status['auto_play_active'] else "一時停止"
+        self.status_label.config(text=auto_status)
+        
+        self.mountain_label.config(text=f"残り {status['mountain_count']}枚")
+        self.turn_label.config(text=f"現在: {status['current_player_name']}")
+        return status
+    
+    def format_result(self, state) -> str:
+        """終局時の表示（和了者と役・点数、または流局）"""
+        if state.winner < 0:
+            return "流局"
+        win_type = "ツモ" if state.win_from < 0 else "ロン"
+        text = f"{state.players[state.winner].name} {win_type}和了"
+        if state.win_score is not None:
+            text += f" {state.win_score.describe()}"
+        return text
+    
+    def request_analysis(self):
+        """捨て牌できる時だけおすすめを解析（古い結果は版番号で破棄される）"""
+        human_player = self.game_state.get_human_player()
+        if self.controller.is_human_turn() and human_player.can_discard():
+            request = (human_player.hand.kind_counts(), list(self.game_state.get_remaining_counts(0)),
+                       len(human_player.melds))
+            self.analysis_worker.submit(self.game_state.state_version, request)
+        else:
+            self.analysis_worker.cancel()
+            self.suggest_label.config(text="")
+    
+    def poll_events(self):
+        """届いたゲームイベントをまとめて処理する"""
+        try:
+            while True:
+                self.handle_event(self.event_queue.get_nowait())
+        except queue.Empty:
+            pass
+        changed = self.asset_watcher.take_changes()
+        if changed:
+            self.refresh_tile_images(changed)
+        self.root.after(EVENT_POLL_INTERVAL, self.poll_events)
+    
+    def refresh_tile_images(self, kinds):
+        """画像が変わった牌種のキャッシュだけを消して、1回だけ描き直す"""
+        TILE_IMAGES.invalidate(kinds)
+        if self.replay_record is not None:
+            self.show_replay_turn(self.replay_var.get())
+        else:
+            self.update_display()
+    
+    def apply_image_settings(self):
+        """画像設定の変更をすぐ反映する（監視スレッドの確認を待たない）"""
+        self.asset_watcher.poll()
+        changed = self.asset_watcher.take_changes()
+        if changed:
+            self.refresh_tile_images(changed)
+    
+    def handle_event(self, event):
+        """イベントに関係する部分だけを更新する"""
+        if self.replay_record is not None:
+            return  # 再生中は対局の表示を更新しない（再生終了時に全体を描き直す）
+        if isinstance(event, GameStartEvent):
+            self.update_display()
+            return
+        
+        if isinstance(event, DrawEvent):
+            player = self.game_state.players[event.player_id]
+            area = self.player_areas[event.player_id]
+            area.update_hand_display(player, self.on_tile_click if event.player_id == 0 else None)
+            if event.player_id == 0 and self.controller.can_human_tsumo():
+                area.show_tsumo_option(self.on_tsumo_click)
+        elif isinstance(event, DiscardEvent):
+            if event.player_id == 0:
+                self.player_areas[0].hide_claim_options()
+            player = self.game_state.players[event.player_id]
+            area = self.player_areas[event.player_id]
+            area.update_hand_display(player, self.on_tile_click if event.player_id == 0 else None)
+            if player.discarded:
+                area.append_discarded_tile(player.discarded[-1])
+        elif isinstance(event, TurnChangeEvent):
+            self.player_areas[0].hide_claim_options()
+            for player_id in (event.previous_player, event.current_player):
+                self.player_areas[player_id].update_name(
+                    self.game_state.players[player_id], player_id == self.game_state.current_player
+                )
+            # 人間プレイヤーのターンになったら自動ツモ
+            if self.controller.is_human_turn() and not self.game_state.is_game_over():
+                self.controller.process_human_turn()
+        elif isinstance(event, ClaimOfferEvent):
+            if event.player_id == 0:
+                options = [ClaimType(value) for value in event.options]
+                self.player_areas[0].show_claim_options(event.kind, options, self.on_claim_click)
+            return
+        elif isinstance(event, ClaimEvent):
+            # 鳴いた人の手牌・面子と、鳴かれた人の捨て牌を描き直す
+            self.player_areas[0].hide_claim_options()
+            claimer = self.game_state.players[event.player_id]
+            area = self.player_areas[event.player_id]
+            area.update_hand_display(claimer, self.on_tile_click if event.player_id == 0 else None)
+            area.update_melds(claimer)
+            self.player_areas[event.from_player].update_discarded_display(self.game_state.players[event.from_player])
+        elif isinstance(event, GameOverEvent):
+            self.player_areas[0].hide_claim_options()
+            self.analysis_worker.cancel()
+        
+        self.update_info()
+        
+        # 他家のツモは人間プレイヤーから見える情報を変えない
+        if isinstance(event, DrawEvent) and event.player_id != 0:
+            return
+        self.player_areas[0].update_wait_hint(self.game_state.get_human_player(), self.game_state.get_remaining_counts(0))
+        self.request_analysis()
+    
+    def analyze_hand(self, request, is_cancelled) -> list[dict]:
+        """おすすめ捨て牌を求める（ワーカースレッドで実行）"""
+        counts, remaining, melds = request
+        return self.advisor.rank_discards(counts, remaining, melds, is_cancelled=is_cancelled)[:3]
+    
+    def show_analysis_result(self, version: int, ranking: list[dict]):
+        """解析結果を表示する（メインスレッドで実行）"""
+        if version != self.game_state.state_version or not ranking:
+            return
+        lines = [f"{kind_name(r['kind'])} (向聴{r['shanten']} / 受入{r['ukeire']}枚)" for r in ranking]
+        self.suggest_label.config(text="おすすめ:\n" + "\n".join(lines))
+    
     def on_tile_click(self, tile: Tile):
         if self.controller.can_human_discard():
             if self.controller.human_discard_tile_by_object(tile):
-                pass  # update_display は controller から自動呼び出される
+                pass  # 表示はイベント経由で更新される
         else:
             if self.controller.is_human_turn():
                 messagebox.showwarning("警告", "まずツモを行ってください")
             else:
                 messagebox.showwarning("警告", "あなたのターンではありません")
     
+    def on_tsumo_click(self):
+        self.player_areas[0].hide_claim_options()
+        self.controller.human_tsumo()
+    
+    def on_claim_click(self, claim_type: Optional[ClaimType]):
+        self.player_areas[0].hide_claim_options()
+        self.controller.human_claim(claim_type)
+    
     def new_game(self):
+        self.close_replay()
+        self.analysis_worker.cancel()
         self.controller.stop_auto_play()
         self.game_state.reset_game()
-        self.controller = GameController(self.game_state, self.update_display)
-        self.update_display()
+        self.recreate_controller()
         self.controller.start_auto_play()
         messagebox.showinfo("情報", "新しいゲームを開始しました")
     
+    def save_game(self):
+        file_path = filedialog.asksaveasfilename(
+            title="ゲームを保存",
+            defaultextension=".djs",
+            filetypes=[("Donjaraセーブデータ", "*.djs"), ("すべてのファイル", "*.*")]
+        )
+        if file_path:
+            if save_game(self.game_state, file_path):
+                messagebox.showinfo("情報", "ゲームを保存しました")
+            else:
+                messagebox.showerror("エラー", "ゲームの保存に失敗しました")
+    
+    def load_game(self):
+        file_path = filedialog.askopenfilename(
+            title="ゲームを読み込み",
+            filetypes=[("Donjaraセーブデータ", "*.djs"), ("すべてのファイル", "*.*")]
+        )
+        if not file_path:
+            return
+        
+        self.close_replay()
+        self.analysis_worker.cancel()
+        self.controller.stop_auto_play()
+        if not load_game(self.game_state, file_path):
+            messagebox.showerror("エラー", "ゲームの読み込みに失敗しました")
+        self.recreate_controller()
+        self.controller.start_auto_play()
+    
+    def save_record(self):
+        file_path = filedialog.asksaveasfilename(
+            title="牌譜を保存",
+            defaultextension=".djr",
+            filetypes=[("Donjara牌譜", "*.djr"), ("すべてのファイル", "*.*")]
+        )
+        if not file_path:
+            return
+        
+        if save_record(self.recorder.record, file_path):
+            messagebox.showinfo("情報", "牌譜を保存しました")
+        else:
+            messagebox.showerror("エラー", "牌譜の保存に失敗しました")
+    
+    def open_replay(self):
+        file_path = filedialog.askopenfilename(
+            title="牌譜を再生",
+            filetypes=[("Donjara牌譜", "*.djr"), ("すべてのファイル", "*.*")]
+        )
+        if not file_path:
+            return
+        
+        record = load_record(file_path)
+        if record is None:
+            messagebox.showerror("エラー", "牌譜の読み込みに失敗しました")
+            return
+        self.start_replay(record)
+    
+    def start_replay(self, record):
+        """牌譜の再生を始める（対局は一時停止し、再生終了で再開する）"""
+        self.analysis_worker.cancel()
+        self.controller.stop_auto_play()
+        self.player_areas[0].hide_claim_options()
+        self.replay_record = record
+        self.replay_positions = record.turn_positions()
+        self.replay_state = MultiPlayerGameState()
+        self.replay_scale.config(to=len(self.replay_positions) - 1)
+        self.replay_var.set(0)
+        self.replay_frame.pack(after=self.replay_anchor, fill="x", padx=10)
+        self.show_replay_turn(0)
+    
+    def show_replay_turn(self, turn: int):
+        """指定した手番の状態を表示する（直前のキーフレームから復元するので何手目でもすぐ表示できる）"""
+        if self.replay_record is None:
+            return
+        turn = max(0, min(turn, len(self.replay_positions) - 1))
+        self.replay_record.snapshot_at(self.replay_positions[turn]).restore(self.replay_state)
+        state = self.replay_state
+        for i in range(4):
+            self.player_areas[i].update_display(state.players[i], i == state.current_player)
+        
+        self.info_label.config(text=f"山: {state.get_mountain_count()}枚")
+        self.mountain_label.config(text=f"残り {state.get_mountain_count()}枚")
+        self.turn_label.config(text=f"現在: {state.get_current_player().name}")
+        self.suggest_label.config(text="")
+        self.status_label.config(text=self.format_result(state) if state.is_game_over() else "牌譜再生中")
+        self.replay_label.config(text=f"{turn} / {len(self.replay_positions) - 1}")
+    
+    def step_replay(self, step: int):
+        turn = max(0, min(self.replay_var.get() + step, len(self.replay_positions) - 1))
+        self.replay_var.set(turn)
+        self.show_replay_turn(turn)
+    
+    def close_replay(self):
+        """再生を終える（表示は戻さない）"""
+        if self.replay_record is None:
+            return
+        self.replay_record = None
+        self.replay_state = None
+        self.replay_positions = []
+        self.replay_frame.pack_forget()
+    
+    def end_replay(self):
+        """再生を終えて対局の表示に戻り、自動進行を再開する"""
+        self.close_replay()
+        self.update_display()
+        self.controller.start_auto_play()
+    
+    def recreate_controller(self):
+        """CPU速度・強さの設定を引き継いでコントローラーを作り直す"""
+        turn_delay = self.controller.turn_delay
+        difficulty = self.controller.get_cpu_difficulty()
+        self.controller = GameController(self.game_state)
+        self.controller.set_turn_delay(turn_delay)
+        self.controller.set_cpu_difficulty(difficulty)
+    
     def toggle_auto_play(self):
+        if self.replay_record is not None:
+            return
         if self.controller.auto_play_active:
             self.controller.stop_auto_play()
         else:
             self.controller.start_auto_play()
     
+    def show_memory_report(self):
+        """ウィジェット・牌画像などのメモリ使用量を表示"""
+        messagebox.showinfo("メモリ使用量", memory_report.format_report(limit=10))
+    
     def open_image_settings(self):
         from gui import ImageSettingsWindow
-        ImageSettingsWindow(self.root, self.settings, self.update_display)
+        ImageSettingsWindow(self.root, self.settings, self.apply_image_settings)
     
     def open_speed_settings(self):
         SpeedSettingsWindow(self.root, self.controller)
@@ -314,7 +724,11 @@ class MultiPlayerMahjongGUI:
         self.root.mainloop()
     
     def on_closing(self):
+        self.recorder.close()
+        self.asset_watcher.stop()
+        self.analysis_worker.stop()
         self.controller.stop_auto_play()
+        self.settings.flush()
         self.root.destroy()
 
 class SpeedSettingsWindow:
@@ -322,8 +736,8 @@ class SpeedSettingsWindow:
         self.controller = controller
         
         self.window = tk.Toplevel(parent)
-        self.window.title("CPU速度設定")
-        self.window.geometry("300x150")
+        self.window.title("CPU設定")
+        self.window.geometry("300x230")
         self.window.grab_set()
         
         self.create_widgets()
@@ -343,6 +757,14 @@ class SpeedSettingsWindow:
         scale.pack(side="left", padx=10)
         tk.Label(speed_frame, text="遅い").pack(side="left")
         
+        # CPUの強さ（expertは思考時間いっぱいまで探索する）
+        self.difficulty_var = tk.StringVar(value=self.controller.get_cpu_difficulty())
+        difficulty_frame = tk.Frame(self.window)
+        difficulty_frame.pack(pady=5)
+        tk.Label(difficulty_frame, text="強さ:").pack(side="left")
+        for text, value in [("弱い", "easy"), ("普通", "normal"), ("強い", "hard"), ("最強", "expert")]:
+            tk.Radiobutton(difficulty_frame, text=text, variable=self.difficulty_var, value=value).pack(side="left")
+        
         button_frame = tk.Frame(self.window)
         button_frame.pack(pady=20)
         
@@ -354,5 +776,6 @@ class SpeedSettingsWindow:
     
     def apply_settings(self):
         self.controller.set_turn_delay(self.speed_var.get())
-        messagebox.showinfo("設定", "CPU速度を設定しました")
+        self.controller.set_cpu_difficulty(self.difficulty_var.get())
+        messagebox.showinfo("設定", "CPUの設定を反映しました")
         self.window.destroy()
\ No newline at end of file
@@ -0,0 +1,208 @@
+import argparse
+import os
+import random
+import struct
+import time
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+from tile import NUM_TILE_KINDS, kind_name
+from game_logic import GameState
+from hand_cache import HandEvalCache, get_shared_cache
+
+# 「何を切る？」問題（14枚の手牌から最も良い捨て牌を選ぶ）の作成と読み込み
+# 問題は GameState の配牌から前もってまとめて作り、捨て牌ごとの向聴数・受け入れ枚数も一緒に保存する
+# ファイルは固定長のレコードが並ぶだけなので、何番目の問題でも位置を計算して1回読むだけで取り出せる
+
+PUZZLE_MAGIC = b"DP"
+PUZZLE_VERSION = 1
+HAND_SIZE = 14
+# ヘッダー: マジック(2) 版(1) 問題数(4)
+HEADER = struct.Struct("<2sBI")
+# 1問: 手牌の牌種(14) 各牌を捨てた後の向聴数(14) 受け入れ枚数(14)
+RECORD = struct.Struct(f"<{HAND_SIZE}s{HAND_SIZE}s{HAND_SIZE}s")
+
+NO_DISCARD = 127  # 手牌にない牌種の向聴数
+
+@dataclass(frozen=True)
+class Puzzle:
+    kinds: tuple    # 手牌の牌種（昇順）
+    shanten: tuple  # kinds[i] を捨てた後の向聴数
+    ukeire: tuple   # kinds[i] を捨てた後の受け入れ枚数（自分の手牌以外は全て見えていない前提）
+
+    def _score(self, i: int) -> tuple:
+        return (self.shanten[i], -self.ukeire[i])
+
+    def best_kinds(self) -> list[int]:
+        """正解の牌種（向聴数が最小で、その中で受け入れが最も多いもの。複数ありうる）"""
+        best = min(self._score(i) for i in range(len(self.kinds)))
+        return sorted({kind for i, kind in enumerate(self.kinds) if self._score(i) == best})
+
+    def grade(self, kind: int) -> tuple:
+        """(正解かどうか, 説明) を返す"""
+        if kind not in self.kinds:
+            return False, "手牌にない牌です"
+        i = self.kinds.index(kind)
+        best = self.best_kinds()
+        b = self.kinds.index(best[0])
+        answer = f"{kind_name(kind)}: {self.shanten[i]}向聴 受け入れ{self.ukeire[i]}枚"
+        if kind in best:
+            return True, f"正解！ {answer}"
+        best_names = "・".join(kind_name(k) for k in best)
+        return False, f"不正解 {answer} / 正解は {best_names}: {self.shanten[b]}向聴 受け入れ{self.ukeire[b]}枚"
+
+    def to_bytes(self) -> bytes:
+        return RECORD.pack(bytes(self.kinds), bytes(self.shanten), bytes(self.ukeire))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Puzzle":
+        """1問分のレコードを読む（長さ・牌種が正しくなければ ValueError）"""
+        try:
+            kinds, shanten, ukeire = RECORD.unpack(data)
+        except struct.error:
+            raise ValueError("問題のレコードの長さが正しくありません") from None
+        if any(kind >= NUM_TILE_KINDS or kinds.count(kind) > 4 for kind in kinds):
+            raise ValueError(f"問題の牌種が正しくありません: {list(kinds)}")
+        return cls(tuple(kinds), tuple(shanten), tuple(ukeire))
+
+def evaluate_discards_batch(counts, cache: Optional[HandEvalCache] = None) -> tuple:
+    """
+    複数の14枚の手牌について、全ての捨て牌の向聴数と受け入れ枚数をまとめて求める
+    counts: (N, 34) の牌種ごとの枚数配列
+    戻り値: (shanten, ukeire) どちらも (N, 34)。手牌にない牌種の向聴数は NO_DISCARD、受け入れは0
+    捨てた後の13枚の手牌は重複を除いてから評価する（同じ形は1回だけ計算）
+    """
+    cache = cache if cache is not None else get_shared_cache()
+    counts = np.asarray(counts, dtype=np.int8)
+    if counts.ndim != 2 or counts.shape[1] != NUM_TILE_KINDS:
+        raise ValueError(f"countsは(N, {NUM_TILE_KINDS})の配列である必要があります: {counts.shape}")
+
+    # after[j] は手牌 rows[j] から牌種 discards[j] を1枚捨てた後の枚数
+    rows, discards = np.nonzero(counts > 0)
+    after = counts[rows].copy()
+    after[np.arange(len(rows)), discards] -= 1
+    unique, inverse = np.unique(after, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+
+    unique_shanten = np.empty(len(unique), dtype=np.int8)
+    waits = np.zeros(unique.shape, dtype=bool)
+    for u, row in enumerate(unique.tolist()):
+        unique_shanten[u] = cache.shanten(row)
+        waits[u, cache.ukeire(row)] = True
+    # 受け入れ枚数は、手牌（捨てる前の14枚）に含まれていない残りの枚数で数える
+    remaining = 4 - counts[rows]
+    ukeire_values = np.where(waits[inverse], remaining, 0).sum(axis=1)
+
+    shanten = np.full(counts.shape, NO_DISCARD, dtype=np.int8)
+    ukeire = np.zeros(counts.shape, dtype=np.int16)
+    shanten[rows, discards] = unique_shanten[inverse]
+    ukeire[rows, discards] = ukeire_values
+    return shanten, ukeire
+
+def _deal_hand() -> list[int]:
+    """GameState の配牌に1枚ツモった14枚"""
+    game = GameState()
+    game.draw_tile()
+    return sorted(tile.kind for tile in game.hand)
+
+def generate_puzzles(count: int, batch_size: int = 1024, cache: Optional[HandEvalCache] = None) -> list[Puzzle]:
+    """
+    問題を count 問作る
+    和了している手牌と、どれを捨てても同じ評価になる手牌（考える余地がない）は除く
+    """
+    cache = cache if cache is not None else get_shared_cache()
+    puzzles = []
+    while len(puzzles) < count:
+        hands = [_deal_hand() for _ in range(batch_size)]
+        counts = np.zeros((batch_size, NUM_TILE_KINDS), dtype=np.int8)
+        for i, hand in enumerate(hands):
+            np.add.at(counts[i], hand, 1)
+        shanten, ukeire = evaluate_discards_batch(counts, cache)
+
+        for i, hand in enumerate(hands):
+            if cache.shanten(counts[i].tolist()) == -1:
+                continue
+            puzzle = Puzzle(tuple(hand), tuple(int(shanten[i, k]) for k in hand), tuple(int(ukeire[i, k]) for k in hand))
+            if len(puzzle.best_kinds()) == len(set(hand)):
+                continue
+            puzzles.append(puzzle)
+            if len(puzzles) >= count:
+                break
+    return puzzles
+
+def save_puzzles(puzzles: list[Puzzle], file_path: str) -> bool:
+    """問題をファイルに保存"""
+    try:
+        with open(file_path, 'wb') as f:
+            f.write(HEADER.pack(PUZZLE_MAGIC, PUZZLE_VERSION, len(puzzles)))
+            for puzzle in puzzles:
+                f.write(puzzle.to_bytes())
+        return True
+    except OSError as e:
+        print(f"問題の保存に失敗しました: {e}")
+        return False
+
+class PuzzleFile:
+    """問題ファイルから番号を指定して1問ずつ読む（全体は読み込まない）"""
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._file = open(file_path, 'rb')
+        try:
+            magic, version, self.count = HEADER.unpack(self._file.read(HEADER.size))
+            if magic != PUZZLE_MAGIC or version != PUZZLE_VERSION:
+                raise ValueError("問題ファイルの形式が正しくありません")
+            if os.fstat(self._file.fileno()).st_size != HEADER.size + self.count * RECORD.size:
+                raise ValueError("問題ファイルの長さが正しくありません")
+        except (struct.error, ValueError):
+            self._file.close()
+            raise
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> Puzzle:
+        """index 番目の問題（レコードが壊れていれば ValueError）"""
+        if not 0 <= index < self.count:
+            raise IndexError(f"問題番号が範囲外です: {index}")
+        self._file.seek(HEADER.size + index * RECORD.size)
+        return Puzzle.from_bytes(self._file.read(RECORD.size))
+
+    def random_index(self) -> int:
+        return random.randrange(self.count)
+
+    def close(self):
+        self._file.close()
+
+def load_puzzles(file_path: str) -> Optional[PuzzleFile]:
+    """問題ファイルを開く（開けなければNone）。最初の問題だけ読んで形式を確かめる"""
+    try:
+        puzzle_file = PuzzleFile(file_path)
+    except (OSError, ValueError, struct.error) as e:
+        print(f"問題ファイルの読み込みに失敗しました: {e}")
+        return None
+    try:
+        if len(puzzle_file):
+            puzzle_file[0]
+    except (OSError, ValueError) as e:
+        puzzle_file.close()
+        print(f"問題ファイルの読み込みに失敗しました: {e}")
+        return None
+    return puzzle_file
+
+def main():
+    parser = argparse.ArgumentParser(description="「何を切る？」問題をまとめて作る")
+    parser.add_argument("--count", type=int, default=10000, help="作る問題数")
+    parser.add_argument("--out", default="puzzles.bin", help="出力するファイル")
+    parser.add_argument("--seed", type=int, default=None, help="乱数の種（同じ問題を作り直す時に指定）")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    start = time.perf_counter()
+    puzzles = generate_puzzles(args.count)
+    elapsed = time.perf_counter() - start
+    if save_puzzles(puzzles, args.out):
+        print(f"{len(puzzles)}問 作成: {elapsed:.2f}秒 -> {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+from typing import Optional
+from game_events import (GameStartEvent, DrawEvent, DiscardEvent, TurnChangeEvent, ClaimEvent,
+                         GameOverEvent)
+from game_logic import ClaimType
+from game_snapshot import GameSnapshot
+
+# 牌譜（1局分の記録）
+# 開始時のスナップショットと、その後の変化（1手4バイト）を持つ
+# K手ごとに途中のスナップショット（キーフレーム）も持つので、任意の位置へは
+# 直前のキーフレームから最大K手進めるだけで移動できる
+
+RECORD_MAGIC = b"DR"
+RECORD_VERSION = 1
+KEYFRAME_INTERVAL = 32
+
+# 1手の記録 (種類, プレイヤー, 牌種, 補足)
+OP_DRAW = 0      # ツモ
+OP_DISCARD = 1   # 捨て牌
+OP_TURN = 2      # 手番の移動（プレイヤー = 新しい手番）
+OP_PON = 3       # ポン（補足 = 鳴かれたプレイヤー）
+OP_CHI = 4       # チー（補足 = 面子の先頭の牌種、鳴かれたのは上家）
+OP_RON = 5       # ロン（補足 = 放銃したプレイヤー）
+OP_TSUMO = 6     # ツモ和了
+OP_END = 7       # 流局
+
+def apply_delta(snapshot: GameSnapshot, delta: tuple):
+    """1手分の変化をスナップショットに適用する（記録と合わなければ ValueError）"""
+    op, player_id, kind, extra = delta
+    if op == OP_DRAW:
+        ok = snapshot.draw(player_id) == kind
+    elif op == OP_DISCARD:
+        ok = snapshot.discard(player_id, kind)
+    elif op == OP_TURN:
+        snapshot.current_player = player_id
+        ok = True
+    elif op == OP_PON:
+        ok = snapshot.claim(player_id, extra, ClaimType.PON, kind)
+    elif op == OP_CHI:
+        ok = snapshot.claim(player_id, (player_id - 1) % len(snapshot.hands), ClaimType.CHI, kind, extra)
+    elif op == OP_RON:
+        ok = snapshot.claim(player_id, extra, ClaimType.RON, kind)
+    elif op == OP_TSUMO:
+        snapshot.tsumo(player_id, kind)
+        ok = True
+    elif op == OP_END:
+        snapshot.game_active = False
+        ok = True
+    else:
+        ok = False
+    if not ok:
+        raise ValueError(f"牌譜が正しくありません: {delta}")
+
+class GameRecord:
+    """1局分の牌譜"""
+    def __init__(self, initial: GameSnapshot, keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.initial = initial
+        self.keyframe_interval = keyframe_interval
+        self.deltas: list[tuple] = []
+        self.keyframes = [initial.clone()]  # keyframes[i] は i*K 手目の後の状態
+        self._tail = initial.clone()        # 最後の手の後の状態
+
+    def append(self, delta: tuple):
+        apply_delta(self._tail, delta)
+        self.deltas.append(delta)
+        if len(self.deltas) % self.keyframe_interval == 0:
+            self.keyframes.append(self._tail.clone())
+
+    def __len__(self) -> int:
+        return len(self.deltas)
+
+    def snapshot_at(self, position: int) -> GameSnapshot:
+        """position 手目の後の状態（0 は開始時）"""
+        position = max(0, min(position, len(self.deltas)))
+        index = position // self.keyframe_interval
+        snapshot = self.keyframes[index].clone()
+        for delta in self.deltas[index * self.keyframe_interval:position]:
+            apply_delta(snapshot, delta)
+        return snapshot
+
+    def turn_positions(self) -> list[int]:
+        """各手番の開始位置（開始時と、手番の移動・鳴きの直後）"""
+        positions = [0]
+        for i, (op, _, _, _) in enumerate(self.deltas):
+            if op in (OP_TURN, OP_PON, OP_CHI):
+                positions.append(i + 1)
+        if positions[-1] != len(self.deltas):
+            positions.append(len(self.deltas))
+        return positions
+
+    def to_bytes(self) -> bytes:
+        """形式: マジック(2) 版(1) スナップショット長(2) スナップショット 手数(2) [1手(4)]xn"""
+        initial = self.initial.to_bytes()
+        deltas = list(self.deltas)  # 記録中に保存しても手数と中身がずれないように
+        data = bytearray(RECORD_MAGIC)
+        data.append(RECORD_VERSION)
+        data += len(initial).to_bytes(2, "little")
+        data += initial
+        data += len(deltas).to_bytes(2, "little")
+        for delta in deltas:
+            data += bytes(delta)
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, keyframe_interval: int = KEYFRAME_INTERVAL) -> "GameRecord":
+        if data[:2] != RECORD_MAGIC or data[2] != RECORD_VERSION:
+            raise ValueError("牌譜の形式が正しくありません")
+        length = int.from_bytes(data[3:5], "little")
+        pos = 5 + length
+        record = cls(GameSnapshot.from_bytes(data[5:pos]), keyframe_interval)
+        count = int.from_bytes(data[pos:pos + 2], "little")
+        pos += 2
+        if len(data) != pos + count * 4:
+            raise ValueError("牌譜の長さが正しくありません")
+        for i in range(count):
+            record.append(tuple(data[pos + i * 4:pos + i * 4 + 4]))
+        return record
+
+class GameRecorder:
+    """MultiPlayerGameState のイベントから牌譜を作る（配牌・読み込みのたびに新しい牌譜になる）"""
+    def __init__(self, state, keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.state = state
+        self.keyframe_interval = keyframe_interval
+        self.record = GameRecord(GameSnapshot.from_state(state), keyframe_interval)
+        self._unsubscribe = state.events.subscribe(
+            self.on_event, (GameStartEvent, DrawEvent, DiscardEvent, TurnChangeEvent, ClaimEvent, GameOverEvent))
+
+    def close(self):
+        if self._unsubscribe:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    def on_event(self, event):
+        # 鳴きの面子・和了牌はイベントに含まれないので、発行直後の状態から読む
+        if isinstance(event, GameStartEvent):
+            self.record = GameRecord(GameSnapshot.from_state(self.state), self.keyframe_interval)
+            return
+        if isinstance(event, DrawEvent):
+            delta = (OP_DRAW, event.player_id, event.kind, 0)
+        elif isinstance(event, DiscardEvent):
+            delta = (OP_DISCARD, event.player_id, event.kind, 0)
+        elif isinstance(event, TurnChangeEvent):
+            delta = (OP_TURN, event.current_player, 0, 0)
+        elif isinstance(event, ClaimEvent):
+            if event.claim_type == ClaimType.RON.value:
+                delta = (OP_RON, event.player_id, event.kind, event.from_player)
+            elif event.claim_type == ClaimType.PON.value:
+                delta = (OP_PON, event.player_id, event.kind, event.from_player)
+            else:
+                first_kind = self.state.players[event.player_id].melds[-1].tiles[0].kind
+                delta = (OP_CHI, event.player_id, event.kind, first_kind)
+        elif event.reason == "tsumo":
+            delta = (OP_TSUMO, self.state.winner, self.state.win_kind, 0)
+        elif event.reason == "exhausted":
+            delta = (OP_END, 0, 0, 0)
+        else:
+            return  # ロンは ClaimEvent で記録済み
+        try:
+            self.record.append(delta)
+        except ValueError as e:
+            print(f"牌譜の記録エラー: {e}")
+
+def save_record(record: GameRecord, file_path: str) -> bool:
+    """牌譜をファイルに保存"""
+    try:
+        with open(file_path, 'wb') as f:
+            f.write(record.to_bytes())
+        return True
+    except OSError as e:
+        print(f"牌譜の保存に失敗しました: {e}")
+        return False
+
+def load_record(file_path: str) -> Optional[GameRecord]:
+    """ファイルから牌譜を読み込む"""
+    try:
+        with open(file_path, 'rb') as f:
+            return GameRecord.from_bytes(f.read())
+    except (OSError, ValueError, IndexError) as e:
+        print(f"牌譜の読み込みに失敗しました: {e}")
+        return None
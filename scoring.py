@@ -0,0 +1,272 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import product
+from typing import Optional
+from tile import NUM_TILE_KINDS, JIHAI_START
+
+# 和了した手牌の役と点数の計算
+# 手牌は牌種ごとの枚数（34要素）、鳴いた面子は牌種3つのタプルで扱う
+# 色ごとの分解は枚数パターンをキーにした表（_suit_decompositions）から引き、
+# 手牌ごとの結果もキャッシュするので、同じ和了形の2回目以降はほぼ表引きだけで済む
+
+DRAGON_KINDS = (31, 32, 33)  # 白・發・中
+WIND_KINDS = (27, 28, 29, 30)  # 東・南・西・北
+YAKUMAN_HAN = 13
+
+# 翻数 -> 点数（子の30符相当、5翻以上は満貫・跳満・倍満・三倍満・役満）
+_HAN_POINTS = (0, 1000, 2000, 3900, 7700, 8000, 12000, 12000, 16000, 16000, 16000, 24000, 24000, 32000)
+
+# 役の名前と翻数（門前, 鳴きあり）。鳴きありが0の役は門前限定
+YAKU_HAN = {
+    "門前清自摸和": (1, 0),
+    "断么九": (1, 1),
+    "平和": (1, 0),
+    "一盃口": (1, 0),
+    "役牌": (1, 1),
+    "三色同順": (2, 1),
+    "一気通貫": (2, 1),
+    "対々和": (2, 2),
+    "三暗刻": (2, 2),
+    "小三元": (2, 2),
+    "混老頭": (2, 2),
+    "七対子": (2, 0),
+    "混全帯么九": (2, 1),
+    "純全帯么九": (3, 2),
+    "二盃口": (3, 0),
+    "混一色": (3, 2),
+    "清一色": (6, 5),
+}
+YAKUMAN = ("大三元", "四暗刻", "字一色", "清老頭", "小四喜", "大四喜")
+
+@dataclass(frozen=True)
+class ScoreResult:
+    han: int
+    points: int
+    yaku: tuple  # ((役名, 翻数), ...)
+    yakuman: bool = False
+
+    def describe(self) -> str:
+        names = " ".join(f"{name}{han}翻" if han < YAKUMAN_HAN else name for name, han in self.yaku)
+        return f"{names} {self.points}点" if names else f"{self.points}点"
+
+def han_to_points(han: int) -> int:
+    if han >= YAKUMAN_HAN:
+        return _HAN_POINTS[YAKUMAN_HAN] * (han // YAKUMAN_HAN)
+    return _HAN_POINTS[han]
+
+@lru_cache(maxsize=None)
+def _suit_decompositions(pattern: tuple, allow_sequence: bool) -> tuple:
+    """
+    1色分の枚数パターンを面子（順子・刻子）と雀頭に余りなく分ける全ての方法
+    戻り値: ((("s"|"t"|"p", 色内の番号), ...), ...)。分けられなければ空
+    """
+    counts = list(pattern)
+    results = []
+
+    def dfs(i, blocks, has_pair):
+        while i < len(counts) and counts[i] == 0:
+            i += 1
+        if i >= len(counts):
+            results.append(tuple(blocks))
+            return
+        if counts[i] >= 3:
+            counts[i] -= 3
+            dfs(i, blocks + [("t", i)], has_pair)
+            counts[i] += 3
+        if allow_sequence and i + 2 < len(counts) and counts[i + 1] and counts[i + 2]:
+            counts[i] -= 1; counts[i + 1] -= 1; counts[i + 2] -= 1
+            dfs(i, blocks + [("s", i)], has_pair)
+            counts[i] += 1; counts[i + 1] += 1; counts[i + 2] += 1
+        if counts[i] >= 2 and not has_pair:
+            counts[i] -= 2
+            dfs(i, blocks + [("p", i)], True)
+            counts[i] += 2
+
+    if sum(counts) % 3 != 1:
+        dfs(0, [], False)
+    return tuple(results)
+
+def _decompose(counts: tuple) -> list:
+    """手牌全体を面子と雀頭1つに分ける全ての方法（牌種は全体のインデックス）"""
+    per_group = []
+    for start, end, allow_sequence in ((0, 9, True), (9, 18, True), (18, 27, True), (JIHAI_START, NUM_TILE_KINDS, False)):
+        options = _suit_decompositions(counts[start:end], allow_sequence)
+        if not options:
+            return []
+        per_group.append([tuple((block, start + index) for block, index in option) for option in options])
+    decompositions = []
+    for combination in product(*per_group):
+        blocks = [block for group in combination for block in group]
+        if sum(1 for block, _ in blocks if block == "p") == 1:
+            decompositions.append(blocks)
+    return decompositions
+
+def _is_terminal_or_honor(kind: int) -> bool:
+    return kind >= JIHAI_START or kind % 9 in (0, 8)
+
+def _block_kinds(block: str, kind: int) -> tuple:
+    return (kind, kind + 1, kind + 2) if block == "s" else (kind,)
+
+def _evaluate(sets: list, pair: int, concealed_triplets: int, menzen: bool, tsumo: bool, ryanmen: bool) -> list:
+    """
+    1つの分解について成立する役を返す
+    sets: [("s"|"t", 先頭の牌種)] 4つ（鳴いた面子を含む）, pair: 雀頭の牌種
+    """
+    sequences = sorted(kind for block, kind in sets if block == "s")
+    triplets = [kind for block, kind in sets if block == "t"]
+    all_kinds = [k for block, kind in sets for k in _block_kinds(block, kind)] + [pair]
+
+    # 役満
+    yakuman = []
+    dragon_triplets = sum(1 for kind in triplets if kind in DRAGON_KINDS)
+    wind_triplets = sum(1 for kind in triplets if kind in WIND_KINDS)
+    if dragon_triplets == 3:
+        yakuman.append("大三元")
+    if concealed_triplets == 4:
+        yakuman.append("四暗刻")
+    if all(kind >= JIHAI_START for kind in all_kinds):
+        yakuman.append("字一色")
+    if all(kind < JIHAI_START and kind % 9 in (0, 8) for kind in all_kinds):
+        yakuman.append("清老頭")
+    if wind_triplets == 4:
+        yakuman.append("大四喜")
+    elif wind_triplets == 3 and pair in WIND_KINDS:
+        yakuman.append("小四喜")
+    if yakuman:
+        return [(name, YAKUMAN_HAN) for name in yakuman]
+
+    yaku = []
+    if menzen and tsumo:
+        yaku.append("門前清自摸和")
+    if not any(_is_terminal_or_honor(kind) for kind in all_kinds):
+        yaku.append("断么九")
+    if menzen and len(sequences) == 4 and pair not in DRAGON_KINDS and ryanmen:
+        yaku.append("平和")
+
+    if menzen:
+        duplicates = sum(sequences.count(kind) // 2 for kind in set(sequences))
+        if duplicates == 2:
+            yaku.append("二盃口")
+        elif duplicates == 1:
+            yaku.append("一盃口")
+
+    yaku.extend("役牌" for _ in range(dragon_triplets))
+    if dragon_triplets == 2 and pair in DRAGON_KINDS:
+        yaku.append("小三元")
+
+    sequence_set = set(sequences)
+    if any(all(suit * 9 + number in sequence_set for suit in range(3)) for number in range(7)):
+        yaku.append("三色同順")
+    if any(all(suit * 9 + start in sequence_set for start in (0, 3, 6)) for suit in range(3)):
+        yaku.append("一気通貫")
+    if len(triplets) == 4:
+        yaku.append("対々和")
+    if concealed_triplets == 3:
+        yaku.append("三暗刻")
+
+    has_honor = any(kind >= JIHAI_START for kind in all_kinds)
+    if not sequences and all(_is_terminal_or_honor(kind) for kind in all_kinds):
+        yaku.append("混老頭")
+    elif sequences and all(any(_is_terminal_or_honor(k) for k in _block_kinds(block, kind)) for block, kind in sets) \
+            and _is_terminal_or_honor(pair):
+        yaku.append("混全帯么九" if has_honor else "純全帯么九")
+
+    suits = {kind // 9 for kind in all_kinds if kind < JIHAI_START}
+    if len(suits) == 1:
+        yaku.append("混一色" if has_honor else "清一色")
+
+    return [(name, YAKU_HAN[name][0 if menzen else 1]) for name in yaku if YAKU_HAN[name][0 if menzen else 1]]
+
+def _chiitoitsu_yaku(counts: tuple, tsumo: bool) -> Optional[list]:
+    pairs = [kind for kind in range(NUM_TILE_KINDS) if counts[kind] == 2]
+    if len(pairs) != 7:
+        return None
+    yaku = ["七対子"]
+    if tsumo:
+        yaku.append("門前清自摸和")
+    if all(kind >= JIHAI_START for kind in pairs):
+        return [("字一色", YAKUMAN_HAN)]
+    if not any(_is_terminal_or_honor(kind) for kind in pairs):
+        yaku.append("断么九")
+    if all(_is_terminal_or_honor(kind) for kind in pairs):
+        yaku.append("混老頭")
+    suits = {kind // 9 for kind in pairs if kind < JIHAI_START}
+    if len(suits) == 1:
+        yaku.append("混一色" if any(kind >= JIHAI_START for kind in pairs) else "清一色")
+    return [(name, YAKU_HAN[name][0]) for name in yaku]
+
+def _total(yaku: list) -> int:
+    return sum(han for _, han in yaku)
+
+@lru_cache(maxsize=65536)
+def _score_cached(counts: tuple, melds: tuple, win_kind: int, tsumo: bool) -> Optional[ScoreResult]:
+    menzen = not melds
+    meld_sets = [("s" if kinds[0] != kinds[1] else "t", kinds[0]) for kinds in melds]
+    best = None
+
+    for blocks in _decompose(counts):
+        pair = next(kind for block, kind in blocks if block == "p")
+        hand_sets = [(block, kind) for block, kind in blocks if block != "p"]
+        # 和了牌がどの面子（雀頭）を完成させたかで役が変わるので、候補ごとに評価する
+        win_blocks = [(block, kind) for block, kind in blocks if win_kind in _block_kinds(block, kind)]
+        for win_block, win_start in win_blocks:
+            concealed = sum(1 for block, kind in hand_sets if block == "t")
+            if win_block == "t" and not tsumo:
+                concealed -= 1  # ロンで完成した刻子は暗刻にならない
+            ryanmen = win_block == "s" and (
+                (win_kind == win_start and win_start % 9 != 6) or (win_kind == win_start + 2 and win_start % 9 != 0)
+            )
+            yaku = _evaluate(hand_sets + meld_sets, pair, concealed, menzen, tsumo, ryanmen)
+            if best is None or _total(yaku) > _total(best):
+                best = yaku
+
+    if menzen:
+        chiitoitsu = _chiitoitsu_yaku(counts, tsumo)
+        if chiitoitsu is not None and (best is None or _total(chiitoitsu) > _total(best)):
+            best = chiitoitsu
+
+    if best is None:
+        return None
+    han = _total(best)
+    # 役がない和了も1翻として扱う（この遊びのルールでは役なしでも和了できる）
+    points = han_to_points(max(1, han))
+    return ScoreResult(han, points, tuple(best), han >= YAKUMAN_HAN)
+
+def score_hand(counts, melds=(), win_kind: int = -1, tsumo: bool = False) -> Optional[ScoreResult]:
+    """
+    和了形の手牌の役と点数を求める（和了形でなければNone）
+    counts: 和了牌を含む手牌の牌種ごとの枚数, melds: 鳴いた面子の牌種 [(k1, k2, k3), ...]
+    win_kind: 和了牌の牌種, tsumo: ツモ和了かどうか
+    """
+    melds = tuple(sorted(tuple(sorted(kinds)) for kinds in melds))
+    return _score_cached(tuple(counts), melds, win_kind, tsumo)
+
+def score_win(state) -> Optional[ScoreResult]:
+    """MultiPlayerGameState の和了者の点数（和了者がいなければNone）"""
+    if state.winner < 0:
+        return None
+    player = state.players[state.winner]
+    return score_hand(
+        player.hand.kind_counts(),
+        [meld.kinds() for meld in player.melds],
+        state.win_kind,
+        state.win_from < 0
+    )
+
+def get_cache_stats() -> dict:
+    """手牌ごとの結果キャッシュと色ごとの分解表の統計"""
+    info = _score_cached.cache_info()
+    suit_info = _suit_decompositions.cache_info()
+    total = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'suit_patterns': suit_info.currsize,
+        'hit_rate': info.hits / total if total else 0.0
+    }
+
+def clear_cache():
+    """手牌ごとの結果キャッシュと色ごとの分解表を空にする"""
+    _score_cached.cache_clear()
+    _suit_decompositions.cache_clear()
@@ -1,58 +1,157 @@
 import json
 import os
+import threading
 from typing import Dict, Optional
-from tile import TileType
+from tile import TileType, NUM_TILE_KINDS, tile_kind, kind_to_type_number
+
+# 設定変更から保存までの待ち時間（秒）。この間の変更はまとめて1回で書き込む
+SAVE_DELAY = 0.5
+
+def _image_key(tile_type: TileType, number: int) -> str:
+    return f"{tile_type.value}_{number}"
+
+# 牌種インデックス -> 設定ファイル上のキー
+_KIND_KEYS = [_image_key(*kind_to_type_number(kind)) for kind in range(NUM_TILE_KINDS)]
 
 class Settings:
     def __init__(self, settings_file="settings.json"):
         self.settings_file = settings_file
         self.custom_images = {}
+        self.kind_images: list[Optional[str]] = [None] * NUM_TILE_KINDS  # 牌種ごとのカスタム画像
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # 書き込みの順序を保つ
+        self._save_timer: Optional[threading.Timer] = None
+        self._dirty = False
+        self._generation = 0  # 変更のたびに増える番号（読み込み・書き込みの間に変更があったかの判定用）
+        self._loaded_mtime: Optional[int] = None  # 最後に読み込んだ（書き込んだ）時の設定ファイルの更新時刻
         self.load_settings()
     
+    def _file_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.settings_file).st_mtime_ns
+        except OSError:
+            return None
+    
     def load_settings(self):
-        if os.path.exists(self.settings_file):
+        self._load(check_dirty=False)
+    
+    def reload_if_changed(self) -> bool:
+        """アプリの外で設定ファイルが変更されていれば読み直す（保存待ちの変更がある間はそちらを優先）"""
+        if self._file_mtime() == self._loaded_mtime:
+            return False
+        return self._load(check_dirty=True)
+    
+    def _load(self, check_dirty: bool) -> bool:
+        """設定ファイルを読む（check_dirty なら、保存待ちの変更や読んでいる間の変更があれば読んだ内容を捨てる）"""
+        with self._lock:
+            generation = self._generation
+        mtime = self._file_mtime()
+        custom_images = {}
+        if mtime is not None:
             try:
                 with open(self.settings_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    self.custom_images = data.get('custom_images', {})
+                    custom_images = data.get('custom_images', {})
             except (json.JSONDecodeError, FileNotFoundError):
-                self.custom_images = {}
+                # 書き込み途中などで読めなければ今の設定のままにし、次の確認で読み直す
+                return False
+        # 変更の有無の確認と入れ替えは、ロックを1回取ったまま行う
+        with self._lock:
+            if check_dirty and (self._dirty or self._generation != generation):
+                return False
+            self.custom_images = custom_images
+            self._loaded_mtime = mtime
+            self._rebuild_kind_images()
+        return True
+    
+    def _rebuild_kind_images(self):
+        self.kind_images = [self.custom_images.get(key) for key in _KIND_KEYS]
     
     def save_settings(self):
-        data = {
-            'custom_images': self.custom_images
-        }
+        """保存を予約する（SAVE_DELAY 秒以内の変更はまとめて、別スレッドで書き込む）"""
+        with self._lock:
+            self._schedule_save()
+    
+    def _schedule_save(self):
+        """変更を記録して保存を予約する（_lock を取った状態で呼ぶ）"""
+        self._dirty = True
+        self._generation += 1
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+        self._save_timer = threading.Timer(SAVE_DELAY, self.flush)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+    
+    def flush(self) -> bool:
+        """予約されている保存を今すぐ行う（終了時に呼ぶ）。書き込めなかった変更は保存待ちのまま残す"""
+        # ファイルへの書き込み中も save_settings() を待たせない
+        with self._write_lock:
+            with self._lock:
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                if not self._dirty:
+                    return True
+                generation = self._generation
+                data = {
+                    'custom_images': dict(self.custom_images)
+                }
+            if not self._write_file(data):
+                return False
+            with self._lock:
+                self._loaded_mtime = self._file_mtime()  # 自分で書いた変更は読み直さない
+                # 書いている間に変わっていなければ保存済み
+                if self._generation == generation:
+                    self._dirty = False
+            return True
+    
+    def _write_file(self, data: dict) -> bool:
+        # 一時ファイルに書いてから置き換える（書き込み途中で落ちても元の設定が残る）
+        temp_path = f"{self.settings_file}.tmp"
         try:
-            with open(self.settings_file, 'w', encoding='utf-8') as f:
+            with open(temp_path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.settings_file)
+            return True
         except Exception as e:
             print(f"設定の保存に失敗しました: {e}")
+            return False
     
     def set_custom_image(self, tile_type: TileType, number: int, image_path: str):
-        key = f"{tile_type.value}_{number}"
         if os.path.exists(image_path):
-            self.custom_images[key] = image_path
-            self.save_settings()
+            with self._lock:
+                self.custom_images[_image_key(tile_type, number)] = image_path
+                self.kind_images[tile_kind(tile_type, number)] = image_path
+                self._schedule_save()
             return True
         return False
     
     def get_custom_image(self, tile_type: TileType, number: int) -> Optional[str]:
-        key = f"{tile_type.value}_{number}"
-        return self.custom_images.get(key)
+        return self.kind_images[tile_kind(tile_type, number)]
+    
+    def get_custom_image_by_kind(self, kind: int) -> Optional[str]:
+        """牌種インデックスからカスタム画像を取得（描画時はこちらを使う）"""
+        return self.kind_images[kind]
     
     def remove_custom_image(self, tile_type: TileType, number: int):
-        key = f"{tile_type.value}_{number}"
-        if key in self.custom_images:
-            del self.custom_images[key]
-            self.save_settings()
+        key = _image_key(tile_type, number)
+        with self._lock:
+            if key in self.custom_images:
+                del self.custom_images[key]
+                self.kind_images[tile_kind(tile_type, number)] = None
+                self._schedule_save()
     
     def clear_all_custom_images(self):
-        self.custom_images = {}
-        self.save_settings()
+        with self._lock:
+            self.custom_images = {}
+            self._rebuild_kind_images()
+            self._schedule_save()
     
     def get_all_custom_images(self) -> Dict[str, str]:
-        return self.custom_images.copy()
+        with self._lock:
+            return self.custom_images.copy()
     
     def has_custom_image(self, tile_type: TileType, number: int) -> bool:
-        key = f"{tile_type.value}_{number}"
-        return key in self.custom_images
\ No newline at end of file
+        return self.kind_images[tile_kind(tile_type, number)] is not None
\ No newline at end of file
@@ -0,0 +1,246 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import queue
+from typing import Optional
+from table_server import TableHost, TableServer, DEFAULT_HOST, DEFAULT_PORT, encode_message, _is_int
+
+# 複数プロセスで卓を分担する対戦サーバー
+# フロントプロセスがクライアント接続を受け付け、各メッセージを担当ワーカーへ中継する
+#   create   → 負荷の最も低いワーカー
+#   join     → 卓ID % ワーカー数 のワーカー（卓IDはワーカーごとに重複しないよう採番）
+#   stats    → フロントが各ワーカーの負荷を返す
+#   その他   → 直前に中継したワーカー
+# プロトコルは table_server.py と同じなので、load_test.py をそのまま使える
+
+LOAD_REPORT_INTERVAL = 0.5  # ワーカーが負荷を報告する間隔（秒）
+WORKER_START_TIMEOUT = 30.0
+
+def run_worker(worker_index: int, worker_count: int, host: str, report_queue):
+    """ワーカープロセスの本体（TableServer を空きポートで起動し、負荷を定期的に報告する）"""
+    async def serve():
+        table_host = TableHost(first_id=worker_count + worker_index, id_step=worker_count)
+        server = TableServer(table_host, host=host, port=0)
+        await server.start()
+        report_queue.put(("ready", worker_index, server.port))
+
+        async def report_load():
+            while True:
+                report_queue.put(("load", worker_index, table_host.get_load()))
+                await asyncio.sleep(LOAD_REPORT_INTERVAL)
+
+        reporter = asyncio.ensure_future(report_load())
+        try:
+            await server.serve_forever()
+        finally:
+            reporter.cancel()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+class WorkerInfo:
+    """フロントから見たワーカーの状態"""
+    def __init__(self, index: int, process: multiprocessing.Process):
+        self.index = index
+        self.process = process
+        self.port = -1
+        self.load = {"tables": 0, "active": 0}
+        self.pending = 0  # 前回の負荷報告以降に割り振った卓の数
+
+    def score(self) -> int:
+        return self.load["tables"] + self.pending
+
+class ProxySession:
+    """1クライアント分の中継（上流は現在のワーカーへの接続1本）"""
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.worker: Optional[WorkerInfo] = None
+        self.upstream: Optional[asyncio.StreamWriter] = None
+        self.pump: Optional[asyncio.Task] = None
+
+    def send(self, message: dict):
+        if not self.writer.is_closing():
+            self.writer.write(encode_message(message))
+
+    async def connect(self, worker: WorkerInfo, host: str):
+        """中継先のワーカーを切り替える（切り替えると前のワーカーの席からは離れる）"""
+        if self.worker is worker and self.upstream is not None and not self.upstream.is_closing():
+            return
+        self.close_upstream()
+        reader, self.upstream = await asyncio.open_connection(host, worker.port, limit=2 ** 16)
+        self.worker = worker
+        self.pump = asyncio.ensure_future(self._pump(reader))
+
+    async def _pump(self, reader: asyncio.StreamReader):
+        """ワーカーからの応答をそのままクライアントへ流す"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.writer.write(line)
+                await self.writer.drain()
+        except ConnectionError:
+            pass
+
+    def close_upstream(self):
+        if self.pump:
+            self.pump.cancel()
+            self.pump = None
+        if self.upstream:
+            self.upstream.close()
+            self.upstream = None
+        self.worker = None
+
+class ShardedTableServer:
+    """ワーカープロセスに卓を分散するフロントサーバー"""
+    def __init__(self, worker_count: Optional[int] = None,
+                 host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.worker_count = worker_count or os.cpu_count() or 1
+        self.host = host
+        self.port = port
+        self.workers: list[WorkerInfo] = []
+        self.report_queue = None
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start_workers(self):
+        """ワーカープロセスを起動し、全員の待ち受けポートが揃うまで待つ（キューの受信は別スレッドで待つ）"""
+        self.report_queue = multiprocessing.Queue()
+        for index in range(self.worker_count):
+            process = multiprocessing.Process(
+                target=run_worker, args=(index, self.worker_count, self.host, self.report_queue), daemon=True)
+            process.start()
+            self.workers.append(WorkerInfo(index, process))
+
+        loop = asyncio.get_running_loop()
+        ready = 0
+        while ready < self.worker_count:
+            kind, index, value = await loop.run_in_executor(None, self.report_queue.get, True, WORKER_START_TIMEOUT)
+            if kind == "ready":
+                self.workers[index].port = value
+                ready += 1
+
+    def stop_workers(self):
+        for worker in self.workers:
+            if worker.process.is_alive():
+                worker.process.terminate()
+        for worker in self.workers:
+            worker.process.join(timeout=5)
+        self.workers = []
+
+    def shard_for(self, table_id: int) -> WorkerInfo:
+        return self.workers[table_id % self.worker_count]
+
+    def pick_worker(self) -> WorkerInfo:
+        """新しい卓を置くワーカー（卓数の最も少ないワーカー）"""
+        worker = min(self.workers, key=WorkerInfo.score)
+        worker.pending += 1
+        return worker
+
+    def get_stats(self) -> dict:
+        return {
+            "t": "stats",
+            "workers": [dict(worker.load, worker=worker.index, pending=worker.pending) for worker in self.workers]
+        }
+
+    async def collect_loads(self):
+        """ワーカーからの負荷報告を取り込む"""
+        while True:
+            try:
+                while True:
+                    kind, index, value = self.report_queue.get_nowait()
+                    if kind == "load":
+                        worker = self.workers[index]
+                        worker.load = value
+                        worker.pending = 0
+            except queue.Empty:
+                pass
+            await asyncio.sleep(LOAD_REPORT_INTERVAL / 2)
+
+    async def start(self):
+        """ワーカーを起動してから待ち受けを開始する"""
+        await self.start_workers()
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port, limit=2 ** 16)
+        # port=0 の場合はOSが割り当てたポートを記録する
+        self.port = self.server.sockets[0].getsockname()[1]
+        print(f"フロントサーバー起動: {self.host}:{self.port} (ワーカー {self.worker_count})")
+
+    async def serve_forever(self):
+        collector = None
+        try:
+            if self.server is None:
+                await self.start()
+            collector = asyncio.ensure_future(self.collect_loads())
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            if collector:
+                collector.cancel()
+            self.stop_workers()
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session = ProxySession(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    message = None
+                if not isinstance(message, dict):
+                    session.send({"t": "err", "msg": "invalid message"})
+                    continue
+
+                message_type = message.get("t")
+                if message_type == "stats":
+                    session.send(self.get_stats())
+                    continue
+                if message_type == "create":
+                    worker = self.pick_worker()
+                elif message_type == "join":
+                    table_id = message.get("table")
+                    if not _is_int(table_id):
+                        session.send({"t": "err", "msg": "cannot join"})
+                        continue
+                    worker = self.shard_for(table_id)
+                else:
+                    worker = session.worker
+                    if worker is None:
+                        session.send({"t": "err", "msg": "not seated"})
+                        continue
+
+                try:
+                    await session.connect(worker, self.host)
+                except OSError:
+                    session.send({"t": "err", "msg": "worker unavailable"})
+                    continue
+                session.upstream.write(line)
+                await session.upstream.drain()
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            session.close_upstream()
+            writer.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="複数プロセスで卓を分担する対戦サーバー")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None, help="ワーカープロセス数（省略時はCPUコア数）")
+    args = parser.parse_args()
+
+    server = ShardedTableServer(args.workers, host=args.host, port=args.port)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("サーバー停止")
+
+if __name__ == "__main__":
+    main()
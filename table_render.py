@@ -0,0 +1,276 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Iterable, Optional
+from PIL import Image, ImageDraw
+from tile import Tile, NUM_TILE_KINDS, kind_to_type_number
+from settings import Settings
+from game_snapshot import GameSnapshot, NUM_PLAYERS, meld_kinds
+from scoring import score_hand
+
+# Tkを使わずに卓の状態をPNG画像にする（レポート・デバッグ・Webのプレビュー用）
+# 牌の画像は最初に1枚のスプライトシートへ読み込み、描画時は切り出し済みの画像を貼るだけにする
+# 大量の局面はプロセスプールで並列に描画する（ワーカーごとにスプライトシートを1回だけ作る）
+
+TILE_SIZE = (30, 42)   # 手牌・鳴き
+RIVER_SIZE = (24, 34)  # 捨て牌
+HAND_SLOTS = 14
+MELD_SLOTS = 12
+RIVER_COLUMNS = 18
+RIVER_ROWS = 2
+MARGIN = 10
+MELD_GAP = 10
+LABEL_HEIGHT = 14
+
+BACKGROUND = (20, 90, 50)
+CURRENT_BACKGROUND = (40, 120, 70)
+WINNER_OUTLINE = (230, 60, 60)
+TEXT_COLOR = (255, 255, 255)
+TILE_FACE = (250, 248, 240)
+TILE_EDGE = (90, 90, 90)
+CLAIMED_TINT = (255, 230, 150)  # 鳴いた牌の下地
+
+PNG_COMPRESS_LEVEL = 1  # 速さ優先（サイズは少し大きくなる）
+
+SUIT_LETTERS = "mpsz"
+
+def kind_label(kind: int) -> str:
+    """画像がない牌の表示（1m, 5p, 7z など。既定のフォントは漢字を描けないので英字表記）"""
+    return f"{kind % 9 + 1}{SUIT_LETTERS[kind // 9]}"
+
+def resolve_image_path(kind: int, settings: Optional[Settings] = None) -> str:
+    """GUIと同じ規則で牌種の画像パスを決める（カスタム画像が存在すればそれ、なければ assets の既定画像）"""
+    custom_path = settings.get_custom_image_by_kind(kind) if settings is not None else None
+    return Tile(*kind_to_type_number(kind), custom_path).get_image_path()
+
+class TileSpriteSheet:
+    """
+    全牌種の画像を1枚にまとめたスプライトシート
+    1段目が手牌用、2段目が捨て牌用の大きさで、描画時に使う切り出し済みの画像も持つ
+    """
+    def __init__(self, settings: Optional[Settings] = None,
+                 tile_size: tuple = TILE_SIZE, river_size: tuple = RIVER_SIZE):
+        self.tile_size = tile_size
+        self.river_size = river_size
+        width = max(tile_size[0], river_size[0])
+        self.sheet = Image.new("RGB", (width * NUM_TILE_KINDS, tile_size[1] + river_size[1]), BACKGROUND)
+        self.loaded = 0  # 画像ファイルから読み込めた牌種の数
+
+        for kind in range(NUM_TILE_KINDS):
+            source = self._load(resolve_image_path(kind, settings))
+            if source is not None:
+                self.loaded += 1
+            self.sheet.paste(self._make_sprite(kind, source, tile_size), (kind * width, 0))
+            self.sheet.paste(self._make_sprite(kind, source, river_size), (kind * width, tile_size[1]))
+
+        self.tiles = [self.sheet.crop((kind * width, 0, kind * width + tile_size[0], tile_size[1]))
+                      for kind in range(NUM_TILE_KINDS)]
+        self.river_tiles = [self.sheet.crop((kind * width, tile_size[1],
+                                             kind * width + river_size[0], tile_size[1] + river_size[1]))
+                            for kind in range(NUM_TILE_KINDS)]
+        self.claimed_tiles = [self._tint(tile) for tile in self.tiles]
+
+    @staticmethod
+    def _load(image_path: str) -> Optional[Image.Image]:
+        if not os.path.exists(image_path):
+            return None
+        try:
+            with Image.open(image_path) as img:
+                return img.convert("RGBA")
+        except OSError as e:
+            print(f"牌画像の読み込みに失敗しました: {image_path}: {e}")
+            return None
+
+    @staticmethod
+    def _make_sprite(kind: int, source: Optional[Image.Image], size: tuple) -> Image.Image:
+        """牌1枚分の画像（透過部分は牌の地の色で埋める。画像がなければ枠と文字）"""
+        sprite = Image.new("RGB", size, TILE_FACE)
+        if source is not None:
+            resized = source.resize(size, Image.Resampling.LANCZOS)
+            sprite.paste(resized, (0, 0), resized)
+        else:
+            draw = ImageDraw.Draw(sprite)
+            draw.rectangle((0, 0, size[0] - 1, size[1] - 1), outline=TILE_EDGE)
+            draw.text((4, size[1] // 2 - 6), kind_label(kind), fill=(0, 0, 0))
+        return sprite
+
+    @staticmethod
+    def _tint(tile: Image.Image) -> Image.Image:
+        return Image.blend(tile, Image.new("RGB", tile.size, CLAIMED_TINT), 0.35)
+
+class TableRenderer:
+    """GameSnapshot（または MultiPlayerGameState）を画像にする"""
+    def __init__(self, sprites: Optional[TileSpriteSheet] = None, settings: Optional[Settings] = None):
+        self.sprites = sprites if sprites is not None else TileSpriteSheet(settings)
+        tile_w, tile_h = self.sprites.tile_size
+        river_w, river_h = self.sprites.river_size
+        self.band_height = LABEL_HEIGHT + tile_h + 4 + RIVER_ROWS * river_h + MARGIN
+        self.width = MARGIN * 2 + (HAND_SLOTS + MELD_SLOTS) * tile_w + MELD_GAP
+        self.width = max(self.width, MARGIN * 2 + RIVER_COLUMNS * river_w)
+        self.height = MARGIN + NUM_PLAYERS * self.band_height + LABEL_HEIGHT + MARGIN
+
+    def render(self, source) -> Image.Image:
+        snapshot = source if isinstance(source, GameSnapshot) else GameSnapshot.from_state(source)
+        image = Image.new("RGB", (self.width, self.height), BACKGROUND)
+        draw = ImageDraw.Draw(image)
+        winner = snapshot.winner[0] if snapshot.winner else -1
+
+        for player_id in range(NUM_PLAYERS):
+            top = MARGIN + player_id * self.band_height
+            self._draw_player(image, draw, snapshot, player_id, top, winner)
+
+        footer = f"wall {len(snapshot.mountain)}"
+        result = self.describe_result(snapshot)
+        if result:
+            footer += f"  {result}"
+        draw.text((MARGIN, self.height - MARGIN - LABEL_HEIGHT + 2), footer, fill=TEXT_COLOR)
+        return image
+
+    def _draw_player(self, image: Image.Image, draw: ImageDraw.ImageDraw, snapshot: GameSnapshot,
+                     player_id: int, top: int, winner: int):
+        tile_w, tile_h = self.sprites.tile_size
+        river_w, river_h = self.sprites.river_size
+        bottom = top + self.band_height - MARGIN // 2
+
+        # 手番のプレイヤーは帯の色を変え、名前の前に印を付ける
+        is_current = snapshot.game_active and player_id == snapshot.current_player
+        if is_current:
+            draw.rectangle((MARGIN // 2, top - MARGIN // 2, self.width - MARGIN // 2, bottom), fill=CURRENT_BACKGROUND)
+            draw.polygon(((MARGIN, top + 2), (MARGIN, top + 10), (MARGIN + 7, top + 6)), fill=TEXT_COLOR)
+        if player_id == winner:
+            draw.rectangle((MARGIN // 2, top - MARGIN // 2, self.width - MARGIN // 2, bottom),
+                           outline=WINNER_OUTLINE, width=2)
+        draw.text((MARGIN + 10, top), f"P{player_id + 1}", fill=TEXT_COLOR)
+
+        # 手牌（牌種順）
+        y = top + LABEL_HEIGHT
+        x = MARGIN
+        hand = snapshot.hands[player_id]
+        for kind in range(NUM_TILE_KINDS):
+            for _ in range(hand[kind]):
+                image.paste(self.sprites.tiles[kind], (x, y))
+                x += tile_w
+
+        # 鳴いた面子（右詰め、鳴いた牌は色を変える）
+        x = self.width - MARGIN
+        for code, _, claimed_kind, first_kind in reversed(snapshot.melds[player_id]):
+            kinds = meld_kinds(code, first_kind)
+            x -= len(kinds) * tile_w
+            claimed_index = kinds.index(claimed_kind) if claimed_kind in kinds else -1
+            for i, kind in enumerate(kinds):
+                sprite = self.sprites.claimed_tiles[kind] if i == claimed_index else self.sprites.tiles[kind]
+                image.paste(sprite, (x + i * tile_w, y))
+            x -= 4
+
+        # 捨て牌（RIVER_COLUMNS 枚ごとに折り返す。入りきらない分は最後の段に重ねる）
+        river_top = y + tile_h + 4
+        for i, kind in enumerate(snapshot.discards[player_id]):
+            row = min(i // RIVER_COLUMNS, RIVER_ROWS - 1)
+            column = min(i - row * RIVER_COLUMNS, RIVER_COLUMNS - 1)
+            image.paste(self.sprites.river_tiles[kind], (MARGIN + column * river_w, river_top + row * river_h))
+
+    @staticmethod
+    def describe_result(snapshot: GameSnapshot) -> str:
+        """和了・流局の表示（進行中なら空文字）"""
+        if snapshot.game_active and snapshot.mountain:
+            return ""
+        if not snapshot.winner:
+            return "draw"
+        player_id, win_kind, from_player = snapshot.winner
+        melds = [meld_kinds(code, first_kind) for code, _, _, first_kind in snapshot.melds[player_id]]
+        result = score_hand(snapshot.hands[player_id], melds, win_kind, from_player < 0)
+        how = "tsumo" if from_player < 0 else f"ron from P{from_player + 1}"
+        points = f" {result.points}" if result else ""
+        return f"P{player_id + 1} {how} {kind_label(win_kind)}{points}"
+
+    def render_png(self, source) -> bytes:
+        """PNGのバイト列を返す（Webのプレビューなど、ファイルを介さない用途向け）"""
+        buffer = BytesIO()
+        self.render(source).save(buffer, "PNG", compress_level=PNG_COMPRESS_LEVEL)
+        return buffer.getvalue()
+
+    def save(self, source, file_path: str) -> bool:
+        try:
+            self.render(source).save(file_path, "PNG", compress_level=PNG_COMPRESS_LEVEL)
+            return True
+        except OSError as e:
+            print(f"画像の保存に失敗しました: {e}")
+            return False
+
+# プロセスプール用（ワーカーごとに1つの TableRenderer を作って使い回す）
+
+_worker_renderer: Optional[TableRenderer] = None
+
+def _init_worker(settings_file: Optional[str]):
+    global _worker_renderer
+    settings = Settings(settings_file) if settings_file else None
+    _worker_renderer = TableRenderer(settings=settings)
+
+def _render_job(job: tuple) -> Optional[str]:
+    data, file_path = job
+    snapshot = GameSnapshot.from_bytes(data)
+    return file_path if _worker_renderer.save(snapshot, file_path) else None
+
+def render_batch(snapshots: Iterable, output_dir: str, workers: Optional[int] = None,
+                 settings_file: Optional[str] = "settings.json", prefix: str = "table",
+                 chunksize: int = 16) -> list:
+    """
+    複数の局面をPNGファイルに描画する（保存できたファイルのパスを返す）
+    snapshots: GameSnapshot・MultiPlayerGameState・スナップショットのバイト列のいずれか
+    局面はバイト列にしてワーカーに渡す（画像やTileオブジェクトをプロセス間で送らない）
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = []
+    for i, source in enumerate(snapshots):
+        if not isinstance(source, (bytes, bytearray)):
+            if not isinstance(source, GameSnapshot):
+                source = GameSnapshot.from_state(source)
+            source = source.to_bytes()
+        jobs.append((bytes(source), os.path.join(output_dir, f"{prefix}_{i:05d}.png")))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(settings_file,)) as executor:
+        return [path for path in executor.map(_render_job, jobs, chunksize=chunksize) if path]
+
+def _record_snapshots(file_paths: list) -> list:
+    """牌譜ファイルの各手番の局面"""
+    from replay import load_record
+    snapshots = []
+    for file_path in file_paths:
+        record = load_record(file_path)
+        if record is not None:
+            snapshots.extend(record.snapshot_at(position) for position in record.turn_positions())
+    return snapshots
+
+def _selfplay_snapshots(games: int) -> list:
+    """全員CPUで対局した各局の最終局面"""
+    from game_logic import MultiPlayerGameState, PlayerType
+    from game_controller import iter_game_events
+    snapshots = []
+    for _ in range(games):
+        state = MultiPlayerGameState([PlayerType.CPU] * NUM_PLAYERS)
+        for _ in iter_game_events(state):
+            pass
+        snapshots.append(GameSnapshot.from_state(state))
+    return snapshots
+
+def main():
+    parser = argparse.ArgumentParser(description="卓の局面をPNG画像に描画する")
+    parser.add_argument("records", nargs="*", help="描画する牌譜ファイル（各手番を1枚ずつ描画）")
+    parser.add_argument("--selfplay", type=int, default=0, help="CPU同士で対局した局の最終局面を描画する数")
+    parser.add_argument("--out", default="renders", help="出力先のフォルダ")
+    parser.add_argument("--workers", type=int, default=None, help="描画するプロセス数（省略時はCPU数）")
+    parser.add_argument("--settings", default="settings.json", help="カスタム画像を読む設定ファイル")
+    args = parser.parse_args()
+
+    snapshots = _record_snapshots(args.records) + _selfplay_snapshots(args.selfplay)
+    if not snapshots:
+        parser.error("牌譜ファイルか --selfplay を指定してください")
+    start = time.perf_counter()
+    paths = render_batch(snapshots, args.out, args.workers, args.settings)
+    elapsed = time.perf_counter() - start
+    print(f"{len(paths)}枚 描画: {elapsed:.2f}秒 ({len(paths) / elapsed * 60:.0f}枚/分)")
+
+if __name__ == "__main__":
+    main()
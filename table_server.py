@@ -0,0 +1,323 @@
+import argparse
+import asyncio
+import json
+import math
+import time
+from typing import Optional
+from game_logic import MultiPlayerGameState, PlayerType, ClaimType
+from game_events import DrawEvent, DiscardEvent, TurnChangeEvent, GameOverEvent, ClaimEvent
+from async_game_controller import AsyncGameController
+import metrics
+
+# ローカル対戦サーバー
+# プロトコル: 1行1メッセージのJSON（キーは短縮形、"t" がメッセージの種類）
+#   クライアント → サーバー
+#     {"t":"create","humans":[0],"delay":1.0}  卓を作成（humans: 人間が座る席）
+#     {"t":"join","table":1,"seat":0}           席に着く（人間の席が全て埋まると開始）
+#     {"t":"discard","i":3}                     手牌のインデックスを指定して捨てる
+#     {"t":"claim","c":"pon"}                   claim_offer への返答（"ron"/"pon"/"chi"、null で見送り）
+#     {"t":"tsumo"}                             ツモ和了（your_turn の "tsumo" が true の時）
+#     {"t":"state"}                             自分から見た卓の状態を要求
+#   サーバー → クライアント
+#     created / joined / ok / err / state
+#     draw {"p":席,"k":牌種(本人のみ)} / discard {"p":席,"k":牌種} / turn {"p":席}
+#     claim {"p":席,"from":捨てた席,"c":種類,"k":牌種}
+#     over {"reason":"exhausted"|"ron"|"tsumo","w":和了した席,"pts":点数,"y":[役名...],"dp":[各席の点数増減]}
+#     your_turn {"hand":[牌種...],"tsumo":ツモ和了できるか} / claim_offer {"k":牌種,"c":[鳴ける種類...]} / end
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+JOIN_TIMEOUT = 60.0    # 作成してからこの秒数の間に人間の席が埋まらなかった卓は閉じる
+SWEEP_INTERVAL = 5.0   # 終わった卓・期限切れの卓を片付ける間隔（秒）
+
+def encode_message(message: dict) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n"
+
+def _is_int(value) -> bool:
+    """JSONの整数かどうか（true/false は除く）"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+class ClientConnection:
+    """1つのクライアント接続"""
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.table: Optional["Table"] = None
+        self.seat = -1
+
+    def send(self, message: dict):
+        if not self.writer.is_closing():
+            self.writer.write(encode_message(message))
+
+class Table:
+    """サーバー上の1卓（指定した席は人間、それ以外はCPU）"""
+    def __init__(self, table_id: int, human_seats: list, turn_delay: float):
+        self.table_id = table_id
+        self.human_seats = set(human_seats)
+        player_types = [PlayerType.HUMAN if seat in self.human_seats else PlayerType.CPU for seat in range(4)]
+        self.state = MultiPlayerGameState(player_types)
+        self.controller = AsyncGameController(self.state, turn_delay=turn_delay,
+                                              on_human_turn=self._on_human_turn,
+                                              on_claim_offer=self._on_claim_offer)
+        self.clients = {}  # 席 -> ClientConnection
+        self.started = False
+        self.finished = False
+        self.created_at = time.monotonic()
+        self._unsubscribe = self.state.events.subscribe(self._on_event)
+
+    def join(self, seat: int, client: ClientConnection) -> bool:
+        if seat not in self.human_seats or seat in self.clients or self.finished:
+            return False
+        self.clients[seat] = client
+        client.table = self
+        client.seat = seat
+        return True
+
+    def leave(self, client: ClientConnection):
+        seat = client.seat
+        if self.clients.get(seat) is client:
+            del self.clients[seat]
+            # 対局中に抜けた席はCPUが引き継ぐ（他の人間の席がある卓を止めない）
+            if self.started and not self.finished:
+                self.controller.replace_with_cpu(seat)
+        client.table = None
+        client.seat = -1
+
+    def is_expired(self, now: float) -> bool:
+        """JOIN_TIMEOUT を過ぎても人間の席が埋まらず、始まっていないかどうか"""
+        return not self.started and now - self.created_at > JOIN_TIMEOUT
+
+    def is_ready(self) -> bool:
+        return not self.started and len(self.clients) == len(self.human_seats)
+
+    def start(self):
+        self.started = True
+        task = self.controller.start()
+        task.add_done_callback(lambda _: self.close())
+
+    def close(self):
+        if not self.finished:
+            self.finished = True
+            self.controller.stop()
+            self._unsubscribe()
+            self._broadcast({"t": "end"})
+
+    def get_view(self, seat: int) -> dict:
+        """指定した席から見た卓の状態"""
+        return {
+            "t": "state",
+            "table": self.table_id,
+            "cur": self.state.current_player,
+            "m": self.state.get_mountain_count(),
+            "hand": [tile.kind for tile in self.state.players[seat].hand],
+            "d": [[tile.kind for tile in player.discarded] for player in self.state.players],
+            "ml": [[meld.kinds() for meld in player.melds] for player in self.state.players]
+        }
+
+    def _broadcast(self, message: dict):
+        for client in self.clients.values():
+            client.send(message)
+
+    def _on_event(self, event):
+        if isinstance(event, DrawEvent):
+            for seat, client in self.clients.items():
+                if seat == event.player_id:
+                    client.send({"t": "draw", "p": event.player_id, "k": event.kind})
+                else:
+                    client.send({"t": "draw", "p": event.player_id})
+        elif isinstance(event, DiscardEvent):
+            self._broadcast({"t": "discard", "p": event.player_id, "k": event.kind})
+        elif isinstance(event, ClaimEvent):
+            self._broadcast({"t": "claim", "p": event.player_id, "from": event.from_player,
+                             "c": event.claim_type, "k": event.kind})
+        elif isinstance(event, TurnChangeEvent):
+            self._broadcast({"t": "turn", "p": event.current_player})
+        elif isinstance(event, GameOverEvent):
+            message = {"t": "over", "reason": event.reason}
+            score = self.state.win_score
+            if score is not None:
+                message.update({"w": self.state.winner, "pts": score.points,
+                                "y": [name for name, _ in score.yaku], "dp": self.state.get_point_changes()})
+            self._broadcast(message)
+
+    def _on_human_turn(self, player_id: int):
+        client = self.clients.get(player_id)
+        if client:
+            client.send({"t": "your_turn", "hand": [tile.kind for tile in self.state.players[player_id].hand],
+                         "tsumo": self.state.can_tsumo(player_id)})
+
+    def _on_claim_offer(self, player_id: int, kind: int, claims: list):
+        client = self.clients.get(player_id)
+        if client:
+            client.send({"t": "claim_offer", "k": kind, "c": [claim.value for claim in claims]})
+
+class TableHost:
+    """
+    1プロセス内で卓を管理する
+    first_id, id_step: 卓IDの採番（複数プロセスで分担する場合に重複しないようにする）
+    """
+    def __init__(self, first_id: int = 1, id_step: int = 1):
+        self.tables = {}
+        self._next_id = first_id
+        self._id_step = id_step
+
+    def create_table(self, human_seats: list, turn_delay: float) -> Table:
+        table = Table(self._next_id, human_seats, turn_delay)
+        self.tables[table.table_id] = table
+        self._next_id += self._id_step
+        return table
+
+    def get_table(self, table_id: int) -> Optional[Table]:
+        return self.tables.get(table_id)
+
+    def remove_finished_tables(self):
+        """終わった卓を取り除く（始まらないまま期限が切れた卓は閉じてから取り除く）"""
+        now = time.monotonic()
+        for table in self.tables.values():
+            if table.is_expired(now):
+                table.close()
+        for table_id in [t.table_id for t in self.tables.values() if t.finished and not t.clients]:
+            del self.tables[table_id]
+
+    def get_load(self) -> dict:
+        active = sum(1 for table in self.tables.values() if table.started and not table.finished)
+        return {"tables": len(self.tables), "active": active}
+
+class TableServer:
+    """TCPでクライアントを受け付け、TableHost の卓に中継する"""
+    def __init__(self, table_host: Optional[TableHost] = None,
+                 host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.table_host = table_host if table_host is not None else TableHost()
+        self.host = host
+        self.port = port
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port, limit=2 ** 16)
+        # port=0 の場合はOSが割り当てたポートを記録する
+        self.port = self.server.sockets[0].getsockname()[1]
+        print(f"サーバー起動: {self.host}:{self.port}")
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        sweeper = asyncio.ensure_future(self._sweep_tables())
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            sweeper.cancel()
+
+    async def _sweep_tables(self):
+        """接続の出入りがなくても、終わった卓・期限切れの卓を定期的に片付ける"""
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL)
+            self.table_host.remove_finished_tables()
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        client = ClientConnection(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    client.send({"t": "err", "msg": "invalid message"})
+                    continue
+                self.handle_message(client, message)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            if client.table:
+                table = client.table
+                table.leave(client)
+                # 人間が全員抜けた卓は終了する
+                if not table.clients:
+                    table.close()
+            self.table_host.remove_finished_tables()
+            writer.close()
+
+    def handle_message(self, client: ClientConnection, message: dict):
+        if not isinstance(message, dict):
+            client.send({"t": "err", "msg": "invalid message"})
+            return
+        message_type = message.get("t")
+        if message_type == "create":
+            humans = message.get("humans", [0])
+            if (not isinstance(humans, list) or not humans
+                    or not all(_is_int(seat) and seat in range(4) for seat in humans)):
+                client.send({"t": "err", "msg": "invalid seats"})
+                return
+            delay = message.get("delay", 1.0)
+            if not (_is_int(delay) or isinstance(delay, float)) or not math.isfinite(delay) or delay < 0:
+                client.send({"t": "err", "msg": "invalid delay"})
+                return
+            table = self.table_host.create_table(humans, float(delay))
+            client.send({"t": "created", "table": table.table_id})
+        elif message_type == "join":
+            table_id = message.get("table")
+            table = self.table_host.get_table(table_id) if _is_int(table_id) else None
+            seat = message.get("seat")
+            if (table is None or client.table is not None or not _is_int(seat)
+                    or not table.join(seat, client)):
+                client.send({"t": "err", "msg": "cannot join"})
+                return
+            client.send({"t": "joined", "table": table.table_id, "seat": client.seat})
+            if table.is_ready():
+                table.start()
+        elif message_type == "discard":
+            table = client.table
+            tile_index = message.get("i")
+            if (table is None or not _is_int(tile_index)
+                    or not table.controller.human_discard(client.seat, tile_index)):
+                client.send({"t": "err", "msg": "cannot discard"})
+                return
+            client.send({"t": "ok"})
+        elif message_type == "tsumo":
+            table = client.table
+            if table is None or not table.controller.human_tsumo(client.seat):
+                client.send({"t": "err", "msg": "cannot tsumo"})
+                return
+            client.send({"t": "ok"})
+        elif message_type == "claim":
+            table = client.table
+            value = message.get("c")
+            try:
+                claim_type = ClaimType(value) if value is not None else None
+            except ValueError:
+                claim_type = None
+                value = "invalid"
+            if (table is None or (value is not None and claim_type is None)
+                    or not table.controller.human_claim(client.seat, claim_type)):
+                client.send({"t": "err", "msg": "cannot claim"})
+                return
+            client.send({"t": "ok"})
+        elif message_type == "state":
+            if client.table is None:
+                client.send({"t": "err", "msg": "not seated"})
+                return
+            client.send(client.table.get_view(client.seat))
+        else:
+            client.send({"t": "err", "msg": "unknown message"})
+
+def main():
+    parser = argparse.ArgumentParser(description="ローカル対戦サーバー")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+
+    exporter = metrics.start_from_args(args)
+    server = TableServer(host=args.host, port=args.port)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("サーバー停止")
+    finally:
+        if exporter:
+            exporter.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import threading
+import time
+import pytest
+from analysis_worker import AnalysisWorker, AnalysisCancelled
+from cpu_player import CPUPlayer
+
+class FakeRoot:
+    """Tk の代わり（after で登録された処理を poll() で実行する）"""
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, delay, callback):
+        self.callbacks.append(callback)
+
+    def poll(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+HAND = [1, 1, 1, 0, 1, 1, 0, 0, 1, 0, 1, 1, 1, 0, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 0, 0, 1, 1, 0, 0, 0, 0, 0, 1]
+
+def test_rank_discards_stops_when_cancelled():
+    checks = []
+
+    def is_cancelled():
+        checks.append(True)
+        return len(checks) > 3
+    with pytest.raises(AnalysisCancelled):
+        CPUPlayer("hard").rank_discards(HAND, is_cancelled=is_cancelled)
+    assert len(checks) == 4
+
+def test_running_analysis_is_cancelled_by_a_newer_request():
+    root = FakeRoot()
+    started = threading.Event()
+    cancelled = []
+    results = []
+
+    def analyze(request, is_cancelled):
+        if request == "slow":
+            started.set()
+            while True:
+                if is_cancelled():
+                    cancelled.append(request)
+                    raise AnalysisCancelled()
+                time.sleep(0.001)
+        return request
+
+    worker = AnalysisWorker(root, analyze, lambda version, result: results.append((version, result)))
+    try:
+        worker.submit(1, "slow")
+        assert started.wait(5.0)
+        worker.submit(2, "fast")
+        deadline = time.monotonic() + 5.0
+        while not results and time.monotonic() < deadline:
+            root.poll()
+            time.sleep(0.01)
+    finally:
+        worker.stop()
+    assert cancelled == ["slow"]
+    assert results == [(2, "fast")]
@@ -0,0 +1,57 @@
+import json
+import time
+from tile import TileType, tile_kind
+from settings import Settings
+from asset_watcher import TileAssets, AssetWatcher, DEFAULT_IMAGE_PATHS
+
+KIND = tile_kind(TileType.MANZU, 3)
+
+def _setup(tmp_path):
+    settings_file = tmp_path / "settings.json"
+    settings = Settings(str(settings_file))
+    image = tmp_path / "m3.png"
+    image.write_bytes(b"a")
+    return settings_file, settings, image
+
+def test_scan_reports_only_changed_kinds(tmp_path):
+    _, settings, image = _setup(tmp_path)
+    assets = TileAssets(settings)
+    default_path = assets.path(KIND)
+    assert default_path in (DEFAULT_IMAGE_PATHS[KIND], None)
+    assert assets.scan() == set()
+
+    settings.set_custom_image(TileType.MANZU, 3, str(image))
+    assert assets.scan() == {KIND}
+    assert assets.path(KIND) == str(image)
+    image.write_bytes(b"changed")
+    assert assets.scan() == {KIND}
+    # 画像が消えたら既定の画像に戻る
+    image.unlink()
+    assert assets.scan() == {KIND}
+    assert assets.path(KIND) == default_path
+
+def test_poll_reloads_settings_and_merges_changes(tmp_path):
+    settings_file, settings, image = _setup(tmp_path)
+    watcher = AssetWatcher(settings, TileAssets(settings))
+    settings_file.write_text(json.dumps({"custom_images": {"manzu_3": str(image)}}), encoding="utf-8")
+    assert watcher.poll() == {KIND}
+    image.write_bytes(b"changed")
+    assert watcher.poll() == {KIND}
+    assert watcher.take_changes() == {KIND}
+    assert watcher.take_changes() == set()
+
+def test_watch_thread_picks_up_changes(tmp_path):
+    _, settings, image = _setup(tmp_path)
+    watcher = AssetWatcher(settings, TileAssets(settings), interval=0.01)
+    watcher.start()
+    try:
+        settings.set_custom_image(TileType.MANZU, 3, str(image))
+        deadline = time.monotonic() + 5
+        changes = set()
+        while not changes and time.monotonic() < deadline:
+            time.sleep(0.01)
+            changes = watcher.take_changes()
+        assert changes == {KIND}
+    finally:
+        watcher.stop()
+    assert watcher._thread is None
@@ -0,0 +1,91 @@
+import asyncio
+import random
+from game_logic import MultiPlayerGameState, PlayerType
+from async_game_controller import AsyncGameController, host_tables
+
+def _human_game(seed: int, on_human_turn=None, on_claim_offer=None, claim_timeout: float = 1.0):
+    """プレイヤー0が人間の1局を進行する（コールバックは controller を受け取る）"""
+    async def main():
+        random.seed(seed)
+        state = MultiPlayerGameState([PlayerType.HUMAN] + [PlayerType.CPU] * 3)
+        controller = AsyncGameController(state, turn_delay=0, claim_timeout=claim_timeout)
+        if on_human_turn:
+            controller.on_human_turn = lambda player_id: on_human_turn(controller, player_id)
+        if on_claim_offer:
+            controller.on_claim_offer = lambda player_id, kind, claims: on_claim_offer(controller, player_id, claims)
+        await asyncio.wait_for(controller.start(), 30)
+        return state
+    return asyncio.run(main())
+
+def test_all_cpu_tables_finish():
+    random.seed(0)
+    states = asyncio.run(host_tables(3, 0))
+    assert len(states) == 3
+    assert all(state.is_game_over() for state in states)
+
+def test_human_discards_and_passes():
+    offers = []
+
+    def discard(controller, player_id):
+        assert controller.is_waiting_for(player_id)
+        assert not controller.human_discard(1, 0)
+        assert controller.human_discard(player_id, len(controller.game_state.players[player_id].hand) - 1)
+        assert not controller.human_discard(player_id, 0)  # 2回目は受け付けない
+
+    def decline(controller, player_id, claims):
+        offers.append(claims)
+        assert controller.is_waiting_claim(player_id)
+        assert controller.human_claim(player_id, None)
+
+    for seed in range(10):
+        state = _human_game(seed, discard, decline)
+        assert state.is_game_over()
+        assert not state.players[0].melds
+    assert offers
+
+def test_unanswered_claims_time_out():
+    offers = []
+
+    def discard(controller, player_id):
+        controller.human_discard(player_id, 0)
+
+    def ignore(controller, player_id, claims):
+        offers.append(player_id)
+
+    for seed in range(10):
+        assert _human_game(seed, discard, ignore, claim_timeout=0.01).is_game_over()
+    assert offers
+
+def test_replacing_the_human_with_a_cpu_mid_turn():
+    def leave(controller, player_id):
+        asyncio.get_running_loop().call_soon(controller.replace_with_cpu, player_id)
+
+    state = _human_game(1, leave)
+    assert state.is_game_over()
+    assert state.players[0].player_type == PlayerType.CPU
+
+def test_replacing_the_human_answers_a_pending_claim():
+    replaced = []
+
+    def discard(controller, player_id):
+        controller.human_discard(player_id, 0)
+
+    def leave(controller, player_id, claims):
+        replaced.append(player_id)
+        asyncio.get_running_loop().call_soon(controller.replace_with_cpu, player_id)
+
+    for seed in range(10):
+        # 返答を待たずに終わるので、claim_timeout まで待たされない
+        assert _human_game(seed, discard, leave, claim_timeout=30).is_game_over()
+        if replaced:
+            break
+    assert replaced
+
+def test_executor_thinking_uses_copies_and_finishes():
+    from concurrent.futures import ThreadPoolExecutor
+    random.seed(5)
+    with ThreadPoolExecutor(2) as executor:
+        states = asyncio.run(host_tables(2, 0, executor))
+    assert all(state.is_game_over() for state in states)
+    for state in states:
+        assert all(len(player.hand) + 3 * len(player.melds) in (13, 14) for player in state.players)
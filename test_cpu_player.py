@@ -0,0 +1,55 @@
+import random
+import numpy as np
+import pytest
+from tile import JIHAI_START
+from game_logic import GameState, Hand
+from cpu_player import CPUPlayer, hand_to_counts
+
+def _hands(count: int, seed: int = 0) -> list:
+    """配牌に1枚ツモった14枚の手牌（Hand）"""
+    random.seed(seed)
+    hands = []
+    for _ in range(count):
+        game = GameState()
+        game.draw_tile()
+        hands.append(Hand(game.hand))
+    return hands
+
+@pytest.mark.parametrize("difficulty", ["hard", "expert"])
+def test_batch_matches_scalar_ranking(difficulty):
+    cpu = CPUPlayer(difficulty)
+    hands = _hands(50)
+    choices = cpu.choose_discard_batch([hand_to_counts(hand) for hand in hands])
+    for hand, kind in zip(hands, choices):
+        assert hand[cpu.choose_discard_tile(hand)].kind == kind
+
+def test_batch_normal_uses_strategic_candidates():
+    cpu = CPUPlayer("normal")
+    hands = _hands(50, seed=1)
+    choices = cpu.choose_discard_batch([hand_to_counts(hand) for hand in hands])
+    for hand, kind in zip(hands, choices):
+        jihai = [tile.kind for tile in hand if tile.kind >= JIHAI_START]
+        isolated = cpu.cache.isolated(hand_to_counts(hand))
+        if jihai:
+            # 字牌があれば手牌の先頭の字牌（scalar と同じ牌）
+            assert kind == hand[cpu.choose_discard_tile(hand)].kind == jihai[0]
+        elif isolated:
+            assert kind in isolated
+        else:
+            assert hand_to_counts(hand)[kind] > 0
+
+def test_batch_handles_empty_rows_and_rejects_bad_shapes():
+    cpu = CPUPlayer("hard")
+    assert cpu.choose_discard_batch(np.zeros((2, 34), dtype=np.int8)).tolist() == [-1, -1]
+    with pytest.raises(ValueError):
+        cpu.choose_discard_batch(np.zeros((2, 33)))
+
+def test_batch_evaluates_each_distinct_hand_once():
+    from hand_cache import HandEvalCache
+    cpu = CPUPlayer("hard", cache=HandEvalCache())
+    counts = np.array([hand_to_counts(hand) for hand in _hands(10, seed=2)] * 3)
+    choices = cpu.choose_discard_batch(counts)
+    assert (choices[:10] == choices[10:20]).all() and (choices[:10] == choices[20:]).all()
+    after = {tuple(row - np.eye(34, dtype=row.dtype)[kind]) for row in counts for kind in np.nonzero(row)[0]}
+    # 向聴数と受け入れで1回ずつ（同じ形に正規化される手牌はさらに少ない）
+    assert cpu.cache.get_stats()['misses'] <= 2 * len(after)
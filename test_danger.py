@@ -0,0 +1,50 @@
+import random
+from danger import DangerTracker, kinds_to_bits
+from game_logic import MultiPlayerGameState, PlayerType
+
+def _tracker_state(tracker: DangerTracker) -> tuple:
+    return (list(tracker.safe_bits), list(tracker.passed_bits), list(tracker.discard_counts),
+            list(tracker.meld_counts))
+
+def test_discard_marks_safe_and_passed_kinds():
+    tracker = DangerTracker()
+    tracker.on_discard(0, 5)
+    assert tracker.get_safe_bits(0) == kinds_to_bits([5])
+    assert all(tracker.get_safe_bits(other) == kinds_to_bits([5]) for other in (1, 2, 3))
+    tracker.on_discard(1, 7)
+    # 捨てた人の見逃しは消え、現物だけが残る
+    assert tracker.get_safe_bits(1) == kinds_to_bits([7])
+    assert tracker.danger_vector(1)[5] == 0.0
+    assert tracker.danger_vector(2)[5] > 0.0
+
+def test_undo_discard_restores_passed_bits():
+    tracker = DangerTracker()
+    history = []
+    for player_id, kind in [(0, 1), (1, 2), (2, 3), (3, 4), (0, 10), (1, 20)]:
+        history.append(_tracker_state(tracker))
+        tracker.on_discard(player_id, kind)
+    for player_id in [1, 0, 3, 2, 1, 0]:
+        assert tracker.undo_discard(player_id)
+        assert _tracker_state(tracker) == history.pop()
+    assert not tracker.undo_discard(0)
+
+def test_undo_is_not_possible_across_claims():
+    tracker = DangerTracker()
+    tracker.on_discard(0, 1)
+    tracker.on_claim(1, 0, 1, False)
+    assert not tracker.undo_discard(0)
+
+def test_state_undo_discard_keeps_tracker_in_step():
+    random.seed(3)
+    state = MultiPlayerGameState([PlayerType.CPU] * 4)
+    for player_id in range(4):
+        state.current_player = player_id
+        state.draw_tile_for_player(player_id)
+        state.discard_tile_for_player(player_id, 0)
+    before = _tracker_state(state.danger)
+    danger = state.get_danger_vector(1)
+    state.draw_tile_for_player(0)
+    state.discard_tile_for_player(0, 0)
+    state.undo_discard(0)
+    assert _tracker_state(state.danger) == before
+    assert state.get_danger_vector(1) == danger
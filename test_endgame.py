@@ -0,0 +1,67 @@
+import random
+from tile import NUM_TILE_KINDS
+from game_logic import GameState
+from hand_cache import HandEvalCache
+from ismcts import WIN_REWARD
+from endgame import EndgameSolver, hand_hash
+
+def _reference(solver: EndgameSolver, counts: list, draws: tuple, depth: int) -> float:
+    """枝刈り・置換表なしで全ての捨て牌を調べた値"""
+    if depth >= len(draws):
+        return solver._evaluate(counts)
+    counts[draws[depth]] += 1
+    if solver.cache.shanten(counts) == -1:
+        value = WIN_REWARD
+    else:
+        value = -1.0
+        for kind in range(NUM_TILE_KINDS):
+            if counts[kind]:
+                counts[kind] -= 1
+                value = max(value, _reference(solver, counts, draws, depth + 1))
+                counts[kind] += 1
+    counts[draws[depth]] -= 1
+    return value
+
+def test_search_matches_exhaustive_reference():
+    rng = random.Random(0)
+    solver = EndgameSolver(HandEvalCache())
+    for seed in range(15):
+        random.seed(seed)
+        game = GameState()
+        counts = [0] * NUM_TILE_KINDS
+        for tile in game.hand:
+            counts[tile.kind] += 1
+        unseen = [kind for kind in range(NUM_TILE_KINDS) for _ in range(4 - counts[kind])]
+        draws = tuple(rng.sample(unseen, 3))
+        solver.table.clear()
+        value = solver._after_discard(counts, hand_hash(counts), draws, 0)
+        assert value == _reference(solver, list(counts), draws, 0)
+
+def test_keeps_the_wait_when_it_is_the_only_unseen_tile():
+    # 123456789萬 11筒 23筒 中（中を捨てれば4筒・1筒待ち）
+    counts = [0] * NUM_TILE_KINDS
+    for kind in [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 9, 10, 11, 33]:
+        counts[kind] += 1
+    remaining = [0] * NUM_TILE_KINDS
+    remaining[12] = 4
+    solver = EndgameSolver(HandEvalCache(), max_samples=4)
+    # 同点なら先の候補を選ぶので、中を最後に並べても中を選ぶのは評価が高い時だけ
+    assert solver.solve(counts, remaining, 12, order=list(range(NUM_TILE_KINDS))) == 33
+    assert solver.last_samples == 4
+
+def test_single_candidate_and_empty_hand():
+    solver = EndgameSolver(HandEvalCache())
+    counts = [0] * NUM_TILE_KINDS
+    assert solver.solve(counts, [4] * NUM_TILE_KINDS, 8) == -1
+    counts[5] = 2
+    assert solver.solve(counts, [4] * NUM_TILE_KINDS, 8) == 5
+    assert solver.last_samples == 0
+
+def test_should_stop_ends_the_sampling():
+    counts = [0] * NUM_TILE_KINDS
+    for kind in [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 9, 10, 11, 33]:
+        counts[kind] += 1
+    solver = EndgameSolver(HandEvalCache(), max_samples=100)
+    kind = solver.solve(counts, [4 - count for count in counts], 12, should_stop=lambda: True)
+    assert counts[kind] > 0
+    assert solver.last_samples == 0
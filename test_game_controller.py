@@ -0,0 +1,54 @@
+import random
+import time
+from game_logic import MultiPlayerGameState, PlayerType
+from game_controller import GameController
+
+def _controller(difficulty: str) -> GameController:
+    random.seed(0)
+    state = MultiPlayerGameState([PlayerType.HUMAN] + [PlayerType.CPU] * 3)
+    state.current_player = 1
+    controller = GameController(state)
+    controller.set_cpu_difficulty(difficulty)
+    controller.set_turn_delay(5.0)
+    return controller
+
+def _wait_until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+def test_stop_interrupts_thinking_and_keeps_the_state():
+    controller = _controller("expert")
+    state = controller.game_state
+    controller.start_auto_play()
+    _wait_until(lambda: len(state.players[1].hand) == 14)
+    time.sleep(0.1)  # 思考中
+    start = time.monotonic()
+    controller.stop_auto_play()
+    assert time.monotonic() - start < 1.0
+    assert controller.auto_play_thread is None
+    # 止めた後に捨て牌・手番の移動をしない
+    assert len(state.players[1].hand) == 14
+    assert not state.players[1].discarded
+    assert state.current_player == 1
+
+def test_restart_after_stop_continues_with_the_new_thread():
+    controller = _controller("hard")
+    controller.set_turn_delay(0.1)
+    state = controller.game_state
+    controller.start_auto_play()
+    controller.stop_auto_play()
+    controller.start_auto_play()
+    try:
+        # 人間（プレイヤー0）の手番まで進む
+        _wait_until(lambda: state.current_player == 0)
+    finally:
+        controller.stop_auto_play()
+    assert [len(state.players[i].discarded) for i in (1, 2, 3)] == [1, 1, 1]
+
+def test_manual_turn_is_not_affected_by_a_previous_stop():
+    controller = _controller("expert")
+    controller.stop_auto_play()
+    controller._process_cpu_turn(1, time.monotonic() + 0.05)
+    assert len(controller.game_state.players[1].discarded) == 1
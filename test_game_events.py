@@ -0,0 +1,53 @@
+import random
+from game_logic import MultiPlayerGameState, PlayerType
+from game_events import EventLog, DrawEvent, GameOverEvent
+from game_controller import iter_game_events
+from game_snapshot import GameSnapshot
+
+def _play_until(reason: str, max_games: int = 200):
+    """終局理由が reason になる対局を探す（(状態, 記録) を返す）"""
+    for seed in range(max_games):
+        random.seed(seed)
+        state = MultiPlayerGameState([PlayerType.CPU] * 4)
+        log = EventLog(state.events)
+        for event in iter_game_events(state):
+            if isinstance(event, GameOverEvent) and event.reason == reason:
+                return state, log
+        log.close()
+    raise AssertionError(f"{reason} で終わる対局がありませんでした")
+
+def test_undo_past_tsumo_restores_a_playable_state():
+    state, log = _play_until("tsumo")
+    winner, kind = state.winner, state.win_kind
+
+    assert log.can_undo()
+    assert isinstance(log.undo(state), GameOverEvent)
+    assert state.game_active
+    assert (state.winner, state.win_kind, state.win_from, state.win_score) == (-1, -1, -1, None)
+    assert state.can_tsumo(winner)
+
+    event = log.undo(state)
+    assert isinstance(event, DrawEvent) and (event.player_id, event.kind) == (winner, kind)
+    assert state.players[winner].needs_draw()
+    assert not state.is_game_over()
+
+def test_undo_stops_at_ron():
+    state, log = _play_until("ron")
+    before = GameSnapshot.from_state(state).to_bytes()
+    assert not log.can_undo()
+    assert log.undo(state) is None
+    assert GameSnapshot.from_state(state).to_bytes() == before
+    assert not state.game_active
+
+def test_undo_draw_and_discard_round_trip():
+    random.seed(0)
+    state = MultiPlayerGameState([PlayerType.CPU] * 4)
+    log = EventLog(state.events)
+    before = GameSnapshot.from_state(state).to_bytes()
+    counts = [list(counts) for counts in state.remaining_counts]
+    state.draw_tile_for_player(0)
+    state.discard_tile_for_player(0, 0)
+    while log.can_undo():
+        log.undo(state)
+    assert GameSnapshot.from_state(state).to_bytes() == before
+    assert state.remaining_counts == counts
@@ -0,0 +1,144 @@
+import random
+from tile import Tile, NUM_TILE_KINDS, JIHAI_START, kind_to_type_number
+from game_logic import Hand, MultiPlayerGameState, PlayerType, ClaimType
+from game_snapshot import GameSnapshot
+
+def _tile(kind: int) -> Tile:
+    return Tile(*kind_to_type_number(kind))
+
+def _check_hand(hand: Hand, counts: list):
+    """枚数・並び・鳴ける牌種の集合が、枚数から直接求めたものと一致するか"""
+    assert hand.kind_counts() == counts
+    assert len(hand) == sum(counts)
+    assert [tile.kind for tile in hand] == [kind for kind in range(NUM_TILE_KINDS) for _ in range(counts[kind])]
+    assert hand.pon_kinds == {kind for kind in range(NUM_TILE_KINDS) if counts[kind] >= 2}
+    assert hand.chi_kinds == {kind for kind in range(JIHAI_START) if hand.chi_patterns(kind)}
+
+def test_hand_bookkeeping_under_random_operations():
+    rng = random.Random(0)
+    hand = Hand()
+    counts = [0] * NUM_TILE_KINDS
+    for _ in range(2000):
+        operation = rng.random()
+        if operation < 0.4 or not len(hand):
+            kind = rng.randrange(NUM_TILE_KINDS)
+            hand.append(_tile(kind))
+            counts[kind] += 1
+        elif operation < 0.6:
+            tile = hand.pop(rng.randrange(len(hand)))
+            counts[tile.kind] -= 1
+        elif operation < 0.8:
+            kind = rng.randrange(NUM_TILE_KINDS)
+            tile = hand.pop_kind(kind)
+            assert (tile is None) == (counts[kind] == 0)
+            if tile is not None:
+                counts[kind] -= 1
+        elif operation < 0.95:
+            tile = hand[rng.randrange(len(hand))]
+            hand.remove(tile)
+            counts[tile.kind] -= 1
+        else:
+            kinds = [rng.randrange(NUM_TILE_KINDS) for _ in range(rng.randrange(1, 14))]
+            hand.extend([_tile(kind) for kind in kinds])
+            for kind in kinds:
+                counts[kind] += 1
+        _check_hand(hand, counts)
+    hand.clear()
+    _check_hand(hand, [0] * NUM_TILE_KINDS)
+
+def test_remove_prefers_the_same_object():
+    first, second = _tile(3), _tile(3)
+    hand = Hand([first, second])
+    hand.remove(second)
+    assert hand[0] is first
+    assert _tile(3) in hand and _tile(4) not in hand
+
+def test_chi_patterns_stay_within_a_suit():
+    hand = Hand([_tile(kind) for kind in (7, 8, 9, 10)])  # 8m 9m 1p 2p
+    assert hand.chi_patterns(6) == [(7, 8)]
+    assert hand.chi_patterns(11) == [(9, 10)]
+    assert hand.chi_patterns(8) == []  # 9m と 1p は続かない
+
+def _expected_counts(state):
+    visible = [0] * NUM_TILE_KINDS
+    for player in state.players:
+        for tile in player.discarded:
+            visible[tile.kind] += 1
+        for meld in player.melds:
+            for tile in meld.tiles:
+                visible[tile.kind] += 1
+    remaining = [[4 - visible[kind] - player.hand.count_kind(kind) for kind in range(NUM_TILE_KINDS)]
+                 for player in state.players]
+    return visible, remaining
+
+def test_visible_and_remaining_counts_follow_every_event():
+    from game_controller import iter_game_events
+    from cpu_player import CPUPlayer
+    for seed in range(5):
+        random.seed(seed)
+        state = MultiPlayerGameState([PlayerType.CPU] * 4)
+        cpus = {player.player_id: CPUPlayer("hard") for player in state.players}
+        for _ in iter_game_events(state, cpus):
+            assert (state.visible_counts, state.remaining_counts) == _expected_counts(state)
+
+def _claim_position(hands: list, with_mountain: bool = True) -> MultiPlayerGameState:
+    """指定した手牌（牌種の並び）から始めて、プレイヤー0が5萬（牌種4）を捨てた局面"""
+    counts = [bytearray(NUM_TILE_KINDS) for _ in hands]
+    for player_counts, kinds in zip(counts, hands):
+        for kind in kinds:
+            player_counts[kind] += 1
+    left = [4 - sum(player_counts[kind] for player_counts in counts) for kind in range(NUM_TILE_KINDS)]
+    assert min(left) >= 0
+    mountain = bytearray(kind for kind in range(NUM_TILE_KINDS) for _ in range(left[kind])) if with_mountain else bytearray()
+    state = MultiPlayerGameState([PlayerType.CPU] * 4)
+    GameSnapshot(mountain, counts, [bytearray() for _ in hands]).restore(state)
+    tile = next(tile for tile in state.players[0].hand if tile.kind == 4)
+    assert state.discard_tile_by_object_for_player(0, tile)
+    return state
+
+_DISCARDER = [4, 8, 9, 10, 11, 15, 16, 17, 18, 19, 20, 21, 22, 23]
+_TANKI = [0, 1, 2, 12, 13, 14, 24, 25, 26, 27, 27, 27, 4]  # 5萬の単騎待ち
+_PAIR = [4, 4, 6, 7, 10, 12, 15, 18, 21, 24, 28, 30, 33]
+_CHI = [3, 5, 28, 28, 29, 29, 30, 30, 31, 31, 32, 32, 33]
+_TANKI_2 = [0, 1, 2, 12, 13, 14, 24, 25, 26, 28, 28, 28, 4]
+_OTHER = [6, 7, 10, 12, 15, 18, 21, 24, 28, 30, 32, 33, 33]
+
+def test_claim_options_and_priority():
+    state = _claim_position([_DISCARDER, _CHI, _PAIR, _TANKI])
+    assert state.get_claim_options() == {1: [ClaimType.CHI], 2: [ClaimType.PON], 3: [ClaimType.RON]}
+    requests = {1: (ClaimType.CHI, (3, 5)), 2: (ClaimType.PON, None), 3: (ClaimType.RON, None)}
+    assert state.resolve_claims(requests) == (3, ClaimType.RON)
+    assert state.winner == 3 and state.win_from == 0 and not state.game_active
+    assert (state.visible_counts, state.remaining_counts) == _expected_counts(state)
+
+def test_pon_beats_chi_and_takes_the_turn():
+    state = _claim_position([_DISCARDER, _CHI, _PAIR, _TANKI])
+    assert state.resolve_claims({1: (ClaimType.CHI, (3, 5)), 2: (ClaimType.PON, None), 3: None}) == (2, ClaimType.PON)
+    assert state.current_player == 2
+    assert [tile.kind for tile in state.players[2].melds[0].tiles] == [4, 4, 4]
+    assert not state.players[0].discarded
+    assert (state.visible_counts, state.remaining_counts) == _expected_counts(state)
+
+def test_same_claims_go_to_the_nearest_seat():
+    state = _claim_position([_DISCARDER, _TANKI, _OTHER, _TANKI_2])
+    assert state.resolve_claims({1: (ClaimType.RON, None), 3: (ClaimType.RON, None)}) == (1, ClaimType.RON)
+
+def test_chi_only_from_the_previous_seat():
+    state = _claim_position([_DISCARDER, _OTHER, _CHI, _TANKI])
+    assert ClaimType.CHI not in state.get_claim_options().get(2, [])
+    assert not state.claim_tile(2, ClaimType.CHI, (3, 5))
+    assert state.players[0].discarded
+
+def test_last_discard_can_only_be_ron():
+    state = _claim_position([_DISCARDER, _CHI, _PAIR, _TANKI], with_mountain=False)
+    assert state.get_claim_options() == {3: [ClaimType.RON]}
+
+def test_invalid_claims_fall_back_to_the_next_candidate():
+    state = _claim_position([_DISCARDER, _CHI, _PAIR, _OTHER])
+    # プレイヤー3はロンできず、プレイヤー1はポンできない
+    assert state.resolve_claims({3: (ClaimType.RON, None), 1: (ClaimType.PON, None),
+                                 2: (ClaimType.PON, None)}) == (2, ClaimType.PON)
+    state = _claim_position([_DISCARDER, _CHI, _PAIR, _OTHER])
+    assert state.resolve_claims({1: (ClaimType.CHI, (2, 3)), 3: (ClaimType.RON, None)}) is None
+    assert state.players[0].discarded and not state.players[1].melds
+    assert state.resolve_claims({1: (ClaimType.CHI, (3, 5))}) == (1, ClaimType.CHI)
@@ -0,0 +1,89 @@
+import random
+import pytest
+from game_logic import MultiPlayerGameState, PlayerType, ClaimType
+from game_controller import iter_game_events
+from game_events import ClaimEvent
+from cpu_player import CPUPlayer
+from game_snapshot import GameSnapshot, save_game, load_game
+
+def _state_with_claim(max_games: int = 50) -> MultiPlayerGameState:
+    """ポン・チーが起きた直後で止めた対局（鳴きも保存されるか確かめるため）"""
+    for seed in range(max_games):
+        random.seed(seed)
+        state = MultiPlayerGameState([PlayerType.CPU] * 4)
+        cpus = {player.player_id: CPUPlayer("hard") for player in state.players}
+        for event in iter_game_events(state, cpus):
+            if isinstance(event, ClaimEvent) and event.claim_type != ClaimType.RON.value:
+                return state
+    raise AssertionError("鳴きのある対局がありませんでした")
+
+def test_bytes_and_restore_round_trip():
+    state = _state_with_claim()
+    snapshot = GameSnapshot.from_state(state)
+    data = snapshot.to_bytes()
+    assert GameSnapshot.from_bytes(data).to_bytes() == data
+
+    restored = MultiPlayerGameState([PlayerType.CPU] * 4)
+    GameSnapshot.from_bytes(data).restore(restored)
+    assert GameSnapshot.from_state(restored).to_bytes() == data
+    assert restored.visible_counts == state.visible_counts
+    assert restored.remaining_counts == state.remaining_counts
+    assert [[meld.kinds() for meld in player.melds] for player in restored.players] == \
+        [[meld.kinds() for meld in player.melds] for player in state.players]
+
+def test_save_and_load_game(tmp_path):
+    random.seed(2)
+    state = MultiPlayerGameState([PlayerType.CPU] * 4)
+    state.draw_tile_for_player(0)
+    state.discard_tile_for_player(0, 3)
+    path = str(tmp_path / "game.bin")
+    assert save_game(state, path)
+    loaded = MultiPlayerGameState([PlayerType.CPU] * 4)
+    assert load_game(loaded, path)
+    assert GameSnapshot.from_state(loaded).to_bytes() == GameSnapshot.from_state(state).to_bytes()
+
+def test_load_rejects_broken_files(tmp_path):
+    state = MultiPlayerGameState([PlayerType.CPU] * 4)
+    data = GameSnapshot.from_state(state).to_bytes()
+    before = GameSnapshot.from_state(state).to_bytes()
+    hands_start = 6 + data[5]
+
+    def changed(pos: int, value: int) -> bytes:
+        broken = bytearray(data)
+        broken[pos] = value
+        return bytes(broken)
+    broken_files = [
+        b"XX" + data[2:], data[:-5], data + b"\0", data[:2],
+        changed(6, 200),                      # 山に存在しない牌種
+        changed(3, 4),                        # 手番
+        changed(hands_start, 4),              # 5枚目の牌
+        changed(len(data) - 3, 7),            # 和了者
+    ]
+    for broken in broken_files:
+        path = tmp_path / "broken.bin"
+        path.write_bytes(broken)
+        assert not load_game(state, str(path))
+    assert GameSnapshot.from_state(state).to_bytes() == before
+
+def test_broken_melds_are_rejected():
+    state = _state_with_claim()
+    snapshot = GameSnapshot.from_state(state)
+    player_id = next(i for i, melds in enumerate(snapshot.melds) if melds)
+    code, from_player, claimed_kind, first_kind = snapshot.melds[player_id][0]
+    for meld in [(9, from_player, claimed_kind, first_kind), (code, player_id, claimed_kind, first_kind),
+                 (code, from_player, 40, first_kind), (1, from_player, 33, 33)]:
+        snapshot.melds[player_id][0] = meld
+        with pytest.raises(ValueError):
+            GameSnapshot.from_bytes(snapshot.to_bytes())
+
+def test_snapshot_moves_match_the_state():
+    random.seed(4)
+    state = MultiPlayerGameState([PlayerType.CPU] * 4)
+    snapshot = GameSnapshot.from_state(state)
+    kind = snapshot.draw(0)
+    assert state.draw_tile_for_player(0).kind == kind
+    assert snapshot.discard(0, kind)
+    state.discard_tile_by_object_for_player(0, state.players[0].hand[[t.kind for t in state.players[0].hand].index(kind)])
+    snapshot.next_turn()
+    state.next_turn()
+    assert snapshot.to_bytes() == GameSnapshot.from_state(state).to_bytes()
@@ -0,0 +1,68 @@
+import random
+import hand_analysis
+from tile import NUM_TILE_KINDS
+from hand_cache import HandEvalCache, canonicalize_counts
+
+def _random_counts(rng: random.Random, size: int = 13) -> list:
+    counts = [0] * NUM_TILE_KINDS
+    tiles = [kind for kind in range(NUM_TILE_KINDS) for _ in range(4)]
+    for kind in rng.sample(tiles, size):
+        counts[kind] += 1
+    return counts
+
+def test_cached_results_match_direct_evaluation():
+    rng = random.Random(0)
+    cache = HandEvalCache()
+    for _ in range(200):
+        counts = _random_counts(rng)
+        assert cache.shanten(counts) == hand_analysis.calculate_shanten(counts)
+        assert cache.ukeire(counts) == sorted(hand_analysis.calculate_ukeire(counts))
+        assert cache.isolated(counts) == sorted(hand_analysis.find_isolated_kinds(counts))
+
+def test_suit_and_honor_permutations_share_an_entry():
+    counts = [0] * NUM_TILE_KINDS
+    for kind in (0, 1, 2, 12, 13, 14, 24, 25, 26, 27, 27, 27, 4):
+        counts[kind] += 1
+    swapped = counts[9:18] + counts[0:9] + counts[18:27] + counts[27:][::-1]
+    assert canonicalize_counts(counts)[0] == canonicalize_counts(swapped)[0]
+    cache = HandEvalCache()
+    cache.shanten(counts)
+    cache.shanten(swapped)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_least_recently_used_entries_are_evicted():
+    rng = random.Random(1)
+    cache = HandEvalCache(maxsize=3)
+    hands = [_random_counts(rng) for _ in range(4)]
+    for counts in hands[:3]:
+        cache.shanten(counts)
+    cache.shanten(hands[0])  # 最初の手牌を使い直すので、次に追い出されるのは2番目
+    cache.shanten(hands[3])
+    assert cache.get_stats()['size'] == 3
+    misses = cache.misses
+    cache.shanten(hands[0])
+    assert cache.misses == misses
+    cache.shanten(hands[1])
+    assert cache.misses == misses + 1
+
+def _counts(kinds) -> list:
+    counts = [0] * NUM_TILE_KINDS
+    for kind in kinds:
+        counts[kind] += 1
+    return counts
+
+def test_waits_of_tenpai_hands():
+    cache = HandEvalCache()
+    # 123m 456p 789s 東東東 5m 単騎
+    assert cache.waits(_counts([0, 1, 2, 12, 13, 14, 24, 25, 26, 27, 27, 27, 4])) == [4]
+    # 23m 両面（1m・4m）
+    assert cache.waits(_counts([1, 2, 12, 13, 14, 24, 25, 26, 27, 27, 27, 30, 30])) == [0, 3]
+    # 鳴いて4枚になった手牌のシャンポン待ち
+    assert cache.waits(_counts([5, 5, 30, 30]), melds=3) == [5, 30]
+    # 聴牌していない
+    assert cache.waits(_counts([0, 4, 8, 9, 13, 17, 18, 22, 26, 27, 28, 29, 30])) == []
+
+def test_discard_waits_lists_every_tenpai_discard():
+    cache = HandEvalCache()
+    counts = _counts([0, 1, 2, 12, 13, 14, 24, 25, 26, 27, 27, 27, 4, 8])
+    assert cache.discard_waits(counts) == {4: [8], 8: [4]}
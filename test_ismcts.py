@@ -0,0 +1,68 @@
+import random
+import time
+from tile import NUM_TILE_KINDS
+from game_logic import GameState
+from hand_cache import HandEvalCache
+from ismcts import ISMCTSSearch
+
+def _position(seed: int):
+    """配牌に1枚ツモった14枚と、自分から見た未見牌の枚数"""
+    random.seed(seed)
+    game = GameState()
+    game.draw_tile()
+    counts = [0] * NUM_TILE_KINDS
+    for tile in game.hand:
+        counts[tile.kind] += 1
+    return counts, [4 - count for count in counts]
+
+def test_always_returns_a_tile_in_hand():
+    searcher = ISMCTSSearch(HandEvalCache(), max_iterations=30)
+    for seed in range(10):
+        counts, remaining = _position(seed)
+        searcher.root = None
+        assert counts[searcher.search(counts, remaining, 60)] > 0
+
+def test_max_iterations_without_deadline():
+    searcher = ISMCTSSearch(HandEvalCache(), max_iterations=25)
+    counts, remaining = _position(0)
+    searcher.search(counts, remaining, 60)
+    assert searcher.last_iterations == 25
+
+def test_deadline_is_respected():
+    searcher = ISMCTSSearch(HandEvalCache(), max_iterations=1)
+    counts, remaining = _position(1)
+    start = time.monotonic()
+    searcher.search(counts, remaining, 60, deadline=start + 0.05)
+    assert time.monotonic() - start < 0.5
+    assert searcher.last_iterations > 1  # 期限があれば max_iterations は使わない
+    # 期限を過ぎていても1回は探索する
+    searcher.root = None
+    assert counts[searcher.search(counts, remaining, 60, deadline=start - 1)] > 0
+    assert searcher.last_iterations == 1
+
+def test_should_stop_ends_the_search():
+    searcher = ISMCTSSearch(HandEvalCache(), max_iterations=1000)
+    counts, remaining = _position(2)
+    assert counts[searcher.search(counts, remaining, 60, should_stop=lambda: True)] > 0
+    assert searcher.last_iterations == 0
+    calls = []
+    searcher.root = None
+    searcher.search(counts, remaining, 60, deadline=time.monotonic() + 60,
+                    should_stop=lambda: calls.append(1) or len(calls) > 10)
+    assert searcher.last_iterations == 10
+
+def test_subtree_is_reused_on_the_next_turn():
+    searcher = ISMCTSSearch(HandEvalCache(), max_iterations=100)
+    counts, remaining = _position(3)
+    kind = searcher.search(counts, remaining, 60)
+    drawn, child = next(iter(searcher.root.actions[kind].children.items()))
+    visits = child.visits
+    counts[kind] -= 1
+    counts[drawn] += 1
+    remaining[drawn] -= 1
+    searcher.search(counts, remaining, 56)
+    assert searcher.root is child
+    assert child.visits == visits + 100
+    # 鳴いた後は手牌の形が変わるので作り直す
+    searcher.search(counts, remaining, 56, melds=1)
+    assert searcher.root is not child
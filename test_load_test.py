@@ -0,0 +1,25 @@
+import asyncio
+from table_server import TableServer
+from load_test import run_load_test
+
+def _run_against_server(server: TableServer, clients: int, turn_delay: float) -> dict:
+    async def main():
+        await server.start()
+        try:
+            return await run_load_test(clients, server.host, server.port, turn_delay, ramp=0)
+        finally:
+            server.server.close()
+            await server.server.wait_closed()
+    return asyncio.run(main())
+
+def test_games_complete():
+    stats = _run_against_server(TableServer(port=0), clients=3, turn_delay=0)
+    assert stats['games'] == 3
+    assert stats['setup_errors'] == stats['disconnects'] == 0
+    assert stats['actions'] > 0
+
+def test_rejected_create_is_counted_and_does_not_stop_the_run():
+    # 負の進行間隔はサーバーが err で断る
+    stats = _run_against_server(TableServer(port=0), clients=3, turn_delay=-1)
+    assert stats['setup_errors'] == 3
+    assert stats['games'] == stats['disconnects'] == 0
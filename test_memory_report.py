@@ -0,0 +1,14 @@
+import tracemalloc
+from memory_report import measure_table_cost, run_stress
+
+def test_table_cost_is_measured():
+    assert measure_table_cost(5) > 0
+    assert not tracemalloc.is_tracing()
+
+def test_stress_growth_excludes_warmup_and_bounded_caches():
+    result = run_stress(games=6, sample_every=3, warmup_games=3)
+    assert [game for game, _ in result.samples] == [0, 3, 6]
+    assert result.warmup_games == 3
+    # 対局ごとに残るものがなければ、増加は1局あたり数KB未満に収まる
+    assert result.growth_per_game < 4096
+    assert not tracemalloc.is_tracing()
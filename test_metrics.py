@@ -0,0 +1,32 @@
+import metrics
+from metrics import Registry, Counter
+
+def _sample(text: str, name: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.split()[1])
+    raise AssertionError(f"{name} がありません")
+
+def test_hand_cache_hits_and_misses_are_counters():
+    text = metrics.REGISTRY.render()
+    assert "# TYPE donjara_hand_cache_hits_total counter" in text
+    assert "# TYPE donjara_hand_cache_misses_total counter" in text
+    assert "# TYPE donjara_hand_cache_size gauge" in text
+
+def test_turn_rate_is_not_reset_by_other_scrapers():
+    metrics.TURNS.inc(10)
+    first = _sample(metrics.REGISTRY.render(), "donjara_turns_per_second")
+    second = _sample(metrics.REGISTRY.render(), "donjara_turns_per_second")
+    assert first > 0
+    assert second > 0
+
+def test_registry_renders_counters_and_collectors():
+    registry = Registry()
+    counter = registry.register(Counter("test_events_total", "テスト", ("kind",)))
+    counter.labels(kind="a").inc(3)
+    registry.add_collector(lambda: [("test_size", "大きさ", {}, 5)])
+    registry.add_collector(lambda: [("test_seen_total", "累計", {"x": "1"}, 7)], "counter")
+    text = registry.render()
+    assert 'test_events_total{kind="a"} 3' in text
+    assert "# TYPE test_size gauge" in text and "test_size 5" in text
+    assert "# TYPE test_seen_total counter" in text and 'test_seen_total{x="1"} 7' in text
@@ -0,0 +1,98 @@
+import random
+import numpy as np
+import pytest
+from tile import NUM_TILE_KINDS
+from cpu_player import CPUPlayer
+from hand_cache import HandEvalCache
+import puzzles
+from puzzles import Puzzle, NO_DISCARD, evaluate_discards_batch, generate_puzzles, save_puzzles, load_puzzles
+
+def _counts(hands: list) -> np.ndarray:
+    counts = np.zeros((len(hands), NUM_TILE_KINDS), dtype=np.int8)
+    for i, hand in enumerate(hands):
+        np.add.at(counts[i], hand, 1)
+    return counts
+
+def test_batch_matches_scalar_ranking():
+    random.seed(0)
+    hands = [puzzles._deal_hand() for _ in range(40)]
+    hands += hands[:5]  # 同じ手牌が何度あっても同じ結果
+    counts = _counts(hands)
+    shanten, ukeire = evaluate_discards_batch(counts, HandEvalCache())
+    cpu = CPUPlayer("hard")
+    for row, hand_counts in enumerate(counts.tolist()):
+        remaining = [4 - count for count in hand_counts]
+        expected = {r['kind']: (r['shanten'], r['ukeire']) for r in cpu.rank_discards(hand_counts, remaining)}
+        for kind in range(NUM_TILE_KINDS):
+            if kind in expected:
+                assert (shanten[row, kind], ukeire[row, kind]) == expected[kind]
+            else:
+                assert (shanten[row, kind], ukeire[row, kind]) == (NO_DISCARD, 0)
+
+def test_batch_rejects_bad_shapes():
+    with pytest.raises(ValueError):
+        evaluate_discards_batch(np.zeros((2, 33), dtype=np.int8))
+
+def test_generated_puzzles_have_a_real_choice():
+    random.seed(1)
+    generated = generate_puzzles(20, batch_size=16, cache=HandEvalCache())
+    assert len(generated) == 20
+    shanten, ukeire = evaluate_discards_batch(_counts([list(p.kinds) for p in generated]))
+    for row, puzzle in enumerate(generated):
+        assert len(puzzle.kinds) == 14 and list(puzzle.kinds) == sorted(puzzle.kinds)
+        assert min(puzzle.shanten) >= 0
+        assert len(puzzle.best_kinds()) < len(set(puzzle.kinds))
+        assert puzzle.shanten == tuple(int(shanten[row, kind]) for kind in puzzle.kinds)
+        assert puzzle.ukeire == tuple(int(ukeire[row, kind]) for kind in puzzle.kinds)
+
+def test_grading():
+    random.seed(2)
+    puzzle = generate_puzzles(1, batch_size=8)[0]
+    best = puzzle.best_kinds()
+    assert puzzle.grade(best[0])[0]
+    wrong = next(kind for kind in puzzle.kinds if kind not in best)
+    correct, message = puzzle.grade(wrong)
+    assert not correct and "不正解" in message
+    missing = next(kind for kind in range(NUM_TILE_KINDS) if kind not in puzzle.kinds)
+    assert puzzle.grade(missing) == (False, "手牌にない牌です")
+
+def test_file_round_trip(tmp_path):
+    random.seed(3)
+    generated = generate_puzzles(5, batch_size=8)
+    path = str(tmp_path / "puzzles.bin")
+    assert save_puzzles(generated, path)
+    puzzle_file = load_puzzles(path)
+    try:
+        assert len(puzzle_file) == 5
+        assert [puzzle_file[i] for i in reversed(range(5))] == list(reversed(generated))
+        with pytest.raises(IndexError):
+            puzzle_file[5]
+    finally:
+        puzzle_file.close()
+
+def test_broken_files_are_rejected(tmp_path):
+    path = tmp_path / "puzzles.bin"
+    save_puzzles([Puzzle(tuple(range(14)), (1,) * 14, (4,) * 14)], str(path))
+    data = path.read_bytes()
+    for broken in (b"XX" + data[2:], data[:-1], data[:3], data[:puzzles.HEADER.size] + b"\x50" + data[puzzles.HEADER.size + 1:]):
+        path.write_bytes(broken)
+        assert load_puzzles(str(path)) is None
+
+def test_records_with_bad_kinds_are_rejected(tmp_path):
+    good = Puzzle(tuple(range(14)), (1,) * 14, (4,) * 14)
+    path = tmp_path / "puzzles.bin"
+    save_puzzles([good, good], str(path))
+    data = bytearray(path.read_bytes())
+    data[puzzles.HEADER.size + puzzles.RECORD.size] = 40  # 2問目の最初の牌種
+    path.write_bytes(bytes(data))
+    puzzle_file = load_puzzles(str(path))
+    try:
+        assert puzzle_file[0] == good
+        with pytest.raises(ValueError):
+            puzzle_file[1]
+    finally:
+        puzzle_file.close()
+    with pytest.raises(ValueError):
+        Puzzle.from_bytes(bytes([5] * 14) + bytes(28))  # 同じ牌種が5枚以上
+    with pytest.raises(ValueError):
+        Puzzle.from_bytes(good.to_bytes()[:-1])
@@ -0,0 +1,76 @@
+import random
+import pytest
+from game_logic import MultiPlayerGameState, PlayerType
+from game_controller import iter_game_events
+from game_events import GameOverEvent
+from cpu_player import CPUPlayer
+from game_snapshot import GameSnapshot
+from replay import GameRecord, GameRecorder, OP_DRAW, OP_TURN, OP_PON, OP_CHI, save_record, load_record
+
+def _record_game(seed: int, keyframe_interval: int):
+    """CPU同士の1局を記録し、1手ごとの実際の状態（スナップショットのバイト列）も集める"""
+    random.seed(seed)
+    state = MultiPlayerGameState([PlayerType.CPU] * 4)
+    recorder = GameRecorder(state, keyframe_interval)
+    states = [GameSnapshot.from_state(state).to_bytes()]
+
+    def capture(event):
+        # 記録された手の数だけ状態を集める（GameRecorder の後に呼ばれる）
+        if len(recorder.record) == len(states):
+            states.append(GameSnapshot.from_state(state).to_bytes())
+    state.events.subscribe(capture)
+    reason = None
+    cpus = {player.player_id: CPUPlayer("normal") for player in state.players}
+    for event in iter_game_events(state, cpus):
+        if isinstance(event, GameOverEvent):
+            reason = event.reason
+    recorder.close()
+    return recorder.record, states, reason
+
+@pytest.mark.parametrize("seed", range(6))
+def test_every_position_matches_the_played_game(seed):
+    record, states, _ = _record_game(seed, keyframe_interval=5)
+    assert len(states) == len(record) + 1
+    for position, expected in enumerate(states):
+        assert record.snapshot_at(position).to_bytes() == expected
+    assert record.snapshot_at(len(record) + 10).to_bytes() == states[-1]
+
+def test_game_endings_are_recorded():
+    reasons = {_record_game(seed, keyframe_interval=32)[2] for seed in range(30)}
+    assert reasons >= {"tsumo", "ron"}
+
+def test_bytes_and_file_round_trip(tmp_path):
+    record, states, _ = _record_game(1, keyframe_interval=32)
+    data = record.to_bytes()
+    loaded = GameRecord.from_bytes(data, keyframe_interval=7)
+    assert loaded.deltas == record.deltas
+    assert loaded.snapshot_at(len(loaded)).to_bytes() == states[-1]
+    path = str(tmp_path / "game.rec")
+    assert save_record(record, path)
+    assert load_record(path).to_bytes() == data
+
+def test_broken_records_are_rejected(tmp_path):
+    record, _, _ = _record_game(2, keyframe_interval=32)
+    data = record.to_bytes()
+    with pytest.raises(ValueError):
+        GameRecord.from_bytes(b"XX" + data[2:])
+    with pytest.raises(ValueError):
+        GameRecord.from_bytes(data[:-1])
+    # 山と合わないツモ（最初の手の牌種を書き換える）
+    assert record.deltas[0][0] == OP_DRAW
+    bad = bytearray(data)
+    first_kind = len(data) - len(record) * 4 + 2
+    bad[first_kind] = (bad[first_kind] + 1) % 34
+    with pytest.raises(ValueError):
+        GameRecord.from_bytes(bytes(bad))
+    path = tmp_path / "broken.rec"
+    path.write_bytes(data[:10])
+    assert load_record(str(path)) is None
+
+def test_turn_positions_start_each_turn():
+    record, _, _ = _record_game(3, keyframe_interval=32)
+    positions = record.turn_positions()
+    assert positions[0] == 0 and positions[-1] == len(record)
+    assert positions == sorted(set(positions))
+    for position in positions[1:-1]:
+        assert record.deltas[position - 1][0] in (OP_TURN, OP_PON, OP_CHI)
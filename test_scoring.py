@@ -0,0 +1,63 @@
+from tile import NUM_TILE_KINDS
+import scoring
+from scoring import score_hand, han_to_points
+
+def _counts(kinds: list) -> list:
+    counts = [0] * NUM_TILE_KINDS
+    for kind in kinds:
+        counts[kind] += 1
+    return counts
+
+def _yaku(result) -> set:
+    return {name for name, _ in result.yaku}
+
+# 234萬 567萬 345筒 678索 55筒（2萬で両面待ちの和了）
+_PINFU = [1, 2, 3, 4, 5, 6, 11, 12, 13, 23, 24, 25, 13, 13]
+
+def test_pinfu_tanyao_ron_and_tsumo():
+    ron = score_hand(_counts(_PINFU), win_kind=1)
+    assert _yaku(ron) == {"断么九", "平和"}
+    assert (ron.han, ron.points) == (2, 2000)
+    tsumo = score_hand(_counts(_PINFU), win_kind=1, tsumo=True)
+    assert _yaku(tsumo) == {"門前清自摸和", "断么九", "平和"}
+    assert (tsumo.han, tsumo.points) == (3, 3900)
+
+def test_not_a_winning_hand():
+    kinds = list(_PINFU)
+    kinds[0] = 0
+    assert score_hand(_counts(kinds), win_kind=0) is None
+
+def test_concealed_triplets_depend_on_how_the_hand_was_completed():
+    kinds = [0, 0, 0, 10, 10, 10, 20, 20, 20, 30, 30, 30, 27, 27]
+    assert score_hand(_counts(kinds), win_kind=30, tsumo=True).yakuman
+    ron = score_hand(_counts(kinds), win_kind=30)
+    assert not ron.yakuman
+    assert _yaku(ron) == {"対々和", "三暗刻"}
+    assert (ron.han, ron.points) == (4, 7700)
+    # 単騎待ちのロンなら4つの刻子は全て暗刻
+    assert _yaku(score_hand(_counts(kinds), win_kind=27)) == {"四暗刻"}
+
+def test_chiitoitsu_and_yakuman():
+    chiitoitsu = score_hand(_counts([1, 1, 3, 3, 5, 5, 10, 10, 14, 14, 20, 20, 24, 24]), win_kind=24)
+    assert _yaku(chiitoitsu) == {"七対子", "断么九"}
+    daisangen = score_hand(_counts([31, 31, 31, 32, 32, 32, 33, 33, 33, 0, 1, 2, 9, 9]), win_kind=33)
+    assert daisangen.yakuman and daisangen.points == han_to_points(scoring.YAKUMAN_HAN) == 32000
+
+def test_open_hand_reduces_han_and_drops_menzen_yaku():
+    # 發をポンした萬子の混一色（門前なら3翻、鳴くと2翻）
+    hand = _counts([0, 0, 0, 1, 2, 3, 4, 5, 6, 7, 8])
+    result = score_hand(hand, melds=[(32, 32, 32)], win_kind=8)
+    assert _yaku(result) == {"役牌", "一気通貫", "混一色"}
+    assert result.han == 1 + 1 + 2
+    assert score_hand(hand, melds=[(32, 32, 32)], win_kind=8, tsumo=True).han == result.han
+
+def test_results_are_cached_regardless_of_meld_order():
+    scoring.clear_cache()
+    hand = _counts([0, 1, 2, 9, 9])
+    melds = [(31, 31, 31), (5, 4, 3), (32, 32, 32)]
+    first = score_hand(hand, melds=melds, win_kind=2)
+    assert score_hand(hand, melds=list(reversed(melds)), win_kind=2) is first
+    stats = scoring.get_cache_stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (1, 1, 1)
+    scoring.clear_cache()
+    assert scoring.get_cache_stats()['size'] == 0
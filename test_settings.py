@@ -0,0 +1,60 @@
+import json
+import os
+import settings as settings_module
+from settings import Settings
+from tile import TileType, tile_kind
+
+def _image(tmp_path, name: str) -> str:
+    path = tmp_path / name
+    path.write_bytes(b"")
+    return str(path)
+
+def test_flush_writes_atomically_and_reloads(tmp_path):
+    settings_file = str(tmp_path / "settings.json")
+    settings = Settings(settings_file)
+    image = _image(tmp_path, "a.png")
+    assert settings.set_custom_image(TileType.MANZU, 1, image)
+    assert settings.flush()
+    assert not os.path.exists(settings_file + ".tmp")
+    assert Settings(settings_file).get_custom_image_by_kind(tile_kind(TileType.MANZU, 1)) == image
+
+def test_failed_write_keeps_the_change_pending(tmp_path, monkeypatch):
+    settings_file = str(tmp_path / "settings.json")
+    settings = Settings(settings_file)
+    settings.set_custom_image(TileType.PINZU, 5, _image(tmp_path, "p5.png"))
+
+    def fail(*args):
+        raise OSError("disk full")
+    monkeypatch.setattr(settings_module.os, "replace", fail)
+    assert not settings.flush()
+    assert not os.path.exists(settings_file)
+    monkeypatch.undo()
+    assert settings.flush()
+    assert "pinzu_5" in json.load(open(settings_file, encoding="utf-8"))["custom_images"]
+
+def test_external_edit_is_reloaded(tmp_path):
+    settings_file = tmp_path / "settings.json"
+    settings = Settings(str(settings_file))
+    image = _image(tmp_path, "s9.png")
+    settings_file.write_text(json.dumps({"custom_images": {"souzu_9": image}}), encoding="utf-8")
+    assert settings.reload_if_changed()
+    assert settings.get_custom_image(TileType.SOUZU, 9) == image
+
+def test_change_during_reload_is_not_overwritten(tmp_path, monkeypatch):
+    settings_file = tmp_path / "settings.json"
+    settings = Settings(str(settings_file))
+    settings_file.write_text(json.dumps({"custom_images": {}}), encoding="utf-8")
+    image = _image(tmp_path, "m2.png")
+    original_load = json.load
+
+    def load_and_change(f):
+        # ファイルを読んでいる間に別のスレッドが設定を変えた場合
+        data = original_load(f)
+        settings.set_custom_image(TileType.MANZU, 2, image)
+        return data
+    monkeypatch.setattr(settings_module.json, "load", load_and_change)
+    assert not settings.reload_if_changed()
+    monkeypatch.undo()
+    assert settings.get_custom_image(TileType.MANZU, 2) == image
+    assert settings.flush()
+    assert Settings(str(settings_file)).get_custom_image(TileType.MANZU, 2) == image
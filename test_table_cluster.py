@@ -0,0 +1,54 @@
+import asyncio
+import json
+from table_server import encode_message
+from table_cluster import ShardedTableServer
+
+async def _request(reader, writer, message) -> dict:
+    writer.write(message if isinstance(message, bytes) else encode_message(message))
+    await writer.drain()
+    return json.loads(await asyncio.wait_for(reader.readline(), 10.0))
+
+def _run_with_cluster(scenario, worker_count: int = 2):
+    async def main():
+        server = ShardedTableServer(worker_count, port=0)
+        await server.start()
+        try:
+            return await scenario(server)
+        finally:
+            server.server.close()
+            await server.server.wait_closed()
+            server.stop_workers()
+    return asyncio.run(main())
+
+def test_bad_input_is_rejected_without_dropping_the_client():
+    async def scenario(server):
+        reader, writer = await asyncio.open_connection(server.host, server.port)
+        for message in [b"[]\n", b"1\n", b"not json\n", b"\xff\n",
+                        {"t": "join", "table": True, "seat": 0},
+                        {"t": "join", "table": "1", "seat": 0},
+                        {"t": "discard", "i": 0}]:
+            reply = await _request(reader, writer, message)
+            assert reply["t"] == "err", message
+        assert (await _request(reader, writer, {"t": "stats"}))["t"] == "stats"
+        writer.close()
+    _run_with_cluster(scenario)
+
+def test_tables_are_spread_and_joins_reach_their_worker():
+    async def scenario(server):
+        reader, writer = await asyncio.open_connection(server.host, server.port)
+        tables = []
+        for _ in range(2):
+            reply = await _request(reader, writer, {"t": "create", "humans": [0], "delay": 0})
+            assert reply["t"] == "created"
+            tables.append(reply["table"])
+        # 負荷の低いワーカーに順に置かれ、卓IDからワーカーが分かる
+        assert sorted(table % 2 for table in tables) == [0, 1]
+        assert sorted(worker["pending"] for worker in server.get_stats()["workers"]) == [1, 1]
+
+        for table in tables:
+            reader2, writer2 = await asyncio.open_connection(server.host, server.port)
+            reply = await _request(reader2, writer2, {"t": "join", "table": table, "seat": 0})
+            assert reply == {"t": "joined", "table": table, "seat": 0}
+            writer2.close()
+        writer.close()
+    _run_with_cluster(scenario)
@@ -0,0 +1,54 @@
+import os
+import random
+from io import BytesIO
+from PIL import Image
+from game_logic import MultiPlayerGameState, PlayerType
+from game_controller import iter_game_events
+from game_snapshot import GameSnapshot
+from table_render import TableRenderer, render_batch
+
+def _finished_games(count: int) -> list:
+    states = []
+    for seed in range(count):
+        random.seed(seed)
+        state = MultiPlayerGameState([PlayerType.CPU] * 4)
+        for _ in iter_game_events(state):
+            pass
+        states.append(state)
+    return states
+
+def test_state_and_snapshot_render_the_same_png():
+    random.seed(0)
+    state = MultiPlayerGameState([PlayerType.CPU] * 4)
+    state.draw_tile_for_player(0)
+    state.discard_tile_for_player(0, 0)
+    renderer = TableRenderer(settings=None)
+    data = renderer.render_png(state)
+    assert data == renderer.render_png(GameSnapshot.from_state(state))
+    with Image.open(BytesIO(data)) as image:
+        assert image.format == "PNG"
+        assert image.size == (renderer.width, renderer.height)
+
+def test_describe_result():
+    random.seed(0)
+    state = MultiPlayerGameState([PlayerType.CPU] * 4)
+    assert TableRenderer.describe_result(GameSnapshot.from_state(state)) == ""
+    for state in _finished_games(20):
+        text = TableRenderer.describe_result(GameSnapshot.from_state(state))
+        if state.winner < 0:
+            assert text == "draw"
+        elif state.win_from < 0:
+            assert text.startswith(f"P{state.winner + 1} tsumo ")
+            assert text.endswith(f" {state.win_score.points}")
+        else:
+            assert text.startswith(f"P{state.winner + 1} ron from P{state.win_from + 1} ")
+            assert text.endswith(f" {state.win_score.points}")
+
+def test_render_batch_accepts_every_source_type(tmp_path):
+    state = _finished_games(1)[0]
+    snapshot = GameSnapshot.from_state(state)
+    output_dir = str(tmp_path / "out")
+    paths = render_batch([state, snapshot, snapshot.to_bytes()], output_dir, workers=1, settings_file=None)
+    assert [os.path.basename(path) for path in paths] == ["table_00000.png", "table_00001.png", "table_00002.png"]
+    contents = {open(path, "rb").read() for path in paths}
+    assert len(contents) == 1
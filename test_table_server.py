@@ -0,0 +1,81 @@
+import asyncio
+import json
+from table_server import TableHost, TableServer, JOIN_TIMEOUT, encode_message
+
+async def _connect(server: TableServer):
+    reader, writer = await asyncio.open_connection(server.host, server.port)
+    return reader, writer
+
+async def _request(reader, writer, message) -> dict:
+    writer.write(message if isinstance(message, bytes) else encode_message(message))
+    await writer.drain()
+    return json.loads(await asyncio.wait_for(reader.readline(), 5.0))
+
+def _run_with_server(scenario):
+    async def main():
+        server = TableServer(port=0)
+        await server.start()
+        try:
+            return await scenario(server)
+        finally:
+            server.server.close()
+            await server.server.wait_closed()
+    return asyncio.run(main())
+
+def test_malformed_messages_are_rejected_without_dropping_the_client():
+    async def scenario(server):
+        reader, writer = await _connect(server)
+        bad_messages = [
+            b"[1]\n",
+            b"not json\n",
+            {"t": "create", "delay": "x"},
+            {"t": "create", "delay": -1},
+            {"t": "create", "humans": []},
+            {"t": "create", "humans": [0, 4]},
+            {"t": "create", "humans": [True]},
+            {"t": "join", "table": [1], "seat": 0},
+            {"t": "join", "table": 1, "seat": "0"},
+            {"t": "claim", "c": [1]},
+            {"t": "discard", "i": "0"},
+        ]
+        replies = [await _request(reader, writer, message) for message in bad_messages]
+        created = await _request(reader, writer, {"t": "create", "humans": [0], "delay": 0})
+        writer.close()
+        return replies, created, server.table_host.tables
+    replies, created, tables = _run_with_server(scenario)
+    assert all(reply["t"] == "err" for reply in replies)
+    assert created["t"] == "created"
+    assert list(tables) == [created["table"]]
+
+def test_unjoined_tables_expire():
+    host = TableHost()
+    waiting = host.create_table([0], 0.0)
+    fresh = host.create_table([1], 0.0)
+    waiting.created_at -= JOIN_TIMEOUT + 1
+    host.remove_finished_tables()
+    assert waiting.finished
+    assert list(host.tables) == [fresh.table_id]
+
+def test_table_keeps_running_after_a_human_disconnects():
+    async def play(reader, writer):
+        """捨て牌は常に先頭、鳴きは見送り。終局まで続ける"""
+        while True:
+            message = json.loads(await asyncio.wait_for(reader.readline(), 10.0))
+            if message["t"] == "end":
+                return True
+            if message["t"] == "your_turn":
+                writer.write(encode_message({"t": "discard", "i": 0}))
+            elif message["t"] == "claim_offer":
+                writer.write(encode_message({"t": "claim", "c": None}))
+
+    async def scenario(server):
+        reader0, writer0 = await _connect(server)
+        reader1, writer1 = await _connect(server)
+        table_id = (await _request(reader0, writer0, {"t": "create", "humans": [0, 1], "delay": 0}))["table"]
+        assert (await _request(reader0, writer0, {"t": "join", "table": table_id, "seat": 0}))["t"] == "joined"
+        assert (await _request(reader1, writer1, {"t": "join", "table": table_id, "seat": 1}))["t"] == "joined"
+        writer1.close()
+        finished = await asyncio.wait_for(play(reader0, writer0), 60.0)
+        writer0.close()
+        return finished
+    assert _run_with_server(scenario)
@@ -0,0 +1,88 @@
+import random
+import pytest
+from tile import create_all_tiles
+from wall import Wall, NUM_TILES
+from game_logic import MultiPlayerGameState, GameState, PlayerType
+
+def _old_deal(seed: int, players: int = 4, size: int = 13):
+    """以前の配り方（牌のリストを並べ替え、1枚ずつ順番に pop() して配る）"""
+    random.seed(seed)
+    mountain = create_all_tiles()
+    random.shuffle(mountain)
+    hands = [[] for _ in range(players)]
+    for _ in range(size):
+        for hand in hands:
+            hand.append(mountain.pop().kind)
+    return hands, [tile.kind for tile in mountain]
+
+def test_deal_hands_matches_one_tile_at_a_time_dealing():
+    wall = Wall()
+    for seed in range(20):
+        random.seed(seed)
+        wall.shuffle()
+        hands = [[tile.kind for tile in hand] for hand in wall.deal_hands(4, 13)]
+        assert (hands, list(wall.kinds())) == _old_deal(seed)
+
+def test_shuffle_reuses_tiles_and_keeps_a_permutation():
+    wall = Wall()
+    tiles = list(wall.tiles)
+    for _ in range(5):
+        wall.shuffle()
+        wall.deal_hands(4, 13)
+        wall.pop()
+    wall.shuffle()
+    assert sorted(wall.ids) == list(range(NUM_TILES))
+    assert len(wall) == NUM_TILES
+    assert all(a is b for a, b in zip(wall.tiles, tiles))
+    assert not any(tile.is_in_hand or tile.is_discarded for tile in wall)
+
+def test_pop_and_append_round_trip():
+    wall = Wall()
+    wall.shuffle()
+    before = bytes(wall.kinds())
+    tile = wall.pop()
+    assert len(wall) == NUM_TILES - 1
+    wall.append(tile)
+    assert bytes(wall.kinds()) == before
+    wall.clear()
+    assert not wall and len(wall) == 0
+
+def test_load_restores_kinds_and_accepts_foreign_tiles():
+    wall = Wall()
+    kinds = bytes([0, 0, 5, 33, 12])
+    wall.load(kinds)
+    assert bytes(wall.kinds()) == kinds
+    assert sorted(wall.ids) == list(range(NUM_TILES))
+    foreign = create_all_tiles()[5 * 4]
+    wall.append(foreign)
+    assert wall.pop() is foreign
+    # 山の外の牌はその局の間だけ使い、並べ替えると元の牌に戻る
+    wall.shuffle()
+    assert all(tile is not foreign for tile in wall)
+    assert len({id(tile) for tile in wall}) == NUM_TILES
+
+def test_load_rejects_bad_kinds_without_changing_the_wall():
+    wall = Wall()
+    wall.shuffle()
+    before = bytes(wall.ids), len(wall)
+    for kinds in (bytes([0, 1, 34]), bytes([200]), bytes([7] * 5)):
+        with pytest.raises(ValueError):
+            wall.load(kinds)
+        assert (bytes(wall.ids), len(wall)) == before
+
+def test_append_of_a_fifth_tile_is_rejected():
+    wall = Wall()
+    wall.shuffle()
+    with pytest.raises(ValueError):
+        wall.append(create_all_tiles()[0])
+
+def test_states_deal_from_the_reused_wall():
+    random.seed(1)
+    state = MultiPlayerGameState([PlayerType.CPU] * 4)
+    mountain = state.mountain
+    state.reset_game()
+    assert state.mountain is mountain
+    assert len(state.mountain) == NUM_TILES - 52
+    assert all(len(player.hand) == 13 for player in state.players)
+    game = GameState()
+    assert len(game.hand) == 13 and game.get_mountain_count() == NUM_TILES - 13
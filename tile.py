@@ -8,6 +8,30 @@ class TileType(Enum):
     SOUZU = "souzu"      # 索子
     JIHAI = "jihai"      # 字牌
 
+# 牌種インデックス（0-8: 萬子, 9-17: 筒子, 18-26: 索子, 27-33: 字牌）
+NUM_TILE_KINDS = 34
+JIHAI_START = 27
+
+_KIND_OFFSETS = {
+    TileType.MANZU: 0,
+    TileType.PINZU: 9,
+    TileType.SOUZU: 18,
+    TileType.JIHAI: 27
+}
+_KIND_TYPES = [TileType.MANZU, TileType.PINZU, TileType.SOUZU, TileType.JIHAI]
+
+def tile_kind(tile_type: TileType, number: int) -> int:
+    """牌の種類と番号から牌種インデックス（0-33）を求める"""
+    return _KIND_OFFSETS[tile_type] + number - 1
+
+def kind_to_type_number(kind: int) -> tuple:
+    """牌種インデックスから (TileType, 番号) を求める"""
+    return _KIND_TYPES[kind // 9], kind % 9 + 1
+
+def kind_name(kind: int) -> str:
+    """牌種インデックスの表示名"""
+    return str(Tile(*kind_to_type_number(kind)))
+
 class Tile:
     def __init__(self, tile_type: TileType, number: int, image_path: Optional[str] = None):
         self.tile_type = tile_type
@@ -15,6 +39,7 @@ class Tile:
         self.image_path = image_path
         self.is_discarded = False
         self.is_in_hand = False
+        self.kind = tile_kind(tile_type, number)
         
     def __str__(self):
         type_names = {
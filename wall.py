@@ -0,0 +1,127 @@
+import random
+from tile import Tile, create_all_tiles, NUM_TILE_KINDS
+
+# 山（牌の並び）
+# 牌は牌ID（牌種 * 4 + 何枚目か、0-135）の配列と、残り枚数を表すカーソルで持つ
+# 牌オブジェクトは牌IDごとに1つだけ作り、局が変わっても同じ配列・同じ牌を並べ替えて使い回す
+
+NUM_TILES = NUM_TILE_KINDS * 4
+# 牌ID -> 牌種の変換表（bytes.translate 用に256要素）
+_ID_TO_KIND = bytes(min(tile_id // 4, 255) for tile_id in range(256))
+# 並べ替える前の並び（毎回ここから並べ替えるので、乱数の種が同じなら配牌も同じになる）
+_INITIAL_IDS = bytes(range(NUM_TILES))
+
+class Wall:
+    """
+    ids[:count] が残りの山で、末尾（ids[count - 1]）から引く
+    ids[count:] は引かれた牌（配列全体は常に0-135の並べ替え）
+    list と同じく len()・真偽値・pop()・append() で扱える
+    """
+    def __init__(self):
+        self.tiles: list[Tile] = create_all_tiles()  # 牌ID順（create_all_tiles は牌種順に4枚ずつ）
+        self.ids = bytearray(_INITIAL_IDS)
+        self.count = NUM_TILES
+        self._replaced = {}  # append() で山の外の牌に置き換えた牌ID -> 元の牌
+
+    def _restore_tiles(self):
+        """append() で置き換えた牌IDを元の牌に戻す（局が変わる時に呼ぶ）"""
+        for tile_id, tile in self._replaced.items():
+            self.tiles[tile_id] = tile
+        self._replaced.clear()
+
+    def shuffle(self):
+        """全ての牌を山に戻し、同じ配列をその場で並べ替える"""
+        self._restore_tiles()
+        self.ids[:] = _INITIAL_IDS
+        random.shuffle(self.ids)
+        self.count = NUM_TILES
+        for tile in self.tiles:
+            tile.is_in_hand = False
+            tile.is_discarded = False
+
+    def pop(self) -> Tile:
+        """1枚引く（山が空なら IndexError）"""
+        if not self.count:
+            raise IndexError("山に牌がありません")
+        self.count -= 1
+        return self.tiles[self.ids[self.count]]
+
+    def deal(self, n: int) -> list[Tile]:
+        """末尾から n 枚をまとめて引く（1枚ずつ pop() するのと同じ牌を、引いた順に返す）"""
+        n = min(n, self.count)
+        start = self.count - n
+        self.count = start
+        tiles = self.tiles
+        return [tiles[tile_id] for tile_id in reversed(self.ids[start:start + n])]
+
+    def deal_hands(self, players: int, size: int) -> list[list[Tile]]:
+        """
+        players 人に size 枚ずつ配る（1枚ずつ順番に pop() して配るのと同じ牌になる）
+        末尾の players * size 枚を逆順にし、players 枚おきに切り出す
+        """
+        block = self.deal(players * size)
+        return [block[seat::players] for seat in range(players)]
+
+    def append(self, tile: Tile):
+        """引いた牌を山の末尾に戻す（ツモの取り消し用）"""
+        kind_ids = range(tile.kind * 4, tile.kind * 4 + 4)
+        tile_id = next((i for i in kind_ids if self.tiles[i] is tile), None)
+        if tile_id is None:
+            # 山の外で作られた牌（スナップショットから復元した手牌など）は、山にない同じ牌種の牌IDに割り当てる
+            # （この局の間だけ。元の牌は shuffle()・load() で戻す）
+            in_wall = set(self.ids[:self.count])
+            tile_id = next((i for i in kind_ids if i not in in_wall), None)
+            if tile_id is None:
+                raise ValueError(f"同じ牌種が5枚以上になります: {tile}")
+            self._replaced.setdefault(tile_id, self.tiles[tile_id])
+            self.tiles[tile_id] = tile
+        position = self.ids.index(tile_id, self.count)
+        self.ids[position], self.ids[self.count] = self.ids[self.count], tile_id
+        self.count += 1
+
+    def clear(self):
+        """山を空にする"""
+        self.count = 0
+
+    def kinds(self) -> bytes:
+        """残りの山の牌種の並び（先頭が最後に引かれる）"""
+        return self.ids[:self.count].translate(_ID_TO_KIND)
+
+    def load(self, kinds):
+        """
+        牌種の並びから山を作る（スナップショットの復元用）
+        牌種が範囲外・同じ牌種が5枚以上なら ValueError（その場合は山を変更しない）
+        """
+        totals = [0] * NUM_TILE_KINDS
+        for kind in kinds:
+            if not 0 <= kind < NUM_TILE_KINDS:
+                raise ValueError(f"牌種が正しくありません: {kind}")
+            if totals[kind] >= 4:
+                raise ValueError(f"同じ牌種が5枚以上あります: {kind}")
+            totals[kind] += 1
+        self._restore_tiles()
+        next_copy = [0] * NUM_TILE_KINDS
+        for i, kind in enumerate(kinds):
+            self.ids[i] = kind * 4 + next_copy[kind]
+            next_copy[kind] += 1
+        self.count = len(kinds)
+        # 山にない牌IDを後ろに並べ、配列全体を0-135の並べ替えに保つ
+        position = self.count
+        for kind in range(NUM_TILE_KINDS):
+            for copy in range(next_copy[kind], 4):
+                self.ids[position] = kind * 4 + copy
+                position += 1
+        for tile_id in self.ids[:self.count]:
+            self.tiles[tile_id].is_in_hand = False
+            self.tiles[tile_id].is_discarded = False
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def __iter__(self):
+        """残りの山の牌（先頭から）"""
+        tiles = self.tiles
+        return (tiles[tile_id] for tile_id in self.ids[:self.count])